@@ -0,0 +1,188 @@
+"""baseline schema
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001_baseline'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Databases created by Base.metadata.create_all() before migrations existed
+# already have these tables, so the upgrade uses IF NOT EXISTS throughout.
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('analysis_types',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('instructions', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True,
+    )
+    op.create_index(op.f('ix_analysis_types_id'), 'analysis_types', ['id'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_analysis_types_name'), 'analysis_types', ['name'], unique=False, if_not_exists=True)
+    op.create_table('breeds',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True,
+    )
+    op.create_index(op.f('ix_breeds_id'), 'breeds', ['id'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_breeds_name'), 'breeds', ['name'], unique=False, if_not_exists=True)
+    op.create_table('medicines',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('period_hours', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True,
+    )
+    op.create_index(op.f('ix_medicines_id'), 'medicines', ['id'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_medicines_name'), 'medicines', ['name'], unique=False, if_not_exists=True)
+    op.create_table('procedure_types',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True,
+    )
+    op.create_index(op.f('ix_procedure_types_id'), 'procedure_types', ['id'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_procedure_types_name'), 'procedure_types', ['name'], unique=False, if_not_exists=True)
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_name', sa.String(), nullable=True),
+    sa.Column('password', sa.String(), nullable=True),
+    sa.Column('email', sa.String(), nullable=True),
+    sa.Column('role', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True,
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True, if_not_exists=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_users_user_name'), 'users', ['user_name'], unique=False, if_not_exists=True)
+    op.create_table('vaccines',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('manufacturer', sa.String(), nullable=True),
+    sa.Column('type', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True,
+    )
+    op.create_index(op.f('ix_vaccines_id'), 'vaccines', ['id'], unique=False, if_not_exists=True)
+    op.create_table('veterinary_clinics',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('address', sa.String(), nullable=True),
+    sa.Column('phone', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True,
+    )
+    op.create_index(op.f('ix_veterinary_clinics_id'), 'veterinary_clinics', ['id'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_veterinary_clinics_name'), 'veterinary_clinics', ['name'], unique=False, if_not_exists=True)
+    op.create_table('pets',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('age', sa.Integer(), nullable=True),
+    sa.Column('recommendations', sa.String(), nullable=True),
+    sa.Column('breed_id', sa.Integer(), nullable=True),
+    sa.Column('owner_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['breed_id'], ['breeds.id'], ),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True,
+    )
+    op.create_index(op.f('ix_pets_id'), 'pets', ['id'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_pets_name'), 'pets', ['name'], unique=False, if_not_exists=True)
+    op.create_table('appointments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('pet_id', sa.Integer(), nullable=True),
+    sa.Column('scheduled_at', sa.DateTime(), nullable=True),
+    sa.Column('clinic_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('conclusion_status', sa.String(), nullable=True),
+    sa.Column('conclusion', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['clinic_id'], ['veterinary_clinics.id'], ),
+    sa.ForeignKeyConstraint(['pet_id'], ['pets.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True,
+    )
+    op.create_index(op.f('ix_appointments_id'), 'appointments', ['id'], unique=False, if_not_exists=True)
+    op.create_table('medicine_takes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('pet_id', sa.Integer(), nullable=True),
+    sa.Column('medicine_id', sa.Integer(), nullable=True),
+    sa.Column('datetime', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['medicine_id'], ['medicines.id'], ),
+    sa.ForeignKeyConstraint(['pet_id'], ['pets.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True,
+    )
+    op.create_index(op.f('ix_medicine_takes_id'), 'medicine_takes', ['id'], unique=False, if_not_exists=True)
+    op.create_table('analyses',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('appointment_id', sa.Integer(), nullable=True),
+    sa.Column('analysis_type_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['analysis_type_id'], ['analysis_types.id'], ),
+    sa.ForeignKeyConstraint(['appointment_id'], ['appointments.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True,
+    )
+    op.create_index(op.f('ix_analyses_id'), 'analyses', ['id'], unique=False, if_not_exists=True)
+    op.create_table('vaccinations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('appointment_id', sa.Integer(), nullable=True),
+    sa.Column('vaccine_id', sa.Integer(), nullable=True),
+    sa.Column('pet_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['appointment_id'], ['appointments.id'], ),
+    sa.ForeignKeyConstraint(['pet_id'], ['pets.id'], ),
+    sa.ForeignKeyConstraint(['vaccine_id'], ['vaccines.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True,
+    )
+    op.create_index(op.f('ix_vaccinations_id'), 'vaccinations', ['id'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_vaccinations_id'), table_name='vaccinations')
+    op.drop_table('vaccinations')
+    op.drop_index(op.f('ix_analyses_id'), table_name='analyses')
+    op.drop_table('analyses')
+    op.drop_index(op.f('ix_medicine_takes_id'), table_name='medicine_takes')
+    op.drop_table('medicine_takes')
+    op.drop_index(op.f('ix_appointments_id'), table_name='appointments')
+    op.drop_table('appointments')
+    op.drop_index(op.f('ix_pets_name'), table_name='pets')
+    op.drop_index(op.f('ix_pets_id'), table_name='pets')
+    op.drop_table('pets')
+    op.drop_index(op.f('ix_veterinary_clinics_name'), table_name='veterinary_clinics')
+    op.drop_index(op.f('ix_veterinary_clinics_id'), table_name='veterinary_clinics')
+    op.drop_table('veterinary_clinics')
+    op.drop_index(op.f('ix_vaccines_id'), table_name='vaccines')
+    op.drop_table('vaccines')
+    op.drop_index(op.f('ix_users_user_name'), table_name='users')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+    op.drop_index(op.f('ix_procedure_types_name'), table_name='procedure_types')
+    op.drop_index(op.f('ix_procedure_types_id'), table_name='procedure_types')
+    op.drop_table('procedure_types')
+    op.drop_index(op.f('ix_medicines_name'), table_name='medicines')
+    op.drop_index(op.f('ix_medicines_id'), table_name='medicines')
+    op.drop_table('medicines')
+    op.drop_index(op.f('ix_breeds_name'), table_name='breeds')
+    op.drop_index(op.f('ix_breeds_id'), table_name='breeds')
+    op.drop_table('breeds')
+    op.drop_index(op.f('ix_analysis_types_name'), table_name='analysis_types')
+    op.drop_index(op.f('ix_analysis_types_id'), table_name='analysis_types')
+    op.drop_table('analysis_types')
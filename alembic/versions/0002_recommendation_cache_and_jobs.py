@@ -0,0 +1,58 @@
+"""breed recommendation cache and recommendation jobs
+
+Revision ID: 0002_recommendation_cache_and_jobs
+Revises: 0001_baseline
+Create Date: 2026-10-18 12:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_recommendation_cache_and_jobs'
+down_revision: Union[str, None] = '0001_baseline'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('breed_recommendations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('breed_id', sa.Integer(), nullable=True),
+    sa.Column('age', sa.Integer(), nullable=True),
+    sa.Column('prompt_version', sa.Integer(), nullable=True),
+    sa.Column('text', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['breed_id'], ['breeds.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('breed_id', 'age', 'prompt_version'),
+    if_not_exists=True,
+    )
+    op.create_index(op.f('ix_breed_recommendations_created_at'), 'breed_recommendations', ['created_at'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_breed_recommendations_id'), 'breed_recommendations', ['id'], unique=False, if_not_exists=True)
+    op.create_table('recommendation_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('total', sa.Integer(), nullable=True),
+    sa.Column('processed', sa.Integer(), nullable=True),
+    sa.Column('last_pet_id', sa.Integer(), nullable=True),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True,
+    )
+    op.create_index(op.f('ix_recommendation_jobs_id'), 'recommendation_jobs', ['id'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_recommendation_jobs_id'), table_name='recommendation_jobs')
+    op.drop_table('recommendation_jobs')
+    op.drop_index(op.f('ix_breed_recommendations_id'), table_name='breed_recommendations')
+    op.drop_index(op.f('ix_breed_recommendations_created_at'), table_name='breed_recommendations')
+    op.drop_table('breed_recommendations')
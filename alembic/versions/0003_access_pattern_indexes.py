@@ -0,0 +1,57 @@
+"""foreign-key and time indexes matching the repository queries
+
+Revision ID: 0003_access_pattern_indexes
+Revises: 0002_recommendation_cache_and_jobs
+Create Date: 2026-10-18 12:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003_access_pattern_indexes'
+down_revision: Union[str, None] = '0002_recommendation_cache_and_jobs'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Single-column indexes that create_all() added before the composites below
+# replaced them.
+SUPERSEDED = [
+    ('ix_appointments_scheduled_at', 'appointments'),
+    ('ix_vaccinations_appointment_id', 'vaccinations'),
+    ('ix_analyses_appointment_id', 'analyses'),
+    ('ix_medicine_takes_datetime', 'medicine_takes'),
+]
+
+INDEXES = [
+    ('ix_pets_owner_id_id', 'pets', ['owner_id', 'id']),
+    ('ix_pets_breed_id_id', 'pets', ['breed_id', 'id']),
+    ('ix_appointments_scheduled_at_id', 'appointments', ['scheduled_at', 'id']),
+    ('ix_appointments_pet_id_scheduled_at', 'appointments', ['pet_id', 'scheduled_at', 'id']),
+    ('ix_appointments_clinic_id_scheduled_at', 'appointments', ['clinic_id', 'scheduled_at', 'id']),
+    ('ix_vaccinations_appointment_id_id', 'vaccinations', ['appointment_id', 'id']),
+    ('ix_vaccinations_pet_id_id', 'vaccinations', ['pet_id', 'id']),
+    ('ix_vaccinations_vaccine_id_id', 'vaccinations', ['vaccine_id', 'id']),
+    ('ix_medicine_takes_datetime_id', 'medicine_takes', ['datetime', 'id']),
+    ('ix_medicine_takes_pet_id_datetime', 'medicine_takes', ['pet_id', 'datetime', 'id']),
+    ('ix_medicine_takes_pet_id_medicine_id_datetime', 'medicine_takes', ['pet_id', 'medicine_id', 'datetime']),
+    ('ix_medicine_takes_medicine_id_datetime', 'medicine_takes', ['medicine_id', 'datetime']),
+    ('ix_analyses_appointment_id_id', 'analyses', ['appointment_id', 'id']),
+    ('ix_analyses_analysis_type_id_id', 'analyses', ['analysis_type_id', 'id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table in SUPERSEDED:
+        op.drop_index(name, table_name=table, if_exists=True)
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
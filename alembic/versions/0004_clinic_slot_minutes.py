@@ -0,0 +1,33 @@
+"""appointment slot length per clinic
+
+Revision ID: 0004_clinic_slot_minutes
+Revises: 0003_access_pattern_indexes
+Create Date: 2026-10-18 12:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004_clinic_slot_minutes'
+down_revision: Union[str, None] = '0003_access_pattern_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # create_all() may already have added the column; SQLite has no
+    # ADD COLUMN IF NOT EXISTS, so look first.
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('veterinary_clinics')}
+    if 'slot_minutes' not in columns:
+        op.add_column('veterinary_clinics', sa.Column('slot_minutes', sa.Integer(), nullable=False, server_default='30'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('veterinary_clinics') as batch_op:
+        batch_op.drop_column('slot_minutes')
@@ -0,0 +1,35 @@
+"""revaccination interval per vaccine and a (pet, vaccine) vaccinations index
+
+Revision ID: 0005_vaccine_interval_days
+Revises: 0004_clinic_slot_minutes
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005_vaccine_interval_days'
+down_revision: Union[str, None] = '0004_clinic_slot_minutes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('vaccines')}
+    if 'interval_days' not in columns:
+        op.add_column('vaccines', sa.Column('interval_days', sa.Integer(), nullable=True))
+    op.create_index(
+        'ix_vaccinations_vaccine_id_pet_id', 'vaccinations', ['vaccine_id', 'pet_id', 'appointment_id'], if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_vaccinations_vaccine_id_pet_id', table_name='vaccinations')
+    with op.batch_alter_table('vaccines') as batch_op:
+        batch_op.drop_column('interval_days')
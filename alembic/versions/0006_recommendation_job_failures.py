@@ -0,0 +1,33 @@
+"""failed and skipped pet counts per recommendation job
+
+Revision ID: 0006_recommendation_job_failures
+Revises: 0005_vaccine_interval_days
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006_recommendation_job_failures'
+down_revision: Union[str, None] = '0005_vaccine_interval_days'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('recommendation_jobs')}
+    for name in ('failed', 'skipped'):
+        if name not in columns:
+            op.add_column('recommendation_jobs', sa.Column(name, sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('recommendation_jobs') as batch_op:
+        batch_op.drop_column('skipped')
+        batch_op.drop_column('failed')
@@ -1,7 +1,24 @@
+import gc
+from dotenv import find_dotenv, load_dotenv
+
+# .env has to be in the environment before the app (and src.config) is imported
+load_dotenv(find_dotenv(usecwd=True))
+
 bind            = "127.0.0.1:8000"
 workers         = 2
 worker_class    = "uvicorn.workers.UvicornWorker"
 timeout         = 30
 loglevel        = "info"
 accesslog       = "/home/fastapi/Kursovaya/logs/access.log"
-errorlog        = "/home/fastapi/Kursovaya/logs/error.log"
\ No newline at end of file
+errorlog        = "/home/fastapi/Kursovaya/logs/error.log"
+
+# main:app is imported once in the master and the workers fork from it, so a
+# worker (re)start skips the imports; the app opens no connections or clients
+# until a worker serves its first request
+preload_app     = True
+
+
+# moves the preloaded objects out of the collector's generations, so the
+# workers' collections do not write to (and copy) the shared pages
+def when_ready(server):
+    gc.freeze()
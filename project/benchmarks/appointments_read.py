@@ -0,0 +1,104 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, joinedload
+from src.database import Base
+from src.models import Appointment, Pet, Breed, VeterinaryClinic, Vaccine, Vaccination, AnalysisType, Analysis
+from src.pagination import PageParams
+from src.repository import get_appointments
+
+# Compares the old eager-load + Python loop implementation of get_appointments
+# with the column-level read model.
+#   python -m benchmarks.appointments_read --rows 1000000
+
+
+def seed(db: Session, rows: int, batch: int = 50000):
+    random.seed(42)
+    db.execute(insert(Breed), [{"name": f"breed {i}"} for i in range(50)])
+    db.execute(insert(VeterinaryClinic), [{"name": f"clinic {i}", "address": "", "phone": ""} for i in range(20)])
+    db.execute(insert(Vaccine), [{"name": f"vaccine {i}", "manufacturer": "", "type": ""} for i in range(10)])
+    db.execute(insert(AnalysisType), [{"name": f"analysis {i}", "description": "", "instructions": ""} for i in range(10)])
+    pets = max(1, rows // 10)
+    db.execute(insert(Pet), [{"name": f"pet {i}", "age": i % 15, "breed_id": i % 50 + 1, "owner_id": 1} for i in range(pets)])
+    start = datetime(2020, 1, 1)
+    for offset in range(0, rows, batch):
+        count = min(batch, rows - offset)
+        db.execute(insert(Appointment), [{
+            "pet_id": random.randint(1, pets),
+            "clinic_id": random.randint(1, 20),
+            "scheduled_at": start + timedelta(minutes=30 * (offset + i)),
+            "status": "done",
+            "conclusion_status": "pending",
+        } for i in range(count)])
+        ids = range(offset + 1, offset + count + 1)
+        db.execute(insert(Vaccination), [
+            {"appointment_id": i, "vaccine_id": i % 10 + 1, "pet_id": 1} for i in ids if i % 3 == 0 for _ in range(2)
+        ])
+        db.execute(insert(Analysis), [
+            {"appointment_id": i, "analysis_type_id": i % 10 + 1} for i in ids if i % 3 != 2 for _ in range(2)
+        ])
+    db.commit()
+
+
+def legacy_get_appointments(db: Session):
+    appointments = db.query(Appointment).options(
+        joinedload(Appointment.pet),
+        joinedload(Appointment.vaccinations).joinedload(Vaccination.vaccine),
+        joinedload(Appointment.analyses).joinedload(Analysis.analysis_type)
+    ).all()
+    result = []
+    for appt in appointments:
+        procedure = None
+        if appt.vaccinations:
+            procedure = {"type": "Vaccination", "name": appt.vaccinations[0].vaccine.name}
+        elif appt.analyses:
+            procedure = {"type": "Analysis", "name": appt.analyses[0].analysis_type.name}
+        result.append({
+            "id": appt.id,
+            "pet_id": appt.pet_id,
+            "pet_name": appt.pet.name if appt.pet else "Unknown",
+            "scheduled_at": appt.scheduled_at,
+            "clinic_id": appt.clinic_id,
+            "status": appt.status,
+            "procedure": procedure,
+            "conclusion_status": appt.conclusion_status,
+            "conclusion": appt.conclusion,
+        })
+    return result
+
+
+def measure(name, engine, fn):
+    with Session(engine) as db:
+        started = time.perf_counter()
+        rows = fn(db)
+        elapsed = time.perf_counter() - started
+    print(f"{name:<12} {len(rows):>9} rows  {elapsed:8.2f}s  {len(rows) / elapsed:>12,.0f} rows/s")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        started = time.perf_counter()
+        seed(db, args.rows)
+        print(f"seeded {args.rows} appointments in {time.perf_counter() - started:.1f}s")
+
+    legacy = measure("eager-load", engine, legacy_get_appointments)
+    current = measure("read model", engine, lambda db: get_appointments(db, PageParams(None, args.rows)).items)
+    legacy_by_id = {row["id"]: row for row in legacy}
+    assert all(legacy_by_id[row["id"]] == row for row in current), "read model differs from eager-load output"
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
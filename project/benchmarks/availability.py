@@ -0,0 +1,84 @@
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+
+# Month-long availability lookups and conflict-checked bookings for a busy
+# clinic, straight against the repository functions.
+#   python -m benchmarks.availability --years 3 --occupancy 0.7
+
+
+def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--occupancy", type=float, default=0.7)
+    parser.add_argument("--slot", type=int, default=15)
+    parser.add_argument("--clinics", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+    from fastapi import HTTPException
+    from src.database import Base, get_engine, session
+    from src.models import Appointment, Breed, Pet, VeterinaryClinic
+    from src.repository import create_appointment
+    from src.schemas import AppointmentCreate
+    from src.slots import get_clinic_availability
+
+    Base.metadata.create_all(bind=get_engine())
+    random.seed(42)
+    slot = timedelta(minutes=args.slot)
+    start = datetime(2022, 1, 1)
+    slots = int(timedelta(days=365 * args.years) / slot)
+    with session() as db:
+        db.execute(insert(Breed), [{"name": "breed"}])
+        db.execute(insert(Pet), [{"name": "pet", "age": 1, "breed_id": 1}])
+        db.execute(insert(VeterinaryClinic), [
+            {"name": f"clinic {i}", "address": "", "phone": "", "slot_minutes": args.slot} for i in range(args.clinics)
+        ])
+        rows = [
+            {"pet_id": 1, "clinic_id": clinic, "scheduled_at": start + i * slot, "status": "new", "conclusion_status": "pending"}
+            for clinic in range(1, args.clinics + 1) for i in range(slots) if random.random() < args.occupancy
+        ]
+        db.execute(insert(Appointment), rows)
+        db.commit()
+        print(f"seeded {len(rows)} appointments over {args.clinics} clinics, {args.years} years of {args.slot}-minute slots")
+
+        def month():
+            since = start + timedelta(days=random.randint(0, 365 * args.years - 31))
+            return get_clinic_availability(db, 1, since, since + timedelta(days=30))
+
+        free = len(month()["free"])
+        p50, p99 = timed(month, args.repeat)
+        print(f"30-day availability     p50 {p50:7.2f}ms  p99 {p99:7.2f}ms  ({free} free slots in one sample)")
+
+        def book():
+            at = start + random.randint(0, slots) * slot
+            try:
+                create_appointment(db, AppointmentCreate(pet_id=1, clinic_id=1, scheduled_at=at, status="new", conclusion_status="pending"))
+            except HTTPException:
+                pass
+
+        p50, p99 = timed(book, args.repeat)
+        print(f"conflict-checked book   p50 {p50:7.2f}ms  p99 {p99:7.2f}ms")
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
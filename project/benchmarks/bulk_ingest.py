@@ -0,0 +1,71 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Appointment ingest through single-row POST /appointments/ versus
+# POST /appointments/bulk with an NDJSON body, in-process through TestClient.
+# Every row gets its own slot, so none is rejected by the slot check.
+#   python -m benchmarks.bulk_ingest --single 500 --bulk 50000 --batch 5000
+
+START = datetime(2024, 1, 1)
+
+
+def appointment(i: int):
+    return {
+        "pet_id": 1,
+        "clinic_id": 1,
+        "scheduled_at": (START + timedelta(hours=i)).isoformat(),
+        "status": "scheduled",
+        "conclusion_status": "pending",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--single", type=int, default=500)
+    parser.add_argument("--bulk", type=int, default=50000)
+    parser.add_argument("--batch", type=int, default=5000)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{directory}/bench.db")
+    os.environ.setdefault("ORIGINS", "*")
+    os.environ["BULK_MAX_ITEMS"] = str(max(args.batch, int(os.environ.get("BULK_MAX_ITEMS", 0))))
+
+    from fastapi.testclient import TestClient
+    from main import app
+    from src.database import Base, get_engine, session
+    from src.models import Breed, Pet, VeterinaryClinic
+
+    Base.metadata.create_all(bind=get_engine())
+
+    with session() as db:
+        db.add_all([Breed(id=1, name="bench"), VeterinaryClinic(id=1, name="bench", address="", phone="")])
+        db.add(Pet(id=1, name="bench", age=3, breed_id=1, owner_id=1))
+        db.commit()
+
+    with TestClient(app) as client:
+        started = time.perf_counter()
+        for i in range(args.single):
+            assert client.post("/appointments/", json=appointment(i)).status_code == 200
+        single = args.single / (time.perf_counter() - started)
+
+        created = 0
+        started = time.perf_counter()
+        for offset in range(0, args.bulk, args.batch):
+            body = "\n".join(json.dumps(appointment(args.single + i)) for i in range(offset, min(args.bulk, offset + args.batch)))
+            response = client.post("/appointments/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+            assert response.status_code == 200 and not response.json()["errors"]
+            created += len(response.json()["created"])
+        bulk = created / (time.perf_counter() - started)
+
+    print(f"database={os.environ['DATABASE_URL']}")
+    print(f"single: {args.single} rows, {single:.0f} rows/s")
+    print(f"bulk:   {created} rows in batches of {args.batch}, {bulk:.0f} rows/s ({bulk / single:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
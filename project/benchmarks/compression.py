@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import zlib
+from datetime import datetime, timedelta
+
+# Bytes on the wire and compression CPU per endpoint, on a database seeded with
+# benchmarks.seed. Each body is fetched once uncompressed and then through the
+# middleware with every available encoding (decoded and compared with the plain
+# body). The levels table compresses the plain body offline, so the CPU column
+# is the encoder alone. The transfer column is the body's time on a --mbps link.
+#   python -m benchmarks.seed --url sqlite:////tmp/bench.db --pets 100000
+#   python -m benchmarks.compression --url sqlite:////tmp/bench.db [--mbps 10]
+
+GZIP_LEVELS = (1, 3, 5, 6, 9)
+BROTLI_QUALITIES = (1, 3, 4, 5, 7, 11)
+
+
+def cases():
+    since = (datetime.utcnow() - timedelta(days=7)).replace(microsecond=0).isoformat()
+    return [
+        ("/appointments/?clinic_id", "/appointments/", {"clinic_id": 1, "limit": 1000}),
+        ("/appointments/", "/appointments/", {"limit": 1000}),
+        ("/pets/?all=true", "/pets/", {"all": "true", "limit": 1000}),
+        ("/vaccinations/", "/vaccinations/", {"limit": 1000}),
+        ("/medicine-takes/", "/medicine-takes/", {"limit": 1000}),
+        ("/pets/1/timeline", "/pets/1/timeline", {}),
+        ("/clinics/", "/clinics/", {}),
+        ("/breeds/", "/breeds/", {}),
+        ("/appointments/export (7 days)", "/appointments/export", {"since": since}),
+    ]
+
+
+def cpu_ms(encoder, body: bytes, repeat: int):
+    started = time.process_time()
+    for _ in range(repeat):
+        compressed = encoder()(body, True)
+    return len(compressed), (time.process_time() - started) / repeat * 1000
+
+
+async def measure(args):
+    import httpx
+    import main
+    from src.compression import ENCODERS, brotli_encoder, gzip_encoder
+
+    decoders = {"gzip": lambda data: zlib.decompress(data, zlib.MAX_WBITS | 16)}
+    if "br" in ENCODERS:
+        import brotli
+        decoders["br"] = brotli.decompress
+    levels = [(f"gzip {level}", lambda level=level: gzip_encoder(level)) for level in GZIP_LEVELS]
+    if "br" in ENCODERS:
+        levels += [(f"br {quality}", lambda quality=quality: brotli_encoder(quality)) for quality in BROTLI_QUALITIES]
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        await main.app.router.startup()
+        login = await client.post("/users/login", data={"username": "user1", "password": "password"})
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        for name, path, params in cases():
+            plain = (await client.get(path, params=params, headers={**headers, "Accept-Encoding": "identity"})).content
+            wire = {}
+            for encoding, decode in decoders.items():
+                async with client.stream("GET", path, params=params, headers={**headers, "Accept-Encoding": encoding}) as response:
+                    raw = b"".join([chunk async for chunk in response.aiter_raw()])
+                    used = response.headers.get("content-encoding")
+                body = decode(raw) if used else raw
+                wire[encoding] = f"{len(raw):>9} B {'' if used else '(plain)':<8}" + ("" if body == plain else " MISMATCH")
+            transfer = len(plain) * 8 / (args.mbps * 1e6) * 1000
+            print(f"\n{name}: {len(plain)} B plain, {transfer:.1f}ms on {args.mbps} Mbit/s; middleware: "
+                  + ", ".join(f"{encoding} {result}" for encoding, result in wire.items()))
+            if len(plain) < 1024:
+                continue
+            for label, encoder in levels:
+                size, cpu = cpu_ms(encoder, plain, args.repeat)
+                transfer = size * 8 / (args.mbps * 1e6) * 1000
+                print(f"  {label:<8} {size:>9} B  ratio {len(plain) / size:5.1f}x  cpu {cpu:7.2f}ms  transfer {transfer:7.2f}ms  "
+                      f"cpu+transfer {cpu + transfer:7.2f}ms")
+        await main.app.router.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", required=True, help="database seeded with benchmarks.seed")
+    parser.add_argument("--mbps", type=float, default=10)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.url
+    os.environ.setdefault("CATALOG_VERSION_DIR", tempfile.mkdtemp())
+    os.environ.setdefault("METRICS_DIR", tempfile.mkdtemp())
+    os.environ.setdefault("SECRET_KEY", "compression")
+    os.environ["COMPRESSION_ENABLED"] = "true"
+    asyncio.run(measure(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Overdue-dose queries answered by the in-memory schedule versus the same
+# question asked of SQLite with a GROUP BY over the medicine takes.
+#   python -m benchmarks.dosing --pairs 300000 --takes 3
+
+
+def seed(db, pairs: int, takes: int, batch: int = 50000):
+    from sqlalchemy import insert
+    from src.models import Breed, Medicine, MedicineTake, Pet
+
+    random.seed(42)
+    medicines = 20
+    pets = max(1, pairs // medicines)
+    db.execute(insert(Breed), [{"name": "breed"}])
+    db.execute(insert(Medicine), [{"name": f"medicine {i}", "period_hours": 4 + i % 5 * 4} for i in range(medicines)])
+    db.execute(insert(Pet), [{"name": f"pet {i}", "age": 1, "breed_id": 1} for i in range(pets)])
+    now = datetime.utcnow()
+    rows = []
+    for pet_id in range(1, pets + 1):
+        for medicine_id in range(1, medicines + 1):
+            last = now - timedelta(minutes=random.randint(0, 24 * 60))
+            for take in range(takes):
+                rows.append({"pet_id": pet_id, "medicine_id": medicine_id, "datetime": last - timedelta(hours=24 * take)})
+            if len(rows) >= batch:
+                db.execute(insert(MedicineTake), rows)
+                rows = []
+    if rows:
+        db.execute(insert(MedicineTake), rows)
+    db.commit()
+    return pets * medicines
+
+
+def sql_overdue(db, limit: int):
+    from sqlalchemy import func, select
+    from src.models import Medicine, MedicineTake
+
+    last = func.max(MedicineTake.datetime)
+    due_at = func.datetime(last, func.printf("+%d hours", Medicine.period_hours))
+    now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+    return db.execute(
+        select(MedicineTake.pet_id, MedicineTake.medicine_id, last, due_at.label("due_at"))
+        .join(Medicine, Medicine.id == MedicineTake.medicine_id)
+        .group_by(MedicineTake.pet_id, MedicineTake.medicine_id)
+        .having(due_at < now)
+        .order_by("due_at").limit(limit)
+    ).all()
+
+
+def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return result, statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pairs", type=int, default=300000)
+    parser.add_argument("--takes", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["CATALOG_VERSION_DIR"] = tempfile.mkdtemp()
+
+    from src.database import Base, get_engine, session
+    from src.dosing import due_doses, overdue_doses, schedule
+
+    Base.metadata.create_all(bind=get_engine())
+    with session() as db:
+        started = time.perf_counter()
+        pairs = seed(db, args.pairs, args.takes)
+        print(f"seeded {pairs} pet/medicine pairs, {pairs * args.takes} takes in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        overdue_doses(db, args.limit)
+        print(f"schedule load            {time.perf_counter() - started:8.2f}s  ({len(schedule.latest)} active pairs)")
+
+        heap, heap_p50, heap_p99 = timed(lambda: overdue_doses(db, args.limit), args.repeat)
+        print(f"overdue from schedule    p50 {heap_p50:8.2f}ms  p99 {heap_p99:8.2f}ms")
+        ahead = datetime.utcnow() + timedelta(hours=2)
+        _, due_p50, due_p99 = timed(lambda: due_doses(db, ahead, args.limit), args.repeat)
+        print(f"due in 2h from schedule  p50 {due_p50:8.2f}ms  p99 {due_p99:8.2f}ms")
+        sql, sql_p50, sql_p99 = timed(lambda: sql_overdue(db, args.limit), max(1, args.repeat // 50))
+        print(f"overdue from SQL         p50 {sql_p50:8.2f}ms  p99 {sql_p99:8.2f}ms")
+        same = [(d.pet_id, d.medicine_id) for d in heap] == [(row[0], row[1]) for row in sql]
+        print(f"same first {args.limit} doses: {same}")
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import column, create_engine, func, select, table
+
+# Latency percentiles and throughput per endpoint on a database seeded with
+# benchmarks.seed. "inprocess" drives the ASGI app directly; "http" starts
+# uvicorn on the same database (or uses --target) and goes through the
+# network stack. Both point the recommendations at a local fake LLM. The
+# results are saved as JSON; --compare prints the change against a saved run.
+#   python -m benchmarks.seed --url sqlite:////tmp/bench.db --pets 100000
+#   python -m benchmarks.endpoints --url sqlite:////tmp/bench.db --mode http --output bench.json
+#   python -m benchmarks.endpoints --url sqlite:////tmp/bench.db --compare bench.json
+
+PROJECT = os.path.join(os.path.dirname(__file__), "..")
+
+
+def scenarios(ids, rng: random.Random):
+    now = datetime.utcnow().replace(second=0, microsecond=0)
+    pet = lambda: rng.randint(1, ids["pets"])
+    clinic = lambda: rng.randint(1, ids["veterinary_clinics"])
+    return [
+        ("GET /pets/", lambda: ("GET", "/pets/", {"auth": True})),
+        ("GET /pets/?all=true", lambda: ("GET", "/pets/", {"auth": True, "params": {"all": "true", "limit": 100}})),
+        ("GET /breeds/", lambda: ("GET", "/breeds/", {})),
+        ("GET /pets/{id}/timeline", lambda: ("GET", f"/pets/{pet()}/timeline", {})),
+        ("GET /appointments/?pet_id", lambda: ("GET", "/appointments/", {"params": {"pet_id": pet()}})),
+        ("GET /appointments/?clinic_id", lambda: ("GET", "/appointments/", {"params": {"clinic_id": clinic(), "limit": 100}})),
+        ("GET /appointments/{id}", lambda: ("GET", f"/appointments/{rng.randint(1, ids['appointments'])}", {})),
+        ("GET /vaccinations/?pet_id", lambda: ("GET", "/vaccinations/", {"params": {"pet_id": pet()}})),
+        ("GET /medicine-takes/?pet_id", lambda: ("GET", "/medicine-takes/", {"params": {"pet_id": pet()}})),
+        ("GET /clinics/{id}/availability", lambda: ("GET", f"/clinics/{clinic()}/availability", {
+            "params": {"from": now.isoformat(), "to": (now + timedelta(days=7)).isoformat()},
+        })),
+        ("GET /vaccinations/report?clinic_id", lambda: ("GET", "/vaccinations/report", {"params": {"clinic_id": clinic()}})),
+        ("GET /medicine-takes/due", lambda: ("GET", "/medicine-takes/due", {"params": {"before": (now + timedelta(hours=1)).isoformat()}})),
+        ("POST /recommendations/", lambda: ("POST", "/recommendations/", {
+            "json": {"breed_id": rng.randint(1, ids["breeds"]), "age": rng.randint(0, 15)},
+        })),
+        ("POST /appointments/", lambda: ("POST", "/appointments/", {"json": {
+            "pet_id": pet(), "clinic_id": clinic(), "status": "scheduled", "conclusion_status": "pending",
+            "scheduled_at": (now + timedelta(days=rng.randint(31, 365), minutes=30 * rng.randrange(48))).isoformat(),
+        }})),
+        ("POST /medicine-takes/", lambda: ("POST", "/medicine-takes/", {"json": {
+            "pet_id": pet(), "medicine_id": rng.randint(1, ids["medicines"]), "datetime": now.isoformat(),
+        }})),
+        ("PATCH /appointments/{id}", lambda: ("PATCH", f"/appointments/{rng.randint(1, ids['appointments'])}", {
+            "json": {"conclusion": "Checked"},
+        })),
+    ]
+
+
+# plain table names: importing src here would read the config before the
+# benchmark has set DATABASE_URL
+def database_ids(url: str):
+    engine = create_engine(url)
+    with engine.connect() as connection:
+        ids = {
+            name: connection.scalar(select(func.max(column("id"))).select_from(table(name))) or 0
+            for name in ("pets", "appointments", "veterinary_clinics", "breeds", "medicines")
+        }
+    engine.dispose()
+    if not ids["pets"]:
+        sys.exit(f"{url} has no pets; seed it first with python -m benchmarks.seed")
+    return ids
+
+
+def percentile(samples, q: float):
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+async def run_scenario(client, build, headers, requests: int, concurrency: int, warmup: int):
+    latencies, statuses = [], {}
+
+    async def one(record: bool):
+        method, path, options = build()
+        options = dict(options)
+        if options.pop("auth", False):
+            options["headers"] = headers
+        started = time.perf_counter()
+        try:
+            status = (await client.request(method, path, **options)).status_code
+        except Exception as error:
+            status = type(error).__name__
+        if record:
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    for _ in range(warmup):
+        await one(False)
+    queue = iter(range(requests))
+
+    async def worker():
+        for _ in queue:
+            await one(True)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if not status.isdigit() or int(status) >= 500)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "statuses": statuses,
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "throughput_rps": round(requests / elapsed, 1),
+    }
+
+
+async def run_suite(client, ids, args):
+    login = await client.post("/users/login", data={"username": "user1", "password": "password"})
+    login.raise_for_status()
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    results = {}
+    for name, build in scenarios(ids, random.Random(args.seed)):
+        if args.only and not any(part in name for part in args.only):
+            continue
+        results[name] = await run_scenario(client, build, headers, args.requests, args.concurrency, args.warmup)
+        result = results[name]
+        print(
+            f"{name:<36} p50 {result['p50_ms']:8.2f}ms  p95 {result['p95_ms']:8.2f}ms  p99 {result['p99_ms']:8.2f}ms  "
+            f"{result['throughput_rps']:8.1f} req/s  errors {result['errors']}  {result['statuses']}"
+        )
+    return results
+
+
+async def run_inprocess(ids, args):
+    import httpx
+    import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        await main.app.router.startup()
+        try:
+            return await run_suite(client, ids, args)
+        finally:
+            await main.app.router.shutdown()
+
+
+async def run_http(ids, args, target: str):
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=target, timeout=60, limits=limits) as client:
+        return await run_suite(client, ids, args)
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def start_server(app: str, port: int, env: dict, workers: int = 1):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=PROJECT, env=env,
+    )
+    for _ in range(200):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return process
+        except OSError:
+            if process.poll() is not None:
+                sys.exit(f"{app} exited with {process.returncode}")
+            time.sleep(0.1)
+    process.terminate()
+    sys.exit(f"{app} did not start on port {port}")
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous: dict, current: dict):
+    print(f"\ncompared with {previous.get('commit')} ({previous.get('timestamp')})")
+    for name, result in current["results"].items():
+        before = previous.get("results", {}).get(name)
+        if before is None:
+            continue
+        change = lambda key: (result[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+        print(
+            f"{name:<36} p50 {change('p50_ms'):+7.1f}%  p95 {change('p95_ms'):+7.1f}%  p99 {change('p99_ms'):+7.1f}%  "
+            f"throughput {change('throughput_rps'):+7.1f}%"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", required=True, help="database seeded with benchmarks.seed")
+    parser.add_argument("--mode", choices=["inprocess", "http"], default="inprocess")
+    parser.add_argument("--target", help="http mode: base URL of an already running server")
+    parser.add_argument("--workers", type=int, default=1, help="http mode: uvicorn workers to start")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--only", nargs="*", help="run only the scenarios whose name contains one of these")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of an earlier run to compare with")
+    args = parser.parse_args()
+
+    ids = database_ids(args.url)
+    llm_port = free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": args.url,
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{llm_port}/v1",
+        "OPENAI_KEY": os.environ.get("OPENAI_KEY", "benchmark"),
+        "FAKE_LLM_DELAY": os.environ.get("FAKE_LLM_DELAY", "0.05"),
+        "ORIGINS": os.environ.get("ORIGINS", "*"),
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "benchmark"),
+        "CATALOG_VERSION_DIR": os.environ.get("CATALOG_VERSION_DIR", tempfile.mkdtemp()),
+        "METRICS_DIR": os.environ.get("METRICS_DIR", tempfile.mkdtemp()),
+    }
+    servers = [start_server("src.fake_llm:app", llm_port, env)]
+    try:
+        if args.mode == "http":
+            target = args.target
+            if target is None:
+                port = free_port()
+                servers.append(start_server("main:app", port, env, args.workers))
+                target = f"http://127.0.0.1:{port}"
+            results = asyncio.run(run_http(ids, args, target))
+        else:
+            os.environ.update(env)
+            results = asyncio.run(run_inprocess(ids, args))
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+        "mode": args.mode,
+        "workers": args.workers if args.mode == "http" and args.target is None else None,
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "python": platform.python_version(),
+        "database": {"url": args.url, **ids},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            compare(json.load(file), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+# Time to first byte, throughput and resident memory of the streaming export
+# endpoints, driven straight through the ASGI interface so nothing buffers
+# the body.
+#   python -m benchmarks.export_stream --rows 1000000 --format csv
+
+
+def rss_mb():
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+async def consume(app, path: str, query: str):
+    started = time.perf_counter()
+    first_byte = None
+    size = 0
+    peak = rss_mb()
+    requested = False
+    finished = asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal first_byte, size, peak
+        if message["type"] != "http.response.body":
+            return
+        if message.get("body"):
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+            size += len(message["body"])
+            peak = max(peak, rss_mb())
+        if not message.get("more_body", False):
+            finished.set()
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "root_path": "", "headers": [], "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80),
+    }
+    await app(scope, receive, send)
+    return first_byte, time.perf_counter() - started, size, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("ORIGINS", "*")
+
+    from main import app
+    from src.database import Base, get_engine, session
+    from benchmarks.appointments_read import seed
+
+    Base.metadata.create_all(bind=get_engine())
+
+    with session() as db:
+        started = time.perf_counter()
+        seed(db, args.rows)
+        print(f"seeded {args.rows} appointments in {time.perf_counter() - started:.1f}s")
+
+    for endpoint in ("/appointments/export", "/vaccinations/export"):
+        before = rss_mb()
+        first_byte, elapsed, size, peak = asyncio.run(consume(app, endpoint, f"format={args.format}"))
+        print(
+            f"{endpoint:<22} first byte {first_byte * 1000:7.1f}ms  total {elapsed:6.2f}s  "
+            f"{size / 1e6:8.1f}MB sent  rss {before:.0f}MB -> peak {peak:.0f}MB"
+        )
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
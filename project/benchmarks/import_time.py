@@ -0,0 +1,74 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+# Import time of main.py per module, from python -X importtime in fresh
+# interpreters (the best of --repeat runs is kept per module). The imports
+# run with ORIGINS unset and DATABASE_URL pointing at a file that must still
+# not exist afterwards, i.e. importing the app has no database side effects.
+#   python -m benchmarks.import_time [--top 15]
+
+PROJECT = os.path.join(os.path.dirname(__file__), "..")
+SNIPPET = """
+import time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+main.create_app()
+print(f"{(imported - started) * 1e6:.0f} {(time.perf_counter() - imported) * 1e6:.0f}")
+"""
+
+
+def measure(env: dict):
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SNIPPET], cwd=PROJECT, env=env, capture_output=True, text=True
+    )
+    if process.returncode != 0:
+        sys.exit(process.stderr)
+    modules = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (int(own), int(cumulative), depth)
+    import_us, factory_us = map(int, process.stdout.split()[-2:])
+    return modules, import_us, factory_us
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    database = os.path.join(tempfile.mkdtemp(), "untouched.db")
+    env = {key: value for key, value in os.environ.items() if key != "ORIGINS"}
+    env.update(DATABASE_URL=f"sqlite:///{database}", PYTHONDONTWRITEBYTECODE="1")
+
+    runs = [measure(env) for _ in range(args.repeat)]
+    modules = {
+        name: (min(run[0][name][0] for run in runs if name in run[0]),
+               min(run[0][name][1] for run in runs if name in run[0]), own_depth)
+        for name, (_, _, own_depth) in runs[0][0].items()
+    }
+    import_ms = min(run[1] for run in runs) / 1000
+    factory_ms = min(run[2] for run in runs) / 1000
+
+    print(f"import main {import_ms:7.1f}ms  create_app() {factory_ms:6.1f}ms  ({len(modules)} modules)")
+    print("\nimported by main (cumulative):")
+    direct = sorted(((cumulative, name) for name, (_, cumulative, depth) in modules.items() if depth == 1), reverse=True)
+    for cumulative, name in direct[:args.top]:
+        print(f"  {cumulative / 1000:7.1f}ms  {name}")
+    print("\nslowest modules (own time):")
+    for own, name in sorted(((own, name) for name, (own, _, _) in modules.items()), reverse=True)[:args.top]:
+        print(f"  {own / 1000:7.1f}ms  {name}")
+    if os.path.exists(database):
+        sys.exit(f"\nimporting the app created {database}")
+    print("\nno database file was created")
+
+
+if __name__ == "__main__":
+    main()
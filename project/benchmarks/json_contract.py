@@ -0,0 +1,174 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Contract check for the list routes that encode repository dicts with orjson
+# (pagination.page_json): every page they return must be byte for byte the
+# body FastAPI produces by validating the same rows through the route's
+# response_model, i.e. the ORM objects the routes used to return. The data
+# is benchmarks.seed plus rows with NULLs, non-ASCII text, microseconds and a
+# dangling breed. The timings compare both paths on one large page.
+# tests/test_json_contract.py runs the same cases under pytest.
+#   python -m benchmarks.json_contract [--pets 20000] [--rows 50000]
+
+
+def add_edge_rows(db):
+    from src.models import Analysis, AnalysisType, Appointment, MedicineTake, Pet, Vaccination, Vaccine
+
+    pet = Pet(name='Барсик " \\ 🐕', age=0, breed_id=999999, owner_id=1, recommendations=None)
+    quoted = Pet(name="Tab\tand\nnewline", age=1, breed_id=1, owner_id=1, recommendations="Üben <b>&</b> 日本")
+    db.add_all([pet, quoted])
+    vaccine = Vaccine(name="Вакцина", type="", manufacturer="Ä", interval_days=None)
+    analysis_type = AnalysisType(name="Анализ", description="", instructions="\u0000\u001f")
+    db.add_all([vaccine, analysis_type])
+    db.flush()
+    appointment = Appointment(
+        pet_id=pet.id, clinic_id=None, scheduled_at=datetime(2024, 2, 29, 23, 59, 59, 999999), status="готово",
+        conclusion_status="done", conclusion=None,
+    )
+    db.add(appointment)
+    db.flush()
+    db.add_all([
+        Vaccination(appointment_id=appointment.id, vaccine_id=vaccine.id, pet_id=pet.id),
+        Vaccination(appointment_id=appointment.id, vaccine_id=999999, pet_id=pet.id),
+        Analysis(appointment_id=appointment.id, analysis_type_id=analysis_type.id),
+        Analysis(appointment_id=appointment.id, analysis_type_id=999999),
+        MedicineTake(pet_id=pet.id, medicine_id=1, datetime=datetime(2024, 1, 1, 0, 0, 0, 1)),
+    ])
+    db.commit()
+    return pet.id
+
+
+def cases(rng: random.Random):
+    from src.models import Analysis, MedicineTake, Pet, Vaccination
+    from src.repository import get_analyses, get_appointments, get_medicine_takes, get_pet_timeline, get_pets, get_vaccinations
+
+    # (route, model the route used to return or None for dict rows, load(db, page, edge_pet_id))
+    return [
+        ("/pets/", Pet, lambda db, page, edge: get_pets(db, page)),
+        ("/pets/", Pet, lambda db, page, edge: get_pets(db, page, owner_id=1)),
+        ("/vaccinations/", Vaccination, lambda db, page, edge: get_vaccinations(db, page)),
+        ("/vaccinations/", Vaccination, lambda db, page, edge: get_vaccinations(db, page, pet_id=edge)),
+        ("/medicine-takes/", MedicineTake, lambda db, page, edge: get_medicine_takes(db, page)),
+        ("/analyses/", Analysis, lambda db, page, edge: get_analyses(db, page)),
+        ("/appointments/", None, lambda db, page, edge: get_appointments(db, page)),
+        ("/pets/{item_id}/timeline", None, lambda db, page, edge: get_pet_timeline(db, edge, page)),
+        *(("/pets/{item_id}/timeline", None, lambda db, page, edge, r=rng.random(): get_pet_timeline(db, 1 + int(r * edge), page))
+          for _ in range(20)),
+    ]
+
+
+def list_routes(app):
+    from fastapi.routing import APIRoute
+
+    return {route.path: route for route in app.routes if isinstance(route, APIRoute) and "GET" in route.methods}
+
+
+async def validated_body(route, content):
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+
+    return JSONResponse(await serialize_response(field=route.response_field, response_content=content)).body
+
+
+# Walks every page of one case; returns the number of pages and, for the first
+# page that differs, a description of the difference (None when all match).
+async def compare(route, session, model, load, edge_pet_id: int, limit: int):
+    from src.pagination import PageParams, page_json
+
+    cursor = None
+    pages = 0
+    while True:
+        with session() as db:
+            page = load(db, PageParams(cursor, limit), edge_pet_id)
+        with session() as db:
+            content = [db.get(model, item["id"]) for item in page.items] if model is not None else page.items
+            expected = await validated_body(route, content)
+        actual = page_json(page).body
+        pages += 1
+        if actual != expected:
+            at = next((i for i, (a, b) in enumerate(zip(actual, expected)) if a != b), min(len(actual), len(expected)))
+            return pages, (f"cursor={cursor}: first difference at byte {at}\n"
+                           f"     fast      {actual[max(0, at - 80):at + 80]!r}\n"
+                           f"     validated {expected[max(0, at - 80):at + 80]!r}")
+        cursor = page.next_cursor
+        if cursor is None:
+            return pages, None
+
+
+async def check(routes, session, edge_pet_id: int, limit: int):
+    failures = pages = 0
+    for path, model, load in cases(random.Random(1)):
+        walked, difference = await compare(routes[path], session, model, load, edge_pet_id, limit)
+        pages += walked
+        if difference is not None:
+            failures += 1
+            print(f"FAIL {path} {difference}")
+    return pages, failures
+
+
+async def timings(routes, session, rows: int):
+    from src.models import MedicineTake, Pet
+    from src.pagination import PageParams, page_json
+    from src.repository import get_medicine_takes, get_pets
+
+    for path, model, load, order in (
+        ("/pets/", Pet, get_pets, (Pet.id,)),
+        ("/medicine-takes/", MedicineTake, get_medicine_takes, (MedicineTake.datetime, MedicineTake.id)),
+    ):
+        with session() as db:
+            started = time.perf_counter()
+            page = load(db, PageParams(None, rows))
+            queried = time.perf_counter()
+            body = page_json(page).body
+            fast = (queried - started, time.perf_counter() - queried)
+        with session() as db:
+            started = time.perf_counter()
+            objects = db.query(model).order_by(*order).limit(rows).all()
+            queried = time.perf_counter()
+            expected = await validated_body(routes[path], objects)
+            validated = (queried - started, time.perf_counter() - queried)
+        print(
+            f"{path:<18} {len(page.items)} rows  dicts: query {fast[0] * 1000:7.1f}ms encode {fast[1] * 1000:7.1f}ms  "
+            f"orm: query {validated[0] * 1000:7.1f}ms validate+encode {validated[1] * 1000:7.1f}ms  "
+            f"same bytes: {body == expected}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pets", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=500, help="page size of the contract walk")
+    parser.add_argument("--rows", type=int, default=50000, help="page size of the timing comparison")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "contract.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["CATALOG_VERSION_DIR"] = tempfile.mkdtemp()
+    os.environ["METRICS_DIR"] = tempfile.mkdtemp()
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+    import main as app_module
+    from src.database import Base, get_engine, session
+    from benchmarks.seed import seed
+
+    Base.metadata.create_all(bind=get_engine())
+    with session() as db:
+        seed(db, args.pets, rng=random.Random(42))
+        edge_pet_id = add_edge_rows(db)
+    routes = list_routes(app_module.app)
+
+    pages, failures = asyncio.run(check(routes, session, edge_pet_id, args.limit))
+    print(f"{pages} pages compared, {failures} differ")
+    asyncio.run(timings(routes, session, args.rows))
+    os.remove(path)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import argparse
+import asyncio
+import time
+from fastapi import HTTPException
+from src import hashing
+
+# Password verification throughput through the login hashing pool.
+#   BCRYPT_ROUNDS=12 PASSWORD_HASH_WORKERS=4 python -m benchmarks.login --logins 200 --concurrency 64
+
+
+async def attempt(password_hash: str, latencies: list, rejected: list):
+    started = time.perf_counter()
+    try:
+        valid, _ = await hashing.verify_password_async("secret", password_hash)
+        assert valid
+    except HTTPException:
+        rejected.append(1)
+        return
+    latencies.append(time.perf_counter() - started)
+
+
+async def run(logins: int, concurrency: int):
+    password_hash = hashing.hash_password("secret")
+    await asyncio.gather(*[
+        hashing.verify_password_async("secret", password_hash) for _ in range(hashing.PASSWORD_HASH_WORKERS)
+    ])
+
+    latencies, rejected = [], []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited():
+        async with semaphore:
+            await attempt(password_hash, latencies, rejected)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[limited() for _ in range(logins)])
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0
+    print(f"rounds={hashing.BCRYPT_ROUNDS} workers={hashing.PASSWORD_HASH_WORKERS} queue={hashing.PASSWORD_HASH_QUEUE} concurrency={concurrency}")
+    print(f"ok={len(latencies)} rejected(503)={len(rejected)} elapsed={elapsed:.2f}s throughput={len(latencies) / elapsed:.1f} logins/s")
+    print(f"p50={p(0.5):.1f}ms p95={p(0.95):.1f}ms p99={p(0.99):.1f}ms")
+    hashing.shutdown_executor()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+    asyncio.run(run(args.logins, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+# Per-request cost of the metrics middleware and per-statement cost of the
+# SQL listeners, measured against a bare ASGI app and an in-memory engine.
+# Runs alternate and the best of --repeat is kept, to take out machine noise.
+#   python -m benchmarks.metrics_overhead --requests 50000
+
+
+async def drive(app, requests: int):
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": []}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def statements(engine, count: int):
+    with engine.connect() as connection:
+        started = time.perf_counter()
+        for _ in range(count):
+            connection.exec_driver_sql("SELECT 1").scalar()
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50000)
+    parser.add_argument("--statements", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    os.environ.setdefault("METRICS_DIR", tempfile.mkdtemp())
+
+    from sqlalchemy import create_engine
+    from src.metrics import MetricsMiddleware, _request_sql, instrument_engine
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    timings = [
+        (asyncio.run(drive(app, args.requests)), asyncio.run(drive(MetricsMiddleware(app), args.requests)))
+        for _ in range(args.repeat)
+    ]
+    bare, measured = (min(column) for column in zip(*timings))
+    print(f"request    bare {bare:6.2f}us  with metrics {measured:6.2f}us  overhead {measured - bare:5.2f}us")
+
+    engine, instrumented_engine = create_engine("sqlite://"), create_engine("sqlite://")
+    instrument_engine(instrumented_engine)
+    token = _request_sql.set([0, 0.0])
+    timings = [
+        (statements(engine, args.statements), statements(instrumented_engine, args.statements))
+        for _ in range(args.repeat)
+    ]
+    _request_sql.reset(token)
+    plain, instrumented = (min(column) for column in zip(*timings))
+    print(f"statement  bare {plain:6.2f}us  with metrics {instrumented:6.2f}us  overhead {instrumented - plain:5.2f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+# Drives the endpoints of main.py in-process against a small seeded database
+# and checks the exact number of SQL statements each one issues, so an N+1
+# (a lazy load per row of a list) or an extra round trip fails loudly. Lists
+# are seeded with several rows each so a per-row query changes the count.
+# tests/test_query_counts.py runs the same cases under pytest.
+#   python -m benchmarks.query_counts [--sync] [--verbose]
+
+NOW = datetime.utcnow().replace(microsecond=0)
+ROWS = 5
+
+# (method, path, options, expected statements). The pet writes start the
+# recommendation fill outside the request, so it is not counted; the second
+# /pets/ is served by the principal cache.
+CASES = [
+    ("POST", "/users/register", {"json": {"user_name": "second", "email": "second@example.com", "password": "secret", "role": "user"}}, 3),
+    ("POST", "/users/login", {"data": {"username": "owner", "password": "secret"}}, 1),
+    ("GET", "/breeds/", {}, 1),
+    ("GET", "/clinics/", {}, 1),
+    ("GET", "/vaccines/", {}, 1),
+    ("GET", "/medicines/", {}, 1),
+    ("GET", "/analysis-types/", {}, 1),
+    ("GET", "/pets/", {"auth": True}, 2),
+    ("GET", "/pets/", {"auth": True, "params": {"all": "true"}}, 1),
+    ("GET", "/pets/1/timeline", {}, 1),
+    ("GET", "/vaccinations/", {"params": {"pet_id": 1}}, 1),
+    ("GET", "/medicine-takes/", {"params": {"pet_id": 1}}, 1),
+    ("GET", "/analyses/", {"params": {"appointment_id": 1}}, 1),
+    ("GET", "/appointments/", {"params": {"pet_id": 1}}, 1),
+    ("GET", "/appointments/1", {}, 1),
+    ("GET", "/appointments/export", {}, 1),
+    ("GET", "/vaccinations/export", {}, 1),
+    ("GET", "/medicine-takes/export", {}, 1),
+    ("GET", "/vaccinations/report", {}, 2),
+    # the first dosing query loads the schedule; later ones only catch up
+    ("GET", "/medicine-takes/due", {"params": {"before": (NOW + timedelta(days=1)).isoformat()}}, 3),
+    ("GET", "/medicine-takes/overdue", {}, 1),
+    ("GET", "/clinics/1/availability", {"params": {"from": NOW.isoformat(), "to": (NOW + timedelta(days=7)).isoformat()}}, 2),
+    ("POST", "/pets/", {"auth": True, "json": {"name": "new", "age": 2, "breed_id": 1}}, 2),
+    ("PUT", "/pets/2", {"json": {"name": "renamed", "age": 4, "breed_id": 1}}, 2),
+    ("POST", "/appointments/", {"json": {
+        "pet_id": 1, "clinic_id": 1, "scheduled_at": (NOW + timedelta(days=30)).isoformat(),
+        "status": "new", "conclusion_status": "pending",
+    }}, 4),
+    ("PATCH", "/appointments/1", {"json": {"status": "done"}}, 2),
+    # a move locks the clinic and looks for clashes before the update
+    ("PUT", "/appointments/2", {"json": {
+        "pet_id": 3, "clinic_id": 1, "scheduled_at": (NOW + timedelta(days=60)).isoformat(),
+        "status": "new", "conclusion_status": "pending",
+    }}, 4),
+    ("POST", "/vaccinations/", {"json": {"appointment_id": 1, "vaccine_id": 1, "pet_id": 1}}, 2),
+    ("POST", "/analyses/", {"json": {"appointment_id": 1, "analysis_type_id": 1}}, 2),
+    ("POST", "/medicine-takes/", {"json": {"pet_id": 1, "medicine_id": 1, "datetime": NOW.isoformat()}}, 2),
+    ("DELETE", "/analyses/1", {}, 1),
+    ("DELETE", "/pets/3", {}, 5),
+    # one existence check per referenced table and one INSERT for the batch;
+    # appointments add one clinic lock and one bookings read per clinic
+    ("POST", "/appointments/bulk", {"json": [{
+        "pet_id": 1, "clinic_id": 1, "scheduled_at": (NOW + timedelta(days=90, hours=i)).isoformat(),
+        "status": "new", "conclusion_status": "pending",
+    } for i in range(ROWS)]}, 5),
+    ("POST", "/vaccinations/bulk", {"json": [{"appointment_id": 1, "vaccine_id": i, "pet_id": 1} for i in range(1, ROWS + 1)]}, 4),
+    ("POST", "/analyses/bulk", {"json": [{"appointment_id": 1, "analysis_type_id": i} for i in range(1, ROWS + 1)]}, 3),
+    ("POST", "/medicine-takes/bulk", {"json": [
+        {"pet_id": 1, "medicine_id": 1, "datetime": (NOW - timedelta(minutes=i)).isoformat()} for i in range(ROWS)
+    ]}, 3),
+    # answered from the seeded breed_recommendations, the repeat from memory
+    ("POST", "/recommendations/", {"json": {"breed_id": 1, "age": 6}}, 2),
+    ("POST", "/recommendations/", {"json": {"breed_id": 1, "age": 6}}, 0),
+    ("POST", "/recommendations/stream", {"json": {"breed_id": 1, "age": 7}}, 2),
+    # the job itself runs in the background, outside the request's count
+    ("POST", "/jobs/recommendations/", {}, 3),
+    ("GET", "/jobs/recommendations/1", {}, 1),
+    ("POST", "/jobs/recommendations/1/resume", {}, 1),
+    ("PUT", "/breeds/2", {"json": {"name": "renamed"}}, 2),
+    ("PUT", "/clinics/1", {"json": {"name": "renamed", "address": "", "phone": "", "slot_minutes": 20}}, 1),
+    ("PUT", "/vaccines/1", {"json": {"name": "renamed", "type": "", "manufacturer": "", "interval_days": 180}}, 1),
+    ("PUT", "/medicines/1", {"json": {"name": "renamed", "period_hours": 8}}, 1),
+    ("PUT", "/analysis-types/1", {"json": {"name": "renamed", "description": "", "instructions": ""}}, 1),
+    # a delete is one statement per table it cascades to or detaches from
+    ("DELETE", "/vaccines/5", {}, 2),
+    ("DELETE", "/analysis-types/5", {}, 2),
+    ("DELETE", "/medicines/2", {}, 2),
+    ("DELETE", "/clinics/2", {}, 2),
+    ("DELETE", "/breeds/2", {}, 8),
+]
+
+
+def seed(db):
+    from src.models import (
+        Analysis, AnalysisType, Appointment, Breed, BreedRecommendation, Medicine, MedicineTake, Pet, User, Vaccination,
+        Vaccine, VeterinaryClinic,
+    )
+    from src.config import RECOMMENDATIONS_PROMPT_VERSION
+
+    db.add_all([
+        Breed(id=1, name="breed"),
+        VeterinaryClinic(id=1, name="clinic", address="", phone=""),
+        *(Vaccine(id=i, name=f"vaccine {i}", manufacturer="", type="", interval_days=365) for i in range(1, ROWS + 1)),
+        Medicine(id=1, name="medicine", period_hours=12),
+        # spare catalog entries for the delete cases
+        Breed(id=2, name="spare"), VeterinaryClinic(id=2, name="spare", address="", phone=""),
+        Medicine(id=2, name="spare", period_hours=0),
+        *(AnalysisType(id=i, name=f"analysis {i}", description="", instructions="") for i in range(1, ROWS + 1)),
+    ])
+    # cached recommendations keep the pet write paths away from the LLM
+    db.add_all([
+        BreedRecommendation(breed_id=1, age=age, prompt_version=RECOMMENDATIONS_PROMPT_VERSION, text="", created_at=NOW)
+        for age in range(10)
+    ])
+    db.flush()
+    owner = db.query(User).filter(User.email == "owner@example.com").one()
+    for pet_id in range(1, ROWS + 1):
+        db.add(Pet(id=pet_id, name=f"pet {pet_id}", age=3, breed_id=1, owner_id=owner.id))
+    db.flush()
+    for appointment_id in range(1, ROWS + 1):
+        db.add(Appointment(
+            id=appointment_id, pet_id=1 + appointment_id % 3, clinic_id=1, status="done", conclusion_status="done",
+            scheduled_at=NOW - timedelta(days=appointment_id * 30),
+        ))
+    # every row of a list refers to a different catalog entry, so a lazy load
+    # per row cannot be answered from the identity map
+    for appointment_id in range(1, ROWS + 1):
+        for catalog_id in range(1, ROWS + 1):
+            db.add(Vaccination(appointment_id=appointment_id, vaccine_id=catalog_id, pet_id=1 + appointment_id % 3))
+            db.add(Analysis(appointment_id=appointment_id, analysis_type_id=catalog_id))
+        db.add(MedicineTake(pet_id=1 + appointment_id % 3, medicine_id=1, datetime=NOW - timedelta(hours=appointment_id)))
+    db.commit()
+
+
+async def measure(verbose: bool):
+    import httpx
+    import main
+    from src.database import Base, get_engine, session
+    from src.query_budget import count_queries
+
+    Base.metadata.create_all(bind=get_engine())
+
+    transport = httpx.ASGITransport(app=main.app)
+    failures = 0
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await main.app.router.startup()
+        await client.post("/users/register", json={"user_name": "owner", "email": "owner@example.com", "password": "secret", "role": "user"})
+        with session() as db:
+            seed(db)
+        token = (await client.post("/users/login", data={"username": "owner", "password": "secret"})).json()
+        headers = {"Authorization": f"Bearer {token['access_token']}"}
+        for method, path, options, expected in CASES:
+            options = dict(options)
+            if options.pop("auth", False):
+                options["headers"] = headers
+            with count_queries() as log:
+                try:
+                    status = (await client.request(method, path, **options)).status_code
+                except Exception as error:
+                    # in async mode a lazy load raises MissingGreenlet while the response is validated
+                    status = type(error).__name__
+            ok = status == 200 and log.count == expected
+            failures += not ok
+            if not ok or verbose:
+                print(f"{'ok  ' if ok else 'FAIL'} {method:<6} {path:<28} {status}  {log.count} queries (expected {expected})")
+                for shape, count in log.shapes.most_common():
+                    print(f"       {count}x {shape[:160]}")
+        await main.app.router.shutdown()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sync", action="store_true", help="use the synchronous session (lazy loads issue queries instead of failing)")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "counts.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["DB_ASYNC"] = "false" if args.sync else "true"
+    os.environ["QUERY_BUDGET_MODE"] = "log"
+    os.environ["CATALOG_VERSION_DIR"] = tempfile.mkdtemp()
+    os.environ["METRICS_DIR"] = tempfile.mkdtemp()
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    os.environ.setdefault("SECRET_KEY", "query-counts")
+    os.environ.setdefault("ORIGINS", "*")
+
+    failures = asyncio.run(measure(args.verbose))
+    os.remove(path)
+    print(f"{len(CASES)} endpoints, {failures} with an unexpected query count or status")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import Session
+from src.models import User, Breed, Pet, Appointment, Vaccination, Analysis, MedicineTake
+from src.pagination import PageParams
+from src.repository import (
+    get_user_by_email, get_user_snapshot_row, get_pets, get_pets_chunk, get_pets_by_ids, get_recommendation_context,
+    get_vaccinations, get_medicine_takes, get_analyses, get_appointments, get_appointment,
+    appointments_export, vaccinations_export, medicine_takes_export, get_pet_timeline,
+    get_medicine_takes_after, get_last_medicine_takes, get_clinic_bookings, get_vaccination_report
+)
+
+# Runs EXPLAIN QUERY PLAN for every statement the hot repository queries
+# issue, on a SQLite database built by the Alembic migrations, and exits
+# non-zero if any of them falls back to a full table scan or a temp b-tree sort.
+# It also fails if the models have drifted from the migrations.
+# tests/test_query_plans.py runs the same cases under pytest.
+#   python -m benchmarks.query_plans [--verbose]
+
+ALEMBIC_INI = os.path.join(os.path.dirname(__file__), "..", "..", "alembic.ini")
+SINCE, UNTIL = datetime(2024, 1, 1), datetime(2024, 2, 1)
+ID_PAGE = PageParams("1", 100)
+TIME_PAGE = PageParams("2024-01-01T00:00:00_1", 100)
+
+CASES = [
+    ("user by email", lambda db: get_user_by_email(db, "owner@example.com")),
+    ("principal snapshot", lambda db: get_user_snapshot_row(db, "owner@example.com")),
+    ("pets by owner", lambda db: get_pets(db, ID_PAGE, owner_id=1)),
+    ("pets by breed", lambda db: get_pets(db, ID_PAGE, breed_id=1)),
+    ("pets chunk", lambda db: get_pets_chunk(db, 1, 100)),
+    ("pets by ids", lambda db: get_pets_by_ids(db, [1, 2, 3])),
+    ("recommendation context", lambda db: get_recommendation_context(db, 1, 3, 1, 3600)),
+    ("vaccinations by pet", lambda db: get_vaccinations(db, ID_PAGE, pet_id=1)),
+    ("vaccinations by appointment", lambda db: get_vaccinations(db, ID_PAGE, appointment_id=1)),
+    ("vaccinations by vaccine", lambda db: get_vaccinations(db, ID_PAGE, vaccine_id=1)),
+    ("medicine takes by pet", lambda db: get_medicine_takes(db, TIME_PAGE, pet_id=1)),
+    ("medicine takes by medicine", lambda db: get_medicine_takes(db, TIME_PAGE, medicine_id=1)),
+    ("medicine takes by time", lambda db: get_medicine_takes(db, TIME_PAGE, since=SINCE, until=UNTIL)),
+    ("medicine takes after id", lambda db: get_medicine_takes_after(db, 1)),
+    ("last medicine takes", lambda db: get_last_medicine_takes(db, SINCE)),
+    ("analyses by appointment", lambda db: get_analyses(db, ID_PAGE, appointment_id=1)),
+    ("analyses by type", lambda db: get_analyses(db, ID_PAGE, analysis_type_id=1)),
+    ("appointments by pet", lambda db: get_appointments(db, TIME_PAGE, pet_id=1)),
+    ("appointments by clinic", lambda db: get_appointments(db, TIME_PAGE, clinic_id=1)),
+    ("appointments by time", lambda db: get_appointments(db, TIME_PAGE, since=SINCE, until=UNTIL)),
+    ("appointment by id", lambda db: get_appointment(db, 1)),
+    ("clinic bookings", lambda db: get_clinic_bookings(db, 1, SINCE, UNTIL)),
+    ("pet timeline", lambda db: get_pet_timeline(db, 1, PageParams(None, 100))),
+    ("vaccination report", lambda db: get_vaccination_report(db, UNTIL, 30, 100)),
+    ("vaccination report by breed and clinic", lambda db: get_vaccination_report(db, UNTIL, 30, 100, clinic_id=1, breed_id=1)),
+    ("pet timeline after cursor", lambda db: get_pet_timeline(db, 1, PageParams("2024-01-01T00:00:00_1_1_1", 100))),
+    ("appointments export", lambda db: db.execute(appointments_export(SINCE, UNTIL)).all()),
+    ("vaccinations export", lambda db: db.execute(vaccinations_export()).all()),
+    ("medicine takes export", lambda db: db.execute(medicine_takes_export(SINCE, UNTIL)).all()),
+    ("User.pets", lambda db: db.get(User, 1).pets),
+    ("Breed.animals", lambda db: db.get(Breed, 1).animals),
+    ("Pet.appointments", lambda db: db.get(Pet, 1).appointments),
+    ("Pet.medicine_takes", lambda db: db.get(Pet, 1).medicine_takes),
+    ("Appointment.vaccinations", lambda db: db.get(Appointment, 1).vaccinations),
+    ("Appointment.analyses", lambda db: db.get(Appointment, 1).analyses),
+    ("vaccinations of a pet", lambda db: db.scalars(select(Vaccination).where(Vaccination.pet_id == 1)).all()),
+    ("takes of a pet and medicine", lambda db: db.scalars(select(MedicineTake).where(
+        MedicineTake.pet_id == 1, MedicineTake.medicine_id == 1).order_by(MedicineTake.datetime.desc()).limit(1)).all()),
+    ("analyses of a type", lambda db: db.scalars(select(Analysis).where(Analysis.analysis_type_id == 1)).all()),
+]
+
+# The timeline merges its branches, each already limited to one page, with a
+# final sort; that sort is over at most 4 * (limit + 1) rows.
+BOUNDED_SORTS = {"pet timeline", "pet timeline after cursor"}
+# The vaccination report reads the (small) vaccines catalog, and its lists
+# walk pets in rowid order, stopping after one page.
+BOUNDED_SCANS = {
+    "vaccination report": {"SCAN vaccines", "SCAN pets"},
+    "vaccination report by breed and clinic": {"SCAN vaccines", "SCAN pets"},
+}
+
+
+def build_database(url: str):
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("sqlalchemy.url", url)
+    command.upgrade(config, "head")
+    command.check(config)
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("INSERT INTO users (id, user_name, email, role) VALUES (1, 'owner', 'owner@example.com', 'user')")
+        connection.exec_driver_sql("INSERT INTO breeds (id, name) VALUES (1, 'breed')")
+        connection.exec_driver_sql("INSERT INTO pets (id, name, age, breed_id, owner_id) VALUES (1, 'pet', 3, 1, 1)")
+        connection.exec_driver_sql("INSERT INTO appointments (id, pet_id, scheduled_at, status) VALUES (1, 1, '2024-01-10 10:00:00', 'done')")
+        connection.exec_driver_sql("INSERT INTO vaccines (id, name, interval_days) VALUES (1, 'vaccine', 365)")
+    return engine
+
+
+def capture(engine, fn):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        with Session(engine) as db:
+            fn(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return statements
+
+
+def problems(plan, bounded_sort=False, bounded_scans=()):
+    if bounded_sort and plan and plan[-1] == "USE TEMP B-TREE FOR ORDER BY":
+        plan = plan[:-1]
+    for detail in plan:
+        if detail in bounded_scans:
+            continue
+        # SCAN anon_N reads a subquery's own (already limited) output, not a table
+        if detail.startswith("SCAN ") and " USING " not in detail and not detail.startswith("SCAN anon_"):
+            yield detail
+        elif detail.startswith("USE TEMP B-TREE"):
+            yield detail
+
+
+# (statement, plan, problems) for every SELECT the case issues
+def explain(engine, name, fn):
+    for statement, parameters in capture(engine, fn):
+        with engine.connect() as connection:
+            plan = [row[3] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+        yield statement, plan, list(problems(plan, name in BOUNDED_SORTS, BOUNDED_SCANS.get(name, ())))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "plans.db")
+    engine = build_database(f"sqlite:///{path}")
+    failures = 0
+    for name, fn in CASES:
+        for statement, plan, bad in explain(engine, name, fn):
+            failures += bool(bad)
+            if bad or args.verbose:
+                print(f"{'FAIL' if bad else 'ok  '} {name}")
+                print("     " + " ".join(statement.split()))
+                for detail in plan:
+                    print(f"       {detail}")
+    engine.dispose()
+    os.remove(path)
+    print(f"{len(CASES)} cases, {failures} statements with a table scan or temp sort")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
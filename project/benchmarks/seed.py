@@ -0,0 +1,167 @@
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import Session
+from src.catalog import bump_catalog
+from src.hashing import hash_password
+from src.models import (
+    User, Breed, Pet, VeterinaryClinic, Appointment, Vaccine, Vaccination, AnalysisType, Analysis, Medicine, MedicineTake
+)
+
+# Bulk-generates a realistic data set through the models, sized from --pets:
+# owners with two pets each on average, catalogs, three appointments per pet
+# on non-overlapping clinic slots (most in the past, some booked ahead) with
+# their vaccinations and analyses, and a few medicine takes per pet. Every
+# user's password is PASSWORD. The schema comes from the Alembic migrations,
+# and running it again appends another data set.
+#   python -m benchmarks.seed --url sqlite:////tmp/bench.db --pets 1000000
+
+ALEMBIC_INI = os.path.join(os.path.dirname(__file__), "..", "..", "alembic.ini")
+PASSWORD = "password"
+SLOTS_PER_DAY = 16
+DAYS_AHEAD = 30
+
+BREEDS = [
+    "Labrador Retriever", "German Shepherd", "Golden Retriever", "French Bulldog", "Bulldog", "Poodle", "Beagle",
+    "Rottweiler", "Dachshund", "Yorkshire Terrier", "Boxer", "Siberian Husky", "Shih Tzu", "Dobermann",
+    "Border Collie", "Chihuahua", "Pug", "Corgi", "Great Dane", "Maltese",
+]
+PET_NAMES = ["Rex", "Bella", "Max", "Luna", "Charlie", "Daisy", "Rocky", "Molly", "Buddy", "Lucy", "Jack", "Sadie", "Toby", "Bailey"]
+VACCINES = [("Rabies", 365), ("DHPP", 365 * 3), ("Leptospirosis", 365), ("Bordetella", 180), ("Lyme", 365), ("Influenza", 365)]
+MEDICINES = [("Antibiotic", 12), ("Anti-inflammatory", 24), ("Dewormer", 24 * 90), ("Flea treatment", 24 * 30), ("Heartworm", 24 * 30)]
+ANALYSES = ["Blood count", "Biochemistry", "Urinalysis", "Fecal test", "X-ray", "Ultrasound"]
+
+
+def batches(total: int, size: int):
+    for offset in range(0, total, size):
+        yield offset, min(size, total - offset)
+
+
+def next_id(db: Session, model):
+    return (db.scalar(select(func.max(model.id))) or 0) + 1
+
+
+def insert_catalog(db: Session, model, rows):
+    first = next_id(db, model)
+    db.execute(insert(model), rows)
+    return list(range(first, first + len(rows)))
+
+
+def seed(db: Session, pets: int, batch: int = 50000, rng: random.Random = None):
+    rng = rng or random.Random(42)
+    users = max(1, pets // 2)
+    clinics = max(1, pets // 2000)
+    appointments = pets * 3
+    counts = dict.fromkeys(("users", "pets", "appointments", "vaccinations", "analyses", "medicine_takes"), 0)
+
+    breed_ids = insert_catalog(db, Breed, [{"name": name} for name in BREEDS])
+    clinic_ids = insert_catalog(db, VeterinaryClinic, [
+        {"name": f"Clinic {i}", "address": f"{i} Main Street", "phone": f"+7 900 {i:07d}", "slot_minutes": 30}
+        for i in range(clinics)
+    ])
+    vaccine_ids = insert_catalog(db, Vaccine, [
+        {"name": name, "manufacturer": "VetPharm", "type": "core", "interval_days": days} for name, days in VACCINES
+    ])
+    medicine_ids = insert_catalog(db, Medicine, [{"name": name, "period_hours": hours} for name, hours in MEDICINES])
+    analysis_type_ids = insert_catalog(db, AnalysisType, [
+        {"name": name, "description": f"{name} panel", "instructions": "No food for 8 hours"} for name in ANALYSES
+    ])
+    db.commit()
+
+    password_hash = hash_password(PASSWORD)
+    first_user = next_id(db, User)
+    for offset, count in batches(users, batch):
+        db.execute(insert(User), [
+            {"user_name": f"user{first_user + offset + i}", "email": f"user{first_user + offset + i}@example.com",
+             "password": password_hash, "role": "user"}
+            for i in range(count)
+        ])
+        counts["users"] += count
+    db.commit()
+
+    first_pet = next_id(db, Pet)
+    for offset, count in batches(pets, batch):
+        db.execute(insert(Pet), [{
+            "name": rng.choice(PET_NAMES), "age": rng.randint(0, 15), "breed_id": rng.choice(breed_ids),
+            "owner_id": first_user + rng.randrange(users),
+        } for _ in range(count)])
+        counts["pets"] += count
+        db.commit()
+
+    # appointment i takes slot i // clinics of clinic i % clinics, so no two
+    # overlap; the slots run up to DAYS_AHEAD days from today
+    days = appointments // clinics // SLOTS_PER_DAY + 1
+    today = datetime.utcnow().replace(hour=9, minute=0, second=0, microsecond=0)
+    start = today - timedelta(days=days - DAYS_AHEAD)
+    now = datetime.utcnow()
+    appointment_id = next_id(db, Appointment)
+    for offset, count in batches(appointments, batch):
+        rows, vaccinations, analyses = [], [], []
+        for i in range(offset, offset + count):
+            slot = i // clinics
+            scheduled_at = start + timedelta(days=slot // SLOTS_PER_DAY, minutes=30 * (slot % SLOTS_PER_DAY))
+            pet_id = first_pet + rng.randrange(pets)
+            done = scheduled_at < now
+            rows.append({
+                "pet_id": pet_id, "clinic_id": clinic_ids[i % clinics], "scheduled_at": scheduled_at,
+                "status": "done" if done else "scheduled", "conclusion_status": "done" if done else "pending",
+                "conclusion": "Healthy" if done else None,
+            })
+            if done:
+                for vaccine_id in rng.sample(vaccine_ids, rng.choice((0, 1, 1, 2))):
+                    vaccinations.append({"appointment_id": appointment_id, "vaccine_id": vaccine_id, "pet_id": pet_id})
+                for analysis_type_id in rng.sample(analysis_type_ids, rng.choice((0, 0, 1, 2))):
+                    analyses.append({"appointment_id": appointment_id, "analysis_type_id": analysis_type_id})
+            appointment_id += 1
+        db.execute(insert(Appointment), rows)
+        if vaccinations:
+            db.execute(insert(Vaccination), vaccinations)
+        if analyses:
+            db.execute(insert(Analysis), analyses)
+        counts["appointments"] += count
+        counts["vaccinations"] += len(vaccinations)
+        counts["analyses"] += len(analyses)
+        db.commit()
+
+    for offset, count in batches(pets * 4, batch):
+        db.execute(insert(MedicineTake), [{
+            "pet_id": first_pet + rng.randrange(pets), "medicine_id": rng.choice(medicine_ids),
+            "datetime": now - timedelta(minutes=rng.randrange(90 * 24 * 60)),
+        } for _ in range(count)])
+        counts["medicine_takes"] += count
+        db.commit()
+
+    for table in ("breeds", "veterinary_clinics", "vaccines", "medicines", "analysis_types", "medicine_takes"):
+        bump_catalog(table)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=os.environ.get("DATABASE_URL", "sqlite:///./pets.db"))
+    parser.add_argument("--pets", type=int, default=100000)
+    parser.add_argument("--batch", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("sqlalchemy.url", args.url)
+    command.upgrade(config, "head")
+
+    engine = create_engine(args.url)
+    started = time.perf_counter()
+    with Session(engine) as db:
+        counts = seed(db, args.pets, args.batch, random.Random(args.seed))
+    elapsed = time.perf_counter() - started
+    print(", ".join(f"{count} {table}" for table, count in counts.items()) + f" in {elapsed:.1f}s")
+    print(f"log in as user<id> / {PASSWORD}")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
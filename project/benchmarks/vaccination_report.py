@@ -0,0 +1,90 @@
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+
+# The set-based vaccination due report on a seeded database, with and without
+# the clinic and breed filters.
+#   python -m benchmarks.vaccination_report --pets 500000
+
+
+def seed(db, pets: int, vaccines: int, clinics: int, batch: int = 50000):
+    from src.models import Appointment, Breed, Pet, Vaccination, Vaccine, VeterinaryClinic
+
+    random.seed(42)
+    db.execute(insert(Breed), [{"name": f"breed {i}"} for i in range(50)])
+    db.execute(insert(VeterinaryClinic), [{"name": f"clinic {i}", "address": "", "phone": ""} for i in range(clinics)])
+    db.execute(insert(Vaccine), [
+        {"name": f"vaccine {i}", "manufacturer": "", "type": "", "interval_days": 365 * (1 + i % 3)} for i in range(vaccines)
+    ])
+    now = datetime.utcnow()
+    appointment_id = 0
+    for offset in range(0, pets, batch):
+        count = min(batch, pets - offset)
+        db.execute(insert(Pet), [{"name": f"pet {offset + i}", "age": i % 15, "breed_id": i % 50 + 1} for i in range(count)])
+        appointments, vaccinations = [], []
+        for pet_id in range(offset + 1, offset + count + 1):
+            # most pets have a couple of visits, each giving one or two vaccines
+            for _ in range(random.choice((0, 1, 2, 2, 3))):
+                appointment_id += 1
+                appointments.append({
+                    "pet_id": pet_id, "clinic_id": random.randint(1, clinics), "status": "done",
+                    "conclusion_status": "done", "scheduled_at": now - timedelta(days=random.randint(0, 4 * 365)),
+                })
+                for vaccine_id in random.sample(range(1, vaccines + 1), random.choice((1, 2))):
+                    vaccinations.append({"appointment_id": appointment_id, "vaccine_id": vaccine_id, "pet_id": pet_id})
+        db.execute(insert(Appointment), appointments)
+        db.execute(insert(Vaccination), vaccinations)
+    db.commit()
+    return appointment_id
+
+
+def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(samples), max(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pets", type=int, default=500000)
+    parser.add_argument("--vaccines", type=int, default=6)
+    parser.add_argument("--clinics", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+    from src.database import Base, get_engine, session
+    from src.repository import get_vaccination_report
+
+    Base.metadata.create_all(bind=get_engine())
+    with session() as db:
+        started = time.perf_counter()
+        appointments = seed(db, args.pets, args.vaccines, args.clinics)
+        print(f"seeded {args.pets} pets, {appointments} appointments in {time.perf_counter() - started:.1f}s")
+
+        now = datetime.utcnow()
+        cases = [
+            ("all pets", {}),
+            ("one vaccine", {"vaccine_id": 1}),
+            ("one breed", {"breed_id": 1}),
+            ("one clinic", {"clinic_id": 1}),
+        ]
+        for name, filters in cases:
+            report, p50, worst = timed(lambda: get_vaccination_report(db, now, 30, 100, **filters), args.repeat)
+            totals = ", ".join(f"{status} {report[status + '_total']}" for status in ("overdue", "due", "never_vaccinated"))
+            print(f"{name:<12} p50 {p50:8.0f}ms  max {worst:8.0f}ms  ({totals})")
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,100 @@
-from fastapi import FastAPI, Depends, HTTPException, Security, Body
+from fastapi import APIRouter, FastAPI, Depends, HTTPException, Security, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-import os
-from dotenv import load_dotenv
-from openai import OpenAI
+import logging
 from datetime import datetime
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi.responses import JSONResponse
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy.orm import joinedload
-from src.models import Base, User, Pet, Breed, VeterinaryClinic, Appointment, Vaccine, AnalysisType
-from src.repository import (create_user, get_user_by_email, authenticate, create_breed, get_breeds, get_breed, create_pet, get_pet, create_analysis_type, get_analysis_types, create_analysis, get_analyses, upptade_pet_recomendations)
-from src.database import engine, get_db
-from typing import List
-from src.auth import create_access_token, get_current_user
+from src.models import Pet, Breed, VeterinaryClinic, Appointment, Vaccine, AnalysisType, Medicine, Vaccination, MedicineTake, Analysis
+from src.repository import (create_user, get_user_by_email, create_breed, get_breeds, create_pet, get_pets, create_analysis_type, get_analysis_types, create_analysis, get_analyses)
+from src.database import get_db, run, dispose_engines, log_database_report
+from typing import List, Literal, Optional
+from src.auth import create_access_token, get_current_principal, authenticate_user, UserSnapshot
+from src.hashing import hash_password_async, shutdown_executor
+from src.pagination import PageParams, page_params, page_json, limit_param
+from src.recommendations import recommend, stream_recommendation, invalidate_breed
+from src.export import export_response
+from src.catalog import catalog_response, bump_catalog
+from src.bulk import read_bulk_items, bulk_create, bulk_body_schema
+from src.crud import crud_router
+from src.dosing import due_doses, overdue_doses
+from src.slots import get_clinic_availability
+from src.metrics import MetricsMiddleware, flush_metrics, render_metrics
+from src.query_budget import QueryBudgetMiddleware
+from src.compression import CompressionMiddleware
+from src.config import METRICS_ENABLED, QUERY_BUDGET_MODE, ORIGINS, COMPRESSION_ENABLED
+from src.jobs import start_pet_recommendations, start_recommendation_job, resume_recommendation_jobs, is_job_active
 
 from src.schemas import (RecommendationRequest, RecommendationResponse,
     UserGet, UserCreate, Token, BreedCreate, BreedGet, PetCreate, PetGet,
     AppointmentCreate, AppointmentGet, AnalysisTypeCreate, AnalysisTypeGet,
     AnalysisCreate, AnalysisGet,AppointmentPatch,
     ClinicCreate, ClinicGet,
-    VaccineCreate, VaccineGet, MedicineCreate, MedicineGet, VaccinationCreate, VaccinationGet, MedicineTakeGet,MedicineTakeCreate
+    VaccineCreate, VaccineGet, MedicineCreate, MedicineGet, VaccinationCreate, VaccinationGet, MedicineTakeGet,MedicineTakeCreate,
+    RecommendationJobGet, BulkResult, TimelineEntry, DoseDue, ClinicAvailability, VaccinationReport
 )
 
 from src.repository import (
     create_clinic, get_clinics, create_vaccine, get_vaccines, create_medicine, get_medicines, create_vaccination, get_vaccinations,
     create_medicine_take, get_medicine_takes,
-    create_appointment, get_appointments
+    create_appointment, get_appointments, get_appointment, check_appointment_update, utc_values,
+    create_recommendation_job, get_recommendation_job,
+    pet_update_values, get_pet_timeline, get_vaccination_report,
+    appointments_export, vaccinations_export, medicine_takes_export
 )
-from fastapi.middleware.cors import CORSMiddleware
 
-load_dotenv()
+router = APIRouter()
+
+
+def report_database():
+    log_database_report()
+
+
+async def resume_jobs():
+    await resume_recommendation_jobs()
+
+
+async def shutdown():
+    shutdown_executor()
+    await dispose_engines()
+    if METRICS_ENABLED:
+        flush_metrics()
 
-Base.metadata.create_all(bind=engine)
-app = FastAPI()
-origins = os.environ.get('ORIGINS').split(',')
-app.add_middleware(CORSMiddleware, allow_origins=origins, allow_methods=["*"], allow_headers=["*"], allow_credentials=True)
-app.router.redirect_slashes = False
 
-aiclient = OpenAI(api_key=os.environ.get("OPENAI_KEY"))
+# Prometheus text format, merged across all worker processes
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 
-@app.post("/users/register", response_model=UserGet)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
-    user = get_user_by_email(db, user_data.email)
+async def breed_changed(db, item_id, item, background_tasks):
+    await run(db, invalidate_breed, item_id)
+    bump_catalog("breeds")
+
+
+def catalog_changed(table: str):
+    async def bump(db, item_id, item, background_tasks):
+        bump_catalog(table)
+    return bump
+
+
+# a changed age or breed clears the stored recommendations in the UPDATE itself
+async def pet_changed(db, item_id, item, background_tasks):
+    if item is not None and item.recommendations is None:
+        start_pet_recommendations([item_id])
+
+
+@router.post("/users/register", response_model=UserGet)
+async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+    user = await run(db, get_user_by_email, user_data.email)
     if user:
         raise HTTPException(status_code=400, detail="email уже зарегистрирован")
-    return create_user(db, user_data)
+    password_hash = await hash_password_async(user_data.password)
+    return await run(db, create_user, user_data, password_hash)
 
-@app.post("/users/login", response_model=Token)
-def login(user_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = authenticate(db, user_data.username, user_data.password)
+@router.post("/users/login", response_model=Token)
+async def login(user_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = await authenticate_user(db, user_data.username, user_data.password)
     if user is None:
         raise HTTPException(status_code=401, detail="неправильное имя пользователя или пароль")
 
@@ -57,346 +102,300 @@ def login(user_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     return {"access_token": token, "token_type": "bearer"}
 
 
-@app.post("/breeds/", response_model=BreedGet)
-def add_breed(breed_data: BreedCreate, db: Session = Depends(get_db)):
-    return create_breed(db, breed_data)
-
-@app.get("/breeds/", response_model=List[BreedGet])
-def get_all_breeds(db: Session = Depends(get_db)):
-    return get_breeds(db)
-
-@app.put("/breeds/{item_id}", response_model=BreedGet)
-def update_breed(item_id: int, updated_data: BreedCreate, db: Session = Depends(get_db)):
-    db_item = db.query(Breed).filter(Breed.id == item_id).first()
-    if db_item is None:
-        raise HTTPException(status_code=404, detail="Breed not found")
-    for key, value in updated_data.dict().items():
-        setattr(db_item, key, value)
-    db.commit()
-    db.refresh(db_item)
-    return db_item
-
-@app.delete("/breeds/{item_id}")
-def delete_breed(item_id: int, db: Session = Depends(get_db)):
-    db_item = db.query(Breed).filter(Breed.id == item_id).first()
-    if db_item is None:
-        raise HTTPException(status_code=404, detail="Breed not found")
-    db.delete(db_item)
-    db.commit()
-    return {"detail": "Breed deleted"}
-
-@app.post("/recommendations/", response_model=RecommendationResponse)
-def get_recommendations(req: RecommendationRequest, db: Session = Depends(get_db)):
-    breed = db.query(Breed).filter(Breed.id == req.breed_id).first()
-    if not breed:
-        raise HTTPException(status_code=404, detail="Breed not found")
-
-    prompt = f"""
-    ты специалист в области ветеринарии, занимающийся лечением и сопровождением 
-    породистых собак, твоя задача давать рекомендации по питанию для домашних собак.
-    тебе передаются данные о возрасте, породе.
-    предоставь краткие рекомендации по уходу и питанию за этой собакой, не более 350 символов, на английском языке:
-    порода: {breed.name}
-    возраст(лет): {req.age}
-    """
-    recommendations = aiclient.responses.create(model="gpt-4.1", input=prompt)
-    return {"recommendations": recommendations.output_text}
-
-
-
-@app.post("/recommendations/", response_model=RecommendationResponse)
-def get_recommendations(request: RecommendationRequest, db: Session = Depends(get_db)):
-    breed = db.query(Breed).filter(Breed.id == request.breed_id).first()
-    if not breed:
-        raise HTTPException(status_code=404, detail="Breed not found")
-    recommendations = generate_pet_recommendation(request.age, breed.name)
-    return {"recommendations": recommendations}
-
-
-from fastapi import Query
-
-@app.get("/pets/", response_model=list[PetGet])
-def get_my_pets(
+@router.post("/breeds/", response_model=BreedGet)
+async def add_breed(breed_data: BreedCreate, db: Session = Depends(get_db)):
+    breed = await run(db, create_breed, breed_data)
+    bump_catalog("breeds")
+    return breed
+
+@router.get("/breeds/", response_model=List[BreedGet])
+async def get_all_breeds(request: Request, page: PageParams = Depends(page_params), db: Session = Depends(get_db)):
+    return await catalog_response(request, "breeds", page, BreedGet, lambda: run(db, get_breeds, page))
+
+router.include_router(crud_router("/breeds", Breed, BreedCreate, BreedGet, after_write=breed_changed))
+
+@router.post("/recommendations/", response_model=RecommendationResponse)
+async def get_recommendations(req: RecommendationRequest):
+    return {"recommendations": await recommend(req.breed_id, req.age)}
+
+@router.post("/recommendations/stream")
+async def stream_recommendations(req: RecommendationRequest):
+    events = await stream_recommendation(req.breed_id, req.age)
+    return StreamingResponse(events, media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@router.post("/jobs/recommendations/", response_model=RecommendationJobGet)
+async def add_recommendation_job(db: Session = Depends(get_db)):
+    job = await run(db, create_recommendation_job)
+    start_recommendation_job(job.id)
+    return job
+
+@router.get("/jobs/recommendations/{job_id}", response_model=RecommendationJobGet)
+async def get_recommendation_job_status(job_id: int, db: Session = Depends(get_db)):
+    job = await run(db, get_recommendation_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("/jobs/recommendations/{job_id}/resume", response_model=RecommendationJobGet)
+async def resume_recommendation_job(job_id: int, db: Session = Depends(get_db)):
+    job = await run(db, get_recommendation_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != "done" and not is_job_active(job.id):
+        start_recommendation_job(job.id, job.last_pet_id, job.processed, job.skipped)
+    return job
+
+
+@router.get("/pets/", response_model=list[PetGet])
+async def get_my_pets(
     all: bool = Query(False),
+    breed_id: Optional[int] = None,
+    page: PageParams = Depends(page_params),
     db: Session = Depends(get_db),
-    current_user: User = Security(get_current_user)
+    current_user: UserSnapshot = Security(get_current_principal)
 ):
-    if all:
-        return db.query(Pet).all()
-    return db.query(Pet).filter(Pet.owner_id == current_user.id).all()
-
-@app.put("/pets/{item_id}", response_model=PetGet)
-def update_pet(item_id: int, updated_data: PetCreate, db: Session = Depends(get_db)):
-    db_item = db.query(Pet).filter(Pet.id == item_id).first()
-    if db_item is None:
-        raise HTTPException(status_code=404, detail="Pet not found")
-    for key, value in updated_data.dict().items():
-        setattr(db_item, key, value)
-    db.commit()
-    db.refresh(db_item)
-    return db_item
-
-@app.delete("/pets/{item_id}")
-def delete_pet(item_id: int, db: Session = Depends(get_db)):
-    db_item = db.query(Pet).filter(Pet.id == item_id).first()
-    if db_item is None:
-        raise HTTPException(status_code=404, detail="Pet not found")
-    db.delete(db_item)
-    db.commit()
-    return {"detail": "Pet deleted"}
-
-
-@app.post("/clinics/", response_model=ClinicGet)
-def add_clinic(clinic_data: ClinicCreate, db: Session = Depends(get_db)):
-    return create_clinic(db, clinic_data)
-
-@app.get("/clinics/", response_model=List[ClinicGet])
-def get_all_clinics(db: Session = Depends(get_db)):
-    return db.query(VeterinaryClinic).all()
-
-@app.put("/clinics/{item_id}", response_model=ClinicGet)
-def update_veterinaryclinic(item_id: int, updated_data: ClinicCreate, db: Session = Depends(get_db)):
-    db_item = db.query(VeterinaryClinic).filter(VeterinaryClinic.id == item_id).first()
-    if db_item is None:
-        raise HTTPException(status_code=404, detail="VeterinaryClinic not found")
-    for key, value in updated_data.dict().items():
-        setattr(db_item, key, value)
-    db.commit()
-    db.refresh(db_item)
-    return db_item
-
-
-@app.delete("/clinics/{item_id}")
-def delete_veterinaryclinic(item_id: int, db: Session = Depends(get_db)):
-    db_item = db.query(VeterinaryClinic).filter(VeterinaryClinic.id == item_id).first()
-    if db_item is None:
-        raise HTTPException(status_code=404, detail="VeterinaryClinic not found")
-    db.delete(db_item)
-    db.commit()
-    return {"detail": "VeterinaryClinic deleted"}
-
-@app.post("/vaccines/", response_model=VaccineGet)
-def add_vaccine(data: VaccineCreate, db: Session = Depends(get_db)):
-    return create_vaccine(db, data)
-
-@app.get("/vaccines/", response_model=list[VaccineGet])
-def list_vaccines(db: Session = Depends(get_db)):
-    return get_vaccines(db)
-
-@app.put("/vaccines/{item_id}", response_model=VaccineGet)
-def update_vaccine(item_id: int, updated_data: VaccineCreate, db: Session = Depends(get_db)):
-    db_item = db.query(Vaccine).filter(Vaccine.id == item_id).first()
-    if db_item is None:
-        raise HTTPException(status_code=404, detail="Vaccine not found")
-    for key, value in updated_data.dict().items():
-        setattr(db_item, key, value)
-    db.commit()
-    db.refresh(db_item)
-    return db_item
-
-@app.delete("/vaccines/{item_id}")
-def delete_vaccine(item_id: int, db: Session = Depends(get_db)):
-    db_item = db.query(Vaccine).filter(Vaccine.id == item_id).first()
-    if db_item is None:
-        raise HTTPException(status_code=404, detail="Vaccine not found")
-    db.delete(db_item)
-    db.commit()
-    return {"detail": "Vaccine deleted"}
-
-@app.post("/medicines/", response_model=MedicineGet)
-def add_medicine(data: MedicineCreate, db: Session = Depends(get_db)):
-    return create_medicine(db, data)
-
-@app.get("/medicines/", response_model=list[MedicineGet])
-def list_medicines(db: Session = Depends(get_db)):
-    return get_medicines(db)
-
-@app.put("/medicines/{item_id}", response_model=MedicineGet)
-def update_medicine(item_id: int, updated_data: MedicineCreate, db: Session = Depends(get_db)):
-    db_item = db.query(Medicine).filter(Medicine.id == item_id).first()
-    if db_item is None:
-        raise HTTPException(status_code=404, detail="Medicine not found")
-    for key, value in updated_data.dict().items():
-        setattr(db_item, key, value)
-    db.commit()
-    db.refresh(db_item)
-    return db_item
-
-@app.delete("/medicines/{item_id}")
-def delete_medicine(item_id: int, db: Session = Depends(get_db)):
-    db_item = db.query(Medicine).filter(Medicine.id == item_id).first()
-    if db_item is None:
-        raise HTTPException(status_code=404, detail="Medicine not found")
-    db.delete(db_item)
-    db.commit()
-    return {"detail": "Medicine deleted"}
-
-@app.post("/vaccinations/", response_model=VaccinationGet)
-def add_vaccination(data: VaccinationCreate, db: Session = Depends(get_db)):
-    return create_vaccination(db, data)
-
-@app.get("/vaccinations/", response_model=list[VaccinationGet])
-def list_vaccinations(db: Session = Depends(get_db)):
-    return get_vaccinations(db)
-
-@app.put("/vaccinations/{item_id}", response_model=VaccinationGet)
-def update_vaccination(item_id: int, updated_data: VaccinationCreate, db: Session = Depends(get_db)):
-    db_item = db.query(Vaccination).filter(Vaccination.id == item_id).first()
-    if db_item is None:
-        raise HTTPException(status_code=404, detail="Vaccination not found")
-    for key, value in updated_data.dict().items():
-        setattr(db_item, key, value)
-    db.commit()
-    db.refresh(db_item)
-    return db_item
-
-@app.delete("/vaccinations/{item_id}")
-def delete_vaccination(item_id: int, db: Session = Depends(get_db)):
-    db_item = db.query(Vaccination).filter(Vaccination.id == item_id).first()
-    if db_item is None:
-        raise HTTPException(status_code=404, detail="Vaccination not found")
-    db.delete(db_item)
-    db.commit()
-    return {"detail": "Vaccination deleted"}
-
-@app.post("/medicine-takes/", response_model=MedicineTakeGet)
-def add_medicine_take(data: MedicineTakeCreate, db: Session = Depends(get_db)):
-    return create_medicine_take(db, data)
-
-@app.get("/medicine-takes/", response_model=list[MedicineTakeGet])
-def list_medicine_takes(db: Session = Depends(get_db)):
-    return get_medicine_takes(db)
-
-@app.put("/medicine-takes/{item_id}", response_model=MedicineTakeGet)
-def update_medicinetake(item_id: int, updated_data: MedicineTakeCreate, db: Session = Depends(get_db)):
-    db_item = db.query(MedicineTake).filter(MedicineTake.id == item_id).first()
-    if db_item is None:
-        raise HTTPException(status_code=404, detail="MedicineTake not found")
-    for key, value in updated_data.dict().items():
-        setattr(db_item, key, value)
-    db.commit()
-    db.refresh(db_item)
-    return db_item
-
-@app.delete("/medicine-takes/{item_id}")
-def delete_medicinetake(item_id: int, db: Session = Depends(get_db)):
-    db_item = db.query(MedicineTake).filter(MedicineTake.id == item_id).first()
-    if db_item is None:
-        raise HTTPException(status_code=404, detail="MedicineTake not found")
-    db.delete(db_item)
-    db.commit()
-    return {"detail": "MedicineTake deleted"}
-
-
-@app.post("/appointments/", response_model=AppointmentGet)
-def add_appointment(data: AppointmentCreate, db: Session = Depends(get_db)):
-    if isinstance(data.scheduled_at, str):
-        try:
-            data.scheduled_at = datetime.fromisoformat(data.scheduled_at.replace("Z", "+00:00"))
-        except Exception:
-            raise HTTPException(status_code=400, detail="Invalid datetime format for scheduled_at")
-    record = create_appointment(db, data)
-    return record
-
-@app.get("/appointments/", response_model=List[AppointmentGet])
-def list_appointments(db: Session = Depends(get_db)):
-    return get_appointments(db)
-
-@app.get("/appointments/{item_id}", response_model=AppointmentGet)
-def get_appointment_by_id(item_id: int, db: Session = Depends(get_db)):
-    db_item = db.query(Appointment).filter(Appointment.id == item_id).first()
-    if db_item is None:
-        raise HTTPException(status_code=404, detail="Appointment not found")
+    owner_id = None if all else current_user.id
+    return page_json(await run(db, get_pets, page, owner_id, breed_id))
 
-    procedure = None
-    if db_item.vaccinations:
-        procedure = {
-            "type": "Vaccination",
-            "name": db_item.vaccinations[0].vaccine.name
-        }
-    elif db_item.analyses:
-        procedure = {
-            "type": "Analysis",
-            "name": db_item.analyses[0].analysis_type.name
-        }
-
-    return {
-        "id": db_item.id,
-        "pet_id": db_item.pet_id,
-        "scheduled_at": db_item.scheduled_at,
-        "clinic_id": db_item.clinic_id,
-        "status": db_item.status,
-        "procedure": procedure,
-        "conclusion_status": db_item.conclusion_status
-    }
-
-
-@app.put("/appointments/{item_id}", response_model=AppointmentGet)
-def update_appointment_by_id(item_id: int, updated_data: AppointmentCreate, db: Session = Depends(get_db)):
-    db_item = db.query(Appointment).filter(Appointment.id == item_id).first()
-    if db_item is None:
-        raise HTTPException(status_code=404, detail="Appointment not found")
-    if isinstance(updated_data.scheduled_at, str):
-        updated_data.scheduled_at = datetime.fromisoformat(
-            updated_data.scheduled_at.replace("Z", "+00:00")
-        )
-    for key, value in updated_data.dict().items():
-        setattr(db_item, key, value)
-    db.commit()
-    db.refresh(db_item)
-    return db_item
-
-@app.patch("/appointments/{item_id}", response_model=AppointmentGet)
-def patch_appointment(
+@router.post("/pets/", response_model=PetGet)
+async def add_pet(
+    pet_data: PetCreate,
+    db: Session = Depends(get_db),
+    current_user: UserSnapshot = Security(get_current_principal)
+):
+    pet = await run(db, create_pet, pet_data, current_user.id)
+    start_pet_recommendations([pet.id])
+    return pet
+
+@router.get("/pets/{item_id}/timeline", response_model=List[TimelineEntry])
+async def get_pet_timeline_by_id(item_id: int, page: PageParams = Depends(page_params), db: Session = Depends(get_db)):
+    return page_json(await run(db, get_pet_timeline, item_id, page))
+
+router.include_router(crud_router("/pets", Pet, PetCreate, PetGet, prepare=pet_update_values, after_write=pet_changed))
+
+@router.post("/clinics/", response_model=ClinicGet)
+async def add_clinic(clinic_data: ClinicCreate, db: Session = Depends(get_db)):
+    clinic = await run(db, create_clinic, clinic_data)
+    bump_catalog("veterinary_clinics")
+    return clinic
+
+@router.get("/clinics/", response_model=List[ClinicGet])
+async def get_all_clinics(request: Request, page: PageParams = Depends(page_params), db: Session = Depends(get_db)):
+    return await catalog_response(request, "veterinary_clinics", page, ClinicGet, lambda: run(db, get_clinics, page))
+
+@router.get("/clinics/{item_id}/availability", response_model=ClinicAvailability)
+async def get_clinic_availability_by_id(
     item_id: int,
-    update_data: AppointmentPatch,
+    since: datetime = Query(alias="from"),
+    until: datetime = Query(alias="to"),
     db: Session = Depends(get_db)
 ):
-    appointment = db.query(Appointment).filter(Appointment.id == item_id).first()
-    if not appointment:
-        raise HTTPException(status_code=404, detail="Appointment not found")
+    return await run(db, get_clinic_availability, item_id, since, until)
 
-    update_dict = update_data.dict(exclude_unset=True)
-    for key, value in update_dict.items():
-        setattr(appointment, key, value)
+router.include_router(crud_router("/clinics", VeterinaryClinic, ClinicCreate, ClinicGet, after_write=catalog_changed("veterinary_clinics")))
 
-    db.commit()
-    db.refresh(appointment)
-    return appointment
+@router.post("/vaccines/", response_model=VaccineGet)
+async def add_vaccine(data: VaccineCreate, db: Session = Depends(get_db)):
+    vaccine = await run(db, create_vaccine, data)
+    bump_catalog("vaccines")
+    return vaccine
+
+@router.get("/vaccines/", response_model=list[VaccineGet])
+async def list_vaccines(request: Request, page: PageParams = Depends(page_params), db: Session = Depends(get_db)):
+    return await catalog_response(request, "vaccines", page, VaccineGet, lambda: run(db, get_vaccines, page))
+
+router.include_router(crud_router("/vaccines", Vaccine, VaccineCreate, VaccineGet, after_write=catalog_changed("vaccines")))
+
+@router.post("/medicines/", response_model=MedicineGet)
+async def add_medicine(data: MedicineCreate, db: Session = Depends(get_db)):
+    medicine = await run(db, create_medicine, data)
+    bump_catalog("medicines")
+    return medicine
 
+@router.get("/medicines/", response_model=list[MedicineGet])
+async def list_medicines(request: Request, page: PageParams = Depends(page_params), db: Session = Depends(get_db)):
+    return await catalog_response(request, "medicines", page, MedicineGet, lambda: run(db, get_medicines, page))
 
+router.include_router(crud_router("/medicines", Medicine, MedicineCreate, MedicineGet, after_write=catalog_changed("medicines")))
 
-@app.delete("/appointments/{item_id}", operation_id="delete_appointment_by_id")
-def delete_appointment_by_id(item_id: int, db: Session = Depends(get_db)):
-    db_item = db.query(Appointment).filter(Appointment.id == item_id).first()
-    if db_item is None:
+@router.post("/vaccinations/", response_model=VaccinationGet)
+async def add_vaccination(data: VaccinationCreate, db: Session = Depends(get_db)):
+    return await run(db, create_vaccination, data)
+
+@router.post("/vaccinations/bulk", response_model=BulkResult, openapi_extra=bulk_body_schema(VaccinationCreate))
+async def add_vaccinations_bulk(request: Request, atomic: bool = Query(False), db: Session = Depends(get_db)):
+    rows, errors = await read_bulk_items(request, VaccinationCreate, Vaccination)
+    return await run(db, bulk_create, Vaccination, rows, errors, atomic)
+
+@router.get("/vaccinations/", response_model=list[VaccinationGet])
+async def list_vaccinations(
+    pet_id: Optional[int] = None,
+    appointment_id: Optional[int] = None,
+    vaccine_id: Optional[int] = None,
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_db)
+):
+    return page_json(await run(db, get_vaccinations, page, pet_id, appointment_id, vaccine_id))
+
+@router.get("/vaccinations/export")
+async def export_vaccinations(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+):
+    return export_response(vaccinations_export(since, until), format, "vaccinations")
+
+@router.get("/vaccinations/report", response_model=VaccinationReport)
+async def get_vaccinations_report(
+    within_days: int = Query(30, ge=0),
+    vaccine_id: Optional[int] = None,
+    clinic_id: Optional[int] = None,
+    breed_id: Optional[int] = None,
+    limit: int = Depends(limit_param),
+    db: Session = Depends(get_db)
+):
+    now = datetime.utcnow()
+    return await run(db, get_vaccination_report, now, within_days, limit, vaccine_id, clinic_id, breed_id)
+
+router.include_router(crud_router("/vaccinations", Vaccination, VaccinationCreate, VaccinationGet))
+
+@router.post("/medicine-takes/", response_model=MedicineTakeGet)
+async def add_medicine_take(data: MedicineTakeCreate, db: Session = Depends(get_db)):
+    return await run(db, create_medicine_take, data)
+
+@router.post("/medicine-takes/bulk", response_model=BulkResult, openapi_extra=bulk_body_schema(MedicineTakeCreate))
+async def add_medicine_takes_bulk(request: Request, atomic: bool = Query(False), db: Session = Depends(get_db)):
+    rows, errors = await read_bulk_items(request, MedicineTakeCreate, MedicineTake)
+    return await run(db, bulk_create, MedicineTake, rows, errors, atomic)
+
+@router.get("/medicine-takes/", response_model=list[MedicineTakeGet])
+async def list_medicine_takes(
+    pet_id: Optional[int] = None,
+    medicine_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_db)
+):
+    return page_json(await run(db, get_medicine_takes, page, pet_id, medicine_id, since, until))
+
+@router.get("/medicine-takes/export")
+async def export_medicine_takes(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+):
+    return export_response(medicine_takes_export(since, until), format, "medicine-takes")
+
+@router.get("/medicine-takes/due", response_model=List[DoseDue])
+async def list_due_doses(
+    before: datetime,
+    limit: int = Depends(limit_param),
+    db: Session = Depends(get_db)
+):
+    return await run(db, due_doses, before, limit)
+
+@router.get("/medicine-takes/overdue", response_model=List[DoseDue])
+async def list_overdue_doses(limit: int = Depends(limit_param), db: Session = Depends(get_db)):
+    return await run(db, overdue_doses, limit)
+
+router.include_router(crud_router("/medicine-takes", MedicineTake, MedicineTakeCreate, MedicineTakeGet, prepare=utc_values("datetime"), after_write=catalog_changed("medicine_takes")))
+
+@router.post("/appointments/", response_model=AppointmentGet)
+async def add_appointment(data: AppointmentCreate, db: Session = Depends(get_db)):
+    return await run(db, create_appointment, data)
+
+@router.post("/appointments/bulk", response_model=BulkResult, openapi_extra=bulk_body_schema(AppointmentCreate))
+async def add_appointments_bulk(request: Request, atomic: bool = Query(False), db: Session = Depends(get_db)):
+    rows, errors = await read_bulk_items(request, AppointmentCreate, Appointment)
+    return await run(db, bulk_create, Appointment, rows, errors, atomic)
+
+@router.get("/appointments/", response_model=List[AppointmentGet])
+async def list_appointments(
+    pet_id: Optional[int] = None,
+    clinic_id: Optional[int] = None,
+    status: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_db)
+):
+    return page_json(await run(db, get_appointments, page, pet_id, clinic_id, status, since, until))
+
+@router.get("/appointments/export")
+async def export_appointments(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+):
+    return export_response(appointments_export(since, until), format, "appointments")
+
+@router.get("/appointments/{item_id}", response_model=AppointmentGet)
+async def get_appointment_by_id(item_id: int, db: Session = Depends(get_db)):
+    appointment = await run(db, get_appointment, item_id)
+    if appointment is None:
         raise HTTPException(status_code=404, detail="Appointment not found")
-    db.delete(db_item)
-    db.commit()
-    return {"detail": "Appointment deleted"}
+    return appointment
 
-@app.post("/analysis-types/", response_model=AnalysisTypeGet)
-def add_analysis_type(data: AnalysisTypeCreate, db: Session = Depends(get_db)):
-    return create_analysis_type(db, data)
+router.include_router(crud_router("/appointments", Appointment, AppointmentCreate, AppointmentGet, patch_schema=AppointmentPatch,
+                                   prepare=utc_values("scheduled_at"), read=get_appointment, check=check_appointment_update))
 
-@app.get("/analysis-types/", response_model=List[AnalysisTypeGet])
-def list_analysis_types(db: Session = Depends(get_db)):
-    return get_analysis_types(db)
+@router.post("/analysis-types/", response_model=AnalysisTypeGet)
+async def add_analysis_type(data: AnalysisTypeCreate, db: Session = Depends(get_db)):
+    analysis_type = await run(db, create_analysis_type, data)
+    bump_catalog("analysis_types")
+    return analysis_type
 
+@router.get("/analysis-types/", response_model=List[AnalysisTypeGet])
+async def list_analysis_types(request: Request, page: PageParams = Depends(page_params), db: Session = Depends(get_db)):
+    return await catalog_response(request, "analysis_types", page, AnalysisTypeGet, lambda: run(db, get_analysis_types, page))
 
-@app.put("/analysis-types/{item_id}", response_model=AnalysisTypeGet)
-def update_analysis_type(item_id: int, updated_data: AnalysisTypeCreate, db: Session = Depends(get_db)):
-    return update_entity(db, AnalysisType, item_id, updated_data)
+router.include_router(crud_router("/analysis-types", AnalysisType, AnalysisTypeCreate, AnalysisTypeGet, after_write=catalog_changed("analysis_types")))
 
-@app.delete("/analysis-types/{item_id}")
-def delete_analysis_type(item_id: int, db: Session = Depends(get_db)):
-    return delete_entity(db, AnalysisType, item_id)
-@app.post("/analyses/", response_model=AnalysisGet)
-def add_analysis(data: AnalysisCreate, db: Session = Depends(get_db)):
-    return create_analysis(db, data)
+@router.post("/analyses/", response_model=AnalysisGet)
+async def add_analysis(data: AnalysisCreate, db: Session = Depends(get_db)):
+    return await run(db, create_analysis, data)
 
-@app.get("/analyses/", response_model=List[AnalysisGet])
-def list_analyses(db: Session = Depends(get_db)):
-    return get_analyses(db)
+@router.post("/analyses/bulk", response_model=BulkResult, openapi_extra=bulk_body_schema(AnalysisCreate))
+async def add_analyses_bulk(request: Request, atomic: bool = Query(False), db: Session = Depends(get_db)):
+    rows, errors = await read_bulk_items(request, AnalysisCreate, Analysis)
+    return await run(db, bulk_create, Analysis, rows, errors, atomic)
+
+@router.get("/analyses/", response_model=List[AnalysisGet])
+async def list_analyses(
+    appointment_id: Optional[int] = None,
+    analysis_type_id: Optional[int] = None,
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_db)
+):
+    return page_json(await run(db, get_analyses, page, appointment_id, analysis_type_id))
+
+router.include_router(crud_router("/analyses", Analysis, AnalysisCreate, AnalysisGet))
 
 # @app.get("")
+
+
+# Building the app has no I/O: the database engines, the LLM client and the
+# password hashing pool are created on first use, and the schema is managed by
+# Alembic. A server can therefore import (preload) it once and fork workers.
+def create_app():
+    logging.basicConfig(format="%(levelname)s:     %(name)s - %(message)s")
+    logging.getLogger("src").setLevel(logging.INFO)
+    app = FastAPI()
+    app.add_middleware(CORSMiddleware, allow_origins=ORIGINS, allow_methods=["*"], allow_headers=["*"], allow_credentials=True,
+                       expose_headers=["X-Next-Cursor", "X-Has-More"])
+    if COMPRESSION_ENABLED:
+        app.add_middleware(CompressionMiddleware)
+    if QUERY_BUDGET_MODE != "off":
+        app.add_middleware(QueryBudgetMiddleware)
+    if METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+    app.router.redirect_slashes = False
+    app.include_router(router)
+    app.add_event_handler("startup", report_database)
+    app.add_event_handler("startup", resume_jobs)
+    app.add_event_handler("shutdown", shutdown)
+    return app
+
+
+app = create_app()
@@ -1,17 +1,35 @@
+from dataclasses import dataclass
 from jose import jwt, JWTError
-from .config import SECRET_KEY, ACCESS_TOKEN_EXPIRE_MINUTES, ALGORITHM
+from .cache import TTLCache
+from .catalog import catalog_version
+from .config import SECRET_KEY, ACCESS_TOKEN_EXPIRE_MINUTES, ALGORITHM, PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL
 from datetime import timedelta, datetime
-from .database import get_db
+from .database import get_db, run, run_with_db
+from .hashing import verify_password_async
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from .models import User
+from .repository import get_user_by_email, get_user_by_username, get_user_snapshot_row, update_user_password
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.security import OAuth2PasswordBearer
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login")
 
 
+@dataclass(frozen=True)
+class UserSnapshot:
+    id: int
+    email: str
+    role: str
+
+
+# Snapshots are per worker and keyed by the users catalog version, which the
+# user writes in src.repository bump, so a change reaches every worker on its
+# next request. Anything changing users outside the app (a role change, a
+# deleted account) has to call bump_catalog("users") as well.
+principal_cache = TTLCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL)
+
+
 def create_access_token(data: dict):
     expire = datetime.utcnow()+timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     data_to_encode = data.copy()
@@ -19,25 +37,56 @@ def create_access_token(data: dict):
     print(data_to_encode, SECRET_KEY, ALGORITHM)
     return jwt.encode(data_to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-):
-    exception = HTTPException(
+def credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="неудалось проверить данные авторизации",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def get_token_email(token: str):
     try:
         data = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email = data.get("email")
-        if email is None:
-            raise exception
     except JWTError:
-        raise exception
+        raise credentials_exception()
+    email = data.get("email")
+    if email is None:
+        raise credentials_exception()
+    return email
 
-    user = db.query(User).filter(User.email == email).first()
+async def get_current_principal(token: str = Depends(oauth2_scheme)):
+    email = get_token_email(token)
+    key = (email, catalog_version("users"))
+    snapshot = principal_cache.get(key)
+    if snapshot is None:
+        row = await run_with_db(get_user_snapshot_row, email)
+        if row is None:
+            raise credentials_exception()
+        snapshot = UserSnapshot(id=row.id, email=row.email, role=row.role)
+        principal_cache.set(key, snapshot)
+    return snapshot
+
+async def authenticate_user(db: Session, username: str, password: str):
+    user = await run(db, get_user_by_username, username)
+    if user is None:
+        return None
+    valid, new_hash = await verify_password_async(password, user.password)
+    if not valid:
+        return None
+    if new_hash is not None:
+        await run(db, update_user_password, user.id, new_hash)
+    return user
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+):
+    exception = credentials_exception()
+    email = get_token_email(token)
+
+    user = await run(db, get_user_by_email, email)
     if user is None:
         raise exception
 
     return user
+
@@ -0,0 +1,124 @@
+import json
+from bisect import insort
+from fastapi import HTTPException, Request
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from .config import BULK_MAX_ITEMS
+from .models import Pet, VeterinaryClinic, Appointment, Vaccine, Vaccination, Medicine, MedicineTake, AnalysisType, Analysis
+from .repository import get_clinic_bookings, get_existing_ids, insert_many, lock_clinic, utc_values
+from .slots import is_free
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+REFERENCES = {
+    Appointment: {"pet_id": Pet, "clinic_id": VeterinaryClinic},
+    Vaccination: {"pet_id": Pet, "vaccine_id": Vaccine, "appointment_id": Appointment},
+    MedicineTake: {"pet_id": Pet, "medicine_id": Medicine},
+    Analysis: {"appointment_id": Appointment, "analysis_type_id": AnalysisType},
+}
+
+# datetime columns normalized to naive UTC before the insert
+UTC_FIELDS = {Appointment: "scheduled_at", MedicineTake: "datetime"}
+
+
+def bulk_body_schema(schema):
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": schema.model_json_schema()}},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        }
+    }
+
+
+def _decode(body: bytes, content_type: str):
+    if content_type.split(";")[0].strip() in NDJSON_TYPES:
+        items = []
+        for line_no, line in enumerate(body.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid JSON on line {line_no}")
+        return items
+    try:
+        items = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array")
+    return items
+
+
+async def read_bulk_items(request: Request, schema, model):
+    items = _decode(await request.body(), request.headers.get("content-type", ""))
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} items per request")
+
+    rows, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            values = schema.model_validate(item).model_dump()
+        except ValidationError as exc:
+            errors.append({"index": index, "detail": exc.errors(include_url=False, include_context=False)})
+            continue
+        rows.append((index, values))
+    return rows, errors
+
+
+def check_slots(db: Session, rows):
+    # one lock and one range query per clinic (in id order, so two batches
+    # cannot deadlock); rows accepted earlier in the batch count as bookings
+    by_clinic = {}
+    for index, values in rows:
+        by_clinic.setdefault(values["clinic_id"], []).append((index, values))
+    accepted, errors = [], []
+    for clinic_id in sorted(by_clinic):
+        slot = lock_clinic(db, clinic_id)
+        starts = [values["scheduled_at"] for _, values in by_clinic[clinic_id]]
+        bookings = list(get_clinic_bookings(db, clinic_id, min(starts) - slot, max(starts) + slot))
+        for index, values in by_clinic[clinic_id]:
+            if is_free(bookings, values["scheduled_at"], slot):
+                insort(bookings, values["scheduled_at"])
+                accepted.append((index, values))
+            else:
+                errors.append({"index": index, "detail": "Slot is already booked"})
+    accepted.sort(key=lambda row: row[0])
+    return accepted, errors
+
+
+def bulk_create(db: Session, model, rows, errors, atomic: bool = False):
+    if model in UTC_FIELDS:
+        prepare = utc_values(UTC_FIELDS[model])
+        rows = [(index, prepare(values)) for index, values in rows]
+    references = REFERENCES.get(model, {})
+    existing = {
+        field: get_existing_ids(db, target, {values[field] for _, values in rows})
+        for field, target in references.items()
+    }
+
+    valid = []
+    errors = list(errors)
+    for index, values in rows:
+        missing = [field for field in references if values[field] not in existing[field]]
+        if missing:
+            errors.append({"index": index, "detail": f"{', '.join(missing)} not found"})
+        else:
+            valid.append((index, values))
+    if model is Appointment and valid and not (atomic and errors):
+        valid, conflicts = check_slots(db, valid)
+        errors.extend(conflicts)
+    errors.sort(key=lambda error: error["index"])
+
+    if atomic and errors:
+        db.rollback()
+        raise HTTPException(status_code=422, detail=errors)
+    ids = insert_many(db, model, [values for _, values in valid])
+    db.commit()
+    return {
+        "created": [{"index": index, "id": item_id} for (index, _), item_id in zip(valid, ids)],
+        "errors": errors,
+    }
@@ -0,0 +1,79 @@
+import hashlib
+import os
+import time
+from typing import List
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from .cache import TTLCache
+from .config import CATALOG_VERSION_DIR, CATALOG_CACHE_SIZE, CATALOG_CACHE_TTL, CATALOG_CACHE_CONTROL
+from .pagination import PageParams
+
+# Catalog versions are the mtimes of marker files, so every worker process
+# sees a bump made by any other one with a single stat() call.
+bodies = TTLCache(CATALOG_CACHE_SIZE, CATALOG_CACHE_TTL)
+_adapters = {}
+
+
+def _marker(table: str):
+    return os.path.join(CATALOG_VERSION_DIR, table)
+
+
+def bump_catalog(table: str):
+    os.makedirs(CATALOG_VERSION_DIR, exist_ok=True)
+    path = _marker(table)
+    try:
+        previous = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        previous = 0
+        open(path, "a").close()
+    now = max(time.time_ns(), previous + 1)
+    os.utime(path, ns=(now, now))
+    return now
+
+
+def catalog_version(table: str):
+    try:
+        return os.stat(_marker(table)).st_mtime_ns
+    except FileNotFoundError:
+        return bump_catalog(table)
+
+
+def make_etag(table: str, version: int, page: PageParams):
+    digest = hashlib.blake2b(f"{table}:{version}:{page.cursor}:{page.limit}".encode(), digest_size=8).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(header: str, etag: str):
+    if header is None:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _adapter(schema):
+    adapter = _adapters.get(schema)
+    if adapter is None:
+        adapter = _adapters[schema] = TypeAdapter(List[schema])
+    return adapter
+
+
+async def catalog_response(request: Request, table: str, page: PageParams, schema, load):
+    version = catalog_version(table)
+    etag = make_etag(table, version, page)
+    headers = {"ETag": etag, "Cache-Control": CATALOG_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    key = (table, page)
+    cached = bodies.get(key)
+    if cached is None or cached[0] != etag:
+        result = await load()
+        adapter = _adapter(schema)
+        body = adapter.dump_json(adapter.validate_python(result.items, from_attributes=True))
+        page_headers = {"X-Has-More": "true" if result.has_more else "false"}
+        if result.next_cursor is not None:
+            page_headers["X-Next-Cursor"] = result.next_cursor
+        cached = (etag, body, page_headers)
+        bodies.set(key, cached)
+    _, body, page_headers = cached
+    return Response(content=body, media_type="application/json", headers={**headers, **page_headers})
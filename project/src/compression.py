@@ -0,0 +1,122 @@
+import zlib
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from .config import COMPRESSION_MIN_SIZE, COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY, COMPRESSION_OFFLOAD_SIZE
+
+try:
+    import brotli
+except ImportError:  # optional; without it only gzip is offered
+    brotli = None
+
+# Server-sent events are left out: they have to reach the client one event at
+# a time. Everything not listed (images, archives) is already compressed.
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/csv", "text/plain", "text/html")
+
+
+# An encoder is compress(data, last) -> bytes. Every chunk is flushed, so a
+# streamed response reaches the client as the app produces it.
+def gzip_encoder(level: int = COMPRESSION_GZIP_LEVEL):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(data: bytes, last: bool):
+        return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+    return compress
+
+
+def brotli_encoder(quality: int = COMPRESSION_BROTLI_QUALITY):
+    compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=quality)
+
+    def compress(data: bytes, last: bool):
+        return compressor.process(data) + (compressor.finish() if last else compressor.flush())
+    return compress
+
+
+# in order of preference when the client accepts several with the same q
+ENCODERS = {"br": brotli_encoder, "gzip": gzip_encoder} if brotli is not None else {"gzip": gzip_encoder}
+
+
+def choose_encoding(accept_encoding: str):
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, parameters = part.partition(";")
+        weight = 1.0
+        parameters = parameters.replace(" ", "")
+        if parameters.startswith("q="):
+            try:
+                weight = float(parameters[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+    best, best_weight = None, 0.0
+    for encoding in ENCODERS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compressible(scope, start):
+    headers = Headers(raw=start["headers"])
+    return (
+        scope["method"] != "HEAD"
+        and start["status"] not in (204, 304)
+        and "content-encoding" not in headers
+        and "no-transform" not in headers.get("cache-control", "")
+        and headers.get("content-type", "").split(";")[0].strip() in COMPRESSIBLE_TYPES
+    )
+
+
+# zlib and brotli release the GIL, so large bodies compress in a worker thread
+# while the event loop keeps serving other requests
+async def run_encoder(compress, data: bytes, last: bool):
+    if len(data) >= COMPRESSION_OFFLOAD_SIZE:
+        return await run_in_threadpool(compress, data, last)
+    return compress(data, last)
+
+
+class CompressionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start = None
+        compress = None
+
+        async def send_wrapper(message):
+            nonlocal start, compress
+            if message["type"] == "http.response.start":
+                # held back until the first body chunk tells whether, and how, to compress
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                return await send(message)
+            body, more = message.get("body", b""), message.get("more_body", False)
+            if start is not None:
+                response_start, start = start, None
+                if compressible(scope, response_start):
+                    headers = MutableHeaders(scope=response_start)
+                    headers.add_vary_header("Accept-Encoding")
+                    if encoding is not None and (more or len(body) >= COMPRESSION_MIN_SIZE):
+                        compress = ENCODERS[encoding]()
+                        headers["Content-Encoding"] = encoding
+                        del headers["Content-Length"]
+                        # the representation changed; a weak ETag still lets If-None-Match match it
+                        etag = headers.get("etag")
+                        if etag is not None and not etag.startswith("W/"):
+                            headers["ETag"] = f"W/{etag}"
+                        if not more:
+                            body = await run_encoder(compress, body, True)
+                            headers["Content-Length"] = str(len(body))
+                            await send(response_start)
+                            return await send({**message, "body": body})
+                await send(response_start)
+            if compress is not None:
+                if not body and more:
+                    return
+                message = {**message, "body": await run_encoder(compress, body, not more)}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
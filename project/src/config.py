@@ -1,6 +1,61 @@
 import os
+import tempfile
 
 
 SECRET_KEY = os.environ.get("SECRET_KEY")
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
\ No newline at end of file
+ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# comma-separated CORS origins; none are allowed when unset
+ORIGINS = [origin for origin in os.environ.get("ORIGINS", "").split(",") if origin]
+
+RECOMMENDATIONS_MODEL = os.environ.get("RECOMMENDATIONS_MODEL", "gpt-4.1")
+RECOMMENDATIONS_PROMPT_VERSION = 1
+RECOMMENDATIONS_CACHE_SIZE = int(os.environ.get("RECOMMENDATIONS_CACHE_SIZE", 1024))
+RECOMMENDATIONS_CACHE_TTL = int(os.environ.get("RECOMMENDATIONS_CACHE_TTL", 7 * 24 * 3600))
+RECOMMENDATIONS_CACHE_MAX_ROWS = int(os.environ.get("RECOMMENDATIONS_CACHE_MAX_ROWS", 100000))
+# the row count is checked against the limit once per this many stores per worker
+RECOMMENDATIONS_EVICT_EVERY = int(os.environ.get("RECOMMENDATIONS_EVICT_EVERY", 100))
+RECOMMENDATIONS_CONCURRENCY = int(os.environ.get("RECOMMENDATIONS_CONCURRENCY", 8))
+RECOMMENDATIONS_TIMEOUT = float(os.environ.get("RECOMMENDATIONS_TIMEOUT", 30))
+OPENAI_BASE_URL = os.environ.get("OPENAI_BASE_URL")
+RECOMMENDATIONS_JOB_CHUNK = int(os.environ.get("RECOMMENDATIONS_JOB_CHUNK", 1000))
+RECOMMENDATIONS_JOB_STALE_AFTER = int(os.environ.get("RECOMMENDATIONS_JOB_STALE_AFTER", 120))
+PAGE_LIMIT_DEFAULT = int(os.environ.get("PAGE_LIMIT_DEFAULT", 100))
+PAGE_LIMIT_MAX = int(os.environ.get("PAGE_LIMIT_MAX", 1000))
+PRINCIPAL_CACHE_SIZE = int(os.environ.get("PRINCIPAL_CACHE_SIZE", 10000))
+PRINCIPAL_CACHE_TTL = int(os.environ.get("PRINCIPAL_CACHE_TTL", 60))
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_QUEUE = int(os.environ.get("PASSWORD_HASH_QUEUE", 32))
+DB_ASYNC = os.environ.get("DB_ASYNC", "true").lower() == "true"
+DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./pets.db")
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() == "true"
+SQLITE_PRAGMAS = {
+    "journal_mode": os.environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+    "cache_size": int(os.environ.get("SQLITE_CACHE_SIZE", -64000)),
+}
+BULK_MAX_ITEMS = int(os.environ.get("BULK_MAX_ITEMS", 10000))
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", 1000))
+CATALOG_VERSION_DIR = os.environ.get("CATALOG_VERSION_DIR", os.path.join(tempfile.gettempdir(), "pets-catalog-versions"))
+CATALOG_CACHE_SIZE = int(os.environ.get("CATALOG_CACHE_SIZE", 256))
+CATALOG_CACHE_TTL = int(os.environ.get("CATALOG_CACHE_TTL", 3600))
+CATALOG_CACHE_CONTROL = os.environ.get("CATALOG_CACHE_CONTROL", "no-cache")
+DOSE_OVERDUE_GRACE_HOURS = int(os.environ.get("DOSE_OVERDUE_GRACE_HOURS", 48))
+DOSE_CATCHUP_OVERLAP = int(os.environ.get("DOSE_CATCHUP_OVERLAP", 100))
+AVAILABILITY_MAX_DAYS = int(os.environ.get("AVAILABILITY_MAX_DAYS", 92))
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+METRICS_DIR = os.environ.get("METRICS_DIR", os.path.join(tempfile.gettempdir(), "pets-metrics"))
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 1))
+QUERY_BUDGET_MODE = os.environ.get("QUERY_BUDGET_MODE", "off").lower()
+QUERY_BUDGET_DEFAULT = int(os.environ.get("QUERY_BUDGET_DEFAULT", 10))
+QUERY_REPEAT_LIMIT = int(os.environ.get("QUERY_REPEAT_LIMIT", 3))
+COMPRESSION_ENABLED = os.environ.get("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", 5))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get("COMPRESSION_BROTLI_QUALITY", 4))
+COMPRESSION_OFFLOAD_SIZE = int(os.environ.get("COMPRESSION_OFFLOAD_SIZE", 64 * 1024))
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, BackgroundTasks, Depends
+from sqlalchemy.orm import Session
+from .database import get_db, run
+from .repository import update_entity, delete_entity
+
+
+# PUT/DELETE (and optionally PATCH) by id for one model. `prepare` rewrites the
+# update values, `check(db, item_id, values)` runs before the UPDATE in the
+# same transaction and may reject it, `read` builds the response when it is
+# not the updated row, and `after_write(db, item_id, item, background_tasks)`
+# runs after each commit (item is None after a delete).
+def crud_router(prefix: str, model, update_schema, response_model, patch_schema=None, prepare=None, read=None, check=None, after_write=None):
+    router = APIRouter(prefix=prefix)
+    name = model.__tablename__
+
+    async def save(db, item_id: int, values: dict, background_tasks: BackgroundTasks):
+        if prepare is not None and values:
+            values = prepare(values)
+        item = await run(db, update_entity, model, item_id, values, read, check)
+        if after_write is not None:
+            await after_write(db, item_id, item, background_tasks)
+        return item
+
+    @router.put("/{item_id}", response_model=response_model, name=f"update_{name}")
+    async def update_item(item_id: int, updated_data: update_schema, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+        return await save(db, item_id, updated_data.dict(), background_tasks)
+
+    if patch_schema is not None:
+        @router.patch("/{item_id}", response_model=response_model, name=f"patch_{name}")
+        async def patch_item(item_id: int, update_data: patch_schema, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+            return await save(db, item_id, update_data.dict(exclude_unset=True), background_tasks)
+
+    @router.delete("/{item_id}", name=f"delete_{name}")
+    async def delete_item(item_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+        result = await run(db, delete_entity, model, item_id)
+        if after_write is not None:
+            await after_write(db, item_id, None, background_tasks)
+        return result
+
+    return router
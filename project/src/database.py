@@ -1,17 +1,182 @@
-from sqlalchemy import create_engine
+import logging
+from contextlib import asynccontextmanager
+from threading import Lock
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from .config import (
+    DB_ASYNC, DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE, DB_POOL_PRE_PING, SQLITE_PRAGMAS,
+    METRICS_ENABLED, QUERY_BUDGET_MODE
+)
+from .metrics import instrument_engine
+from .query_budget import watch_queries
 
+logger = logging.getLogger(__name__)
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./pets.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SQLALCHEMY_DATABASE_URL = DATABASE_URL
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def async_url(url: str):
+    scheme, rest = url.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(scheme.split('+')[0], scheme)}://{rest}"
+
+
+def is_sqlite(url: str):
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def engine_options(url: str):
+    options = {"pool_pre_ping": DB_POOL_PRE_PING, "pool_recycle": DB_POOL_RECYCLE}
+    if is_sqlite(url):
+        if make_url(url).database in (None, "", ":memory:"):
+            return options
+        options["connect_args"] = {"check_same_thread": False}
+    options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+    return options
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def create_engines(url: str, use_async: bool):
+    sync_engine = create_engine(url, **engine_options(url))
+    aio_engine = create_async_engine(async_url(url), **engine_options(url)) if use_async else None
+    if is_sqlite(url):
+        event.listen(sync_engine, "connect", apply_sqlite_pragmas)
+        if aio_engine is not None:
+            event.listen(aio_engine.sync_engine, "connect", apply_sqlite_pragmas)
+    for instrument, enabled in ((instrument_engine, METRICS_ENABLED), (watch_queries, QUERY_BUDGET_MODE != "off")):
+        if enabled:
+            instrument(sync_engine)
+            if aio_engine is not None:
+                instrument(aio_engine.sync_engine)
+    return sync_engine, aio_engine
+
+
+# The engines are created on first use rather than at import, so a preloading
+# server forks its workers before any connection pool exists.
+_engines = None
+_engines_lock = Lock()
+_session = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False)
+_async_session = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+
+def get_engines():
+    global _engines
+    if _engines is None:
+        with _engines_lock:
+            if _engines is None:
+                _engines = create_engines(SQLALCHEMY_DATABASE_URL, DB_ASYNC)
+    return _engines
+
+
+def get_engine():
+    return get_engines()[0]
+
+
+def get_async_engine():
+    return get_engines()[1]
+
+
+def session():
+    return _session(bind=get_engine())
+
+
+def async_session():
+    return _async_session(bind=get_async_engine())
 
 Base = declarative_base()
 
-def get_db():
-    db = session()
-    try:
+
+def database_report():
+    engine, async_engine = get_engines()
+    active = async_engine.sync_engine if async_engine is not None else engine
+    pool = active.pool
+    report = {
+        "url": active.url.render_as_string(hide_password=True),
+        "mode": "async" if async_engine is not None else "sync",
+        "pool": type(pool).__name__,
+        "pool_size": getattr(pool, "size", lambda: None)(),
+        "max_overflow": getattr(pool, "_max_overflow", None),
+        "pool_recycle": pool._recycle,
+        "pool_pre_ping": pool._pre_ping,
+    }
+    if is_sqlite(SQLALCHEMY_DATABASE_URL):
+        with engine.connect() as connection:
+            for name in SQLITE_PRAGMAS:
+                report[name] = connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+    return report
+
+
+def log_database_report():
+    logger.info("database: %s", ", ".join(f"{key}={value}" for key, value in database_report().items()))
+
+
+@asynccontextmanager
+async def open_db():
+    if DB_ASYNC:
+        async with async_session() as db:
+            yield db
+    else:
+        db = session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+async def get_db():
+    async with open_db() as db:
         yield db
+
+
+async def run(db, fn, *args, **kwargs):
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
+async def dispose_engines():
+    global _engines
+    if _engines is None:
+        return
+    engine, async_engine = _engines
+    _engines = None
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
+
+
+async def run_with_db(fn, *args, **kwargs):
+    async with open_db() as db:
+        return await run(db, fn, *args, **kwargs)
+
+
+def _stream_partitions(statement, batch_size: int):
+    with get_engine().connect() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(statement)
+        yield from result.partitions()
+
+
+async def stream_rows(statement, batch_size: int):
+    async_engine = get_async_engine()
+    if async_engine is not None:
+        async with async_engine.connect() as connection:
+            result = await connection.stream(statement.execution_options(yield_per=batch_size))
+            async for rows in result.partitions():
+                yield rows
+        return
+    partitions = _stream_partitions(statement, batch_size)
+    try:
+        async for rows in iterate_in_threadpool(partitions):
+            yield rows
     finally:
-        db.close()
\ No newline at end of file
+        await run_in_threadpool(partitions.close)
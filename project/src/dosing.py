@@ -0,0 +1,128 @@
+import heapq
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import NamedTuple
+from sqlalchemy.orm import Session
+from .catalog import catalog_version
+from .config import DOSE_CATCHUP_OVERLAP, DOSE_OVERDUE_GRACE_HOURS
+from .repository import naive_utc, get_medicine_periods, get_last_medicine_takes, get_last_medicine_take_id, get_medicine_takes_after
+
+# Next doses per (pet, medicine) are kept in a min-heap ordered by due time.
+# A newer take pushes a fresh entry and leaves the old one behind; entries that
+# no longer match `latest` are dropped when they reach the top (lazy deletion).
+# Takes inserted by any worker are picked up by id on the next query. Ids are
+# not committed in order on Postgres (a lower id can become visible after a
+# higher one), so the catch-up re-reads the last DOSE_CATCHUP_OVERLAP ids and
+# skips the ones already applied; a take whose insert lags more than that many
+# later ones is only seen on the next reload. Edits and deletes of takes or
+# medicines bump a catalog marker and force a reload. A dose overdue by more
+# than DOSE_OVERDUE_GRACE_HOURS counts as a finished course and leaves the
+# schedule.
+
+
+class Dose(NamedTuple):
+    pet_id: int
+    medicine_id: int
+    last_taken_at: datetime
+    due_at: datetime
+
+
+class DoseSchedule:
+    def __init__(self):
+        self.version = None
+        self.last_take_id = 0
+        self.seen = set()
+        self.periods = {}
+        self.latest = {}
+        self.heap = []
+
+    def load(self, version, periods, last_takes, last_take_id: int):
+        self.version, self.periods, self.last_take_id = version, periods, last_take_id
+        self.seen = set()
+        self.latest = {}
+        for pet_id, medicine_id, taken_at in last_takes:
+            dose = self.next_dose(pet_id, medicine_id, taken_at)
+            if dose is not None:
+                self.latest[(pet_id, medicine_id)] = dose
+        self.heap = [(dose.due_at, dose.pet_id, dose.medicine_id) for dose in self.latest.values()]
+        heapq.heapify(self.heap)
+
+    def next_dose(self, pet_id: int, medicine_id: int, taken_at: datetime):
+        period = self.periods.get(medicine_id)
+        if period is None or taken_at is None:
+            return None
+        taken_at = naive_utc(taken_at)
+        return Dose(pet_id, medicine_id, taken_at, taken_at + timedelta(hours=period))
+
+    def record(self, pet_id: int, medicine_id: int, taken_at: datetime):
+        dose = self.next_dose(pet_id, medicine_id, taken_at)
+        current = self.latest.get((pet_id, medicine_id))
+        if dose is None or (current is not None and current.last_taken_at >= dose.last_taken_at):
+            return
+        self.latest[(pet_id, medicine_id)] = dose
+        heapq.heappush(self.heap, (dose.due_at, pet_id, medicine_id))
+
+    def catch_up_from(self):
+        return max(0, self.last_take_id - DOSE_CATCHUP_OVERLAP)
+
+    def apply(self, takes):
+        for take_id, pet_id, medicine_id, taken_at in takes:
+            if take_id in self.seen:
+                continue
+            self.seen.add(take_id)
+            self.record(pet_id, medicine_id, taken_at)
+            self.last_take_id = max(self.last_take_id, take_id)
+        floor = self.catch_up_from()
+        self.seen = {take_id for take_id in self.seen if take_id > floor}
+
+    def due_before(self, before: datetime, limit: int, now: datetime):
+        expired_before = now - timedelta(hours=DOSE_OVERDUE_GRACE_HOURS)
+        found = []
+        while self.heap and self.heap[0][0] < before and len(found) < limit:
+            due_at, pet_id, medicine_id = entry = heapq.heappop(self.heap)
+            dose = self.latest.get((pet_id, medicine_id))
+            if dose is None or dose.due_at != due_at:
+                continue
+            if due_at < expired_before:
+                del self.latest[(pet_id, medicine_id)]
+                continue
+            found.append(entry)
+        for entry in found:
+            heapq.heappush(self.heap, entry)
+        return [self.latest[(pet_id, medicine_id)] for _, pet_id, medicine_id in found]
+
+
+schedule = DoseSchedule()
+_lock = Lock()
+
+
+def schedule_version():
+    return catalog_version("medicines"), catalog_version("medicine_takes")
+
+
+# The lock only guards the in-memory work: under the async engine this runs on
+# the event loop thread, so it must never be held across a query.
+def sync_schedule(db: Session, now: datetime):
+    version = schedule_version()
+    if version != schedule.version:
+        last_take_id = get_last_medicine_take_id(db)
+        periods = get_medicine_periods(db)
+        since = now - timedelta(hours=DOSE_OVERDUE_GRACE_HOURS + max(periods.values(), default=0))
+        last_takes = get_last_medicine_takes(db, since)
+        with _lock:
+            schedule.load(version, periods, last_takes, last_take_id)
+    else:
+        takes = get_medicine_takes_after(db, schedule.catch_up_from())
+        with _lock:
+            schedule.apply(takes)
+
+
+def due_doses(db: Session, before: datetime, limit: int):
+    now = datetime.utcnow()
+    sync_schedule(db, now)
+    with _lock:
+        return schedule.due_before(naive_utc(before), limit, now)
+
+
+def overdue_doses(db: Session, limit: int):
+    return due_doses(db, datetime.utcnow(), limit)
@@ -0,0 +1,41 @@
+import csv
+import io
+import json
+from datetime import date
+from fastapi.responses import StreamingResponse
+from .config import EXPORT_BATCH_SIZE
+from .database import stream_rows
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+async def ndjson_lines(statement):
+    async for rows in stream_rows(statement, EXPORT_BATCH_SIZE):
+        yield "".join(json.dumps(dict(row._mapping), default=_default, ensure_ascii=False) + "\n" for row in rows)
+
+
+async def csv_lines(statement):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.name for column in statement.selected_columns])
+    yield buffer.getvalue()
+    async for rows in stream_rows(statement, EXPORT_BATCH_SIZE):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+
+def export_response(statement, fmt: str, name: str):
+    lines = csv_lines(statement) if fmt == "csv" else ndjson_lines(statement)
+    return StreamingResponse(
+        lines,
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
@@ -0,0 +1,77 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from fastapi import FastAPI, Body
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Local stand-in for the OpenAI Responses API. Point the app at it with
+# OPENAI_BASE_URL=http://127.0.0.1:8100/v1 and run:
+#   uvicorn src.fake_llm:app --port 8100
+
+FAKE_LLM_DELAY = float(os.environ.get("FAKE_LLM_DELAY", 0.5))
+FAKE_LLM_TOKENS = int(os.environ.get("FAKE_LLM_TOKENS", 20))
+
+app = FastAPI()
+app.state.calls = 0
+app.state.delay = FAKE_LLM_DELAY
+# tests set an error status here to simulate an outage of the service
+app.state.status = 200
+
+
+def fake_text(prompt: str):
+    lines = [line.strip() for line in prompt.strip().splitlines()]
+    return "Fake recommendation for " + ", ".join(lines[-2:])
+
+
+def fake_response(model: str, text: str):
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": model,
+        "status": "completed",
+        "parallel_tool_calls": False,
+        "tool_choice": "auto",
+        "tools": [],
+        "output": [{
+            "id": f"msg_{uuid.uuid4().hex}",
+            "type": "message",
+            "role": "assistant",
+            "status": "completed",
+            "content": [{"type": "output_text", "text": text, "annotations": []}],
+        }],
+    }
+
+
+def sse(event: dict):
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def stream_events(model: str, text: str):
+    words = text.split(" ")
+    step = max(1, len(words) // FAKE_LLM_TOKENS)
+    for number, start in enumerate(range(0, len(words), step)):
+        await asyncio.sleep(app.state.delay / FAKE_LLM_TOKENS)
+        delta = " ".join(words[start:start + step])
+        if start + step < len(words):
+            delta += " "
+        yield sse({
+            "type": "response.output_text.delta", "delta": delta, "item_id": "msg",
+            "output_index": 0, "content_index": 0, "sequence_number": number,
+        })
+    yield sse({"type": "response.completed", "response": fake_response(model, text), "sequence_number": len(words)})
+
+
+@app.post("/v1/responses")
+async def create_response(payload: dict = Body(...)):
+    app.state.calls += 1
+    if app.state.status != 200:
+        error = {"message": "fake outage", "type": "server_error", "param": None, "code": None}
+        return JSONResponse({"error": error}, status_code=app.state.status)
+    text = fake_text(payload.get("input", ""))
+    if payload.get("stream"):
+        return StreamingResponse(stream_events(payload.get("model"), text), media_type="text/event-stream")
+    await asyncio.sleep(app.state.delay)
+    return fake_response(payload.get("model"), text)
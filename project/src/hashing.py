@@ -0,0 +1,73 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from .config import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE
+
+password_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+_executor = None
+_pending = 0
+
+
+def hash_password(password: str):
+    return password_context.hash(password)
+
+
+def verify_password(password: str, password_hash: str):
+    if not password_hash:
+        return False, None
+    return password_context.verify_and_update(password, password_hash)
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+# A worker that dies (OOM kill, crash) breaks the whole pool; every later
+# submit would fail, so the broken pool is dropped and rebuilt on next use.
+def discard_executor(executor):
+    global _executor
+    if _executor is executor:
+        _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
+
+
+async def run_hashing(fn, *args):
+    global _pending
+    if _pending >= PASSWORD_HASH_QUEUE:
+        raise HTTPException(status_code=503, detail="Сервер перегружен, повторите попытку", headers={"Retry-After": "1"})
+    _pending += 1
+    try:
+        for attempt in range(2):
+            executor = get_executor()
+            try:
+                return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+            except BrokenProcessPool:
+                discard_executor(executor)
+        raise HTTPException(status_code=503, detail="Сервер перегружен, повторите попытку", headers={"Retry-After": "1"})
+    finally:
+        _pending -= 1
+
+
+async def hash_password_async(password: str):
+    return await run_hashing(hash_password, password)
+
+
+async def verify_password_async(password: str, password_hash: str):
+    return await run_hashing(verify_password, password, password_hash)
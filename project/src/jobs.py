@@ -0,0 +1,139 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import NamedTuple
+from fastapi import HTTPException
+from .config import RECOMMENDATIONS_JOB_CHUNK, RECOMMENDATIONS_JOB_STALE_AFTER
+from .database import run_with_db
+from .query_budget import detached_context
+from .recommendations import api_error, recommend
+from .repository import (
+    get_pets_chunk, get_pets_by_ids, bulk_update_pet_recommendations,
+    get_recommendation_job, update_recommendation_job, claim_stale_recommendation_jobs
+)
+
+logger = logging.getLogger(__name__)
+_tasks = {}
+_fills = set()
+# a group whose breed is gone is skipped for good; FAILED (the service timed
+# out or errored) is worth another try
+FAILED = object()
+
+
+class FillResult(NamedTuple):
+    filled: int
+    failed: list
+    skipped: list
+
+
+async def _recommend_group(breed_id: int, age: int):
+    try:
+        return await recommend(breed_id, age)
+    except HTTPException as exc:
+        logger.warning("no recommendation for breed %s age %s: %s", breed_id, age, exc.detail)
+        return None if exc.status_code == 404 else FAILED
+    except api_error() as exc:
+        logger.warning("no recommendation for breed %s age %s: %s", breed_id, age, exc)
+        return FAILED
+
+
+async def fill_recommendations(pets):
+    groups = defaultdict(list)
+    skipped = []
+    for pet_id, breed_id, age in pets:
+        if breed_id is not None and age is not None:
+            groups[(breed_id, age)].append(pet_id)
+        else:
+            skipped.append(pet_id)
+
+    keys = list(groups)
+    texts = await asyncio.gather(*[_recommend_group(breed_id, age) for breed_id, age in keys])
+    rows, failed = [], []
+    for key, text in zip(keys, texts):
+        if text is FAILED:
+            failed.extend(groups[key])
+        elif text is None:
+            skipped.extend(groups[key])
+        else:
+            rows.extend({"id": pet_id, "recommendations": text} for pet_id in groups[key])
+    await run_with_db(bulk_update_pet_recommendations, rows)
+    return FillResult(len(rows), failed, skipped)
+
+
+async def fill_pet_recommendations(pet_ids):
+    pets = await run_with_db(get_pets_by_ids, pet_ids)
+    await fill_recommendations(pets)
+
+
+def _fill_done(task: asyncio.Task):
+    _fills.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("recommendation fill failed", exc_info=task.exception())
+
+
+# Fills the pets' recommendations in the background, after and outside the
+# request that wrote them, so neither its latency metric nor its query budget
+# pays for the LLM round trip.
+def start_pet_recommendations(pet_ids):
+    task = asyncio.get_running_loop().create_task(fill_pet_recommendations(pet_ids), context=detached_context())
+    _fills.add(task)
+    task.add_done_callback(_fill_done)
+    return task
+
+
+# The checkpoint never passes a pet whose group failed: the job stops there as
+# failed and a resume retries from that pet on.
+async def run_recommendation_job(job_id: int, last_pet_id: int, processed: int, skipped: int):
+    await run_with_db(update_recommendation_job, job_id, status="running", failed=0, error=None)
+    try:
+        while True:
+            pets = await run_with_db(get_pets_chunk, last_pet_id, RECOMMENDATIONS_JOB_CHUNK)
+            if not pets:
+                break
+            result = await fill_recommendations(pets)
+            first_failed = min(result.failed, default=None)
+            done = [pet_id for pet_id, _, _ in pets if first_failed is None or pet_id < first_failed]
+            if done:
+                last_pet_id = done[-1]
+            processed += len(done)
+            skipped += sum(1 for pet_id in result.skipped if pet_id <= last_pet_id)
+            await run_with_db(
+                update_recommendation_job, job_id,
+                last_pet_id=last_pet_id, processed=processed, skipped=skipped
+            )
+            if first_failed is not None:
+                await run_with_db(
+                    update_recommendation_job, job_id, status="failed", failed=len(result.failed),
+                    error=f"no recommendation for {len(result.failed)} pets, resume retries from pet {first_failed}"
+                )
+                return
+    except Exception as exc:
+        logger.exception("recommendation job %s failed", job_id)
+        await run_with_db(update_recommendation_job, job_id, status="failed", error=str(exc))
+        return
+    await run_with_db(update_recommendation_job, job_id, status="done")
+
+
+def start_recommendation_job(job_id: int, last_pet_id: int = 0, processed: int = 0, skipped: int = 0):
+    task = _tasks.get(job_id)
+    if task is not None and not task.done():
+        return task
+    task = asyncio.get_running_loop().create_task(
+        run_recommendation_job(job_id, last_pet_id, processed, skipped), context=detached_context()
+    )
+    _tasks[job_id] = task
+    task.add_done_callback(lambda _: _tasks.pop(job_id, None))
+    return task
+
+
+def is_job_active(job_id: int):
+    task = _tasks.get(job_id)
+    return task is not None and not task.done()
+
+
+async def resume_recommendation_jobs():
+    job_ids = await run_with_db(claim_stale_recommendation_jobs, RECOMMENDATIONS_JOB_STALE_AFTER)
+    for job_id in job_ids:
+        job = await run_with_db(get_recommendation_job, job_id)
+        logger.info("resuming recommendation job %s after pet %s", job_id, job.last_pet_id)
+        start_recommendation_job(job_id, job.last_pet_id, job.processed, job.skipped)
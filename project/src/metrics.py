@@ -0,0 +1,243 @@
+import bisect
+import fcntl
+import json
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from sqlalchemy import event
+from .config import METRICS_DIR, METRICS_FLUSH_INTERVAL
+
+# Histograms live in a plain dict per process. Every worker writes a snapshot
+# of its own series to METRICS_DIR at most once per METRICS_FLUSH_INTERVAL,
+# and /metrics merges the snapshots of all workers (snapshots of dead workers
+# are folded into one archive so the counters never go backwards).
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+ARCHIVE = "archive.json"
+
+_histograms = {}
+_lock = Lock()
+_snapshot = (None, None)
+_flushed_at = 0.0
+_request_sql = ContextVar("request_sql", default=None)
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labels, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.series = {}
+        _histograms[name] = self
+
+    # values holds the per-bucket counts (the last one is +Inf), then sum and
+    # count; the lock only guards adding a series, since every observation
+    # comes from the event loop thread
+    def observe(self, value: float, *labels):
+        values = self.series.get(labels)
+        if values is None:
+            with _lock:
+                values = self.series.setdefault(labels, [0] * (len(self.buckets) + 3))
+        values[bisect.bisect_left(self.buckets, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time spent handling a request, by route template.",
+    ("method", "route", "status"), LATENCY_BUCKETS,
+)
+REQUEST_SQL_STATEMENTS = Histogram(
+    "http_request_sql_statements", "SQL statements executed while handling a request.",
+    ("method", "route"), COUNT_BUCKETS,
+)
+REQUEST_SQL_DURATION = Histogram(
+    "http_request_sql_duration_seconds", "Time spent in SQL statements while handling a request.",
+    ("method", "route"), LATENCY_BUCKETS,
+)
+OPENAI_DURATION = Histogram(
+    "openai_request_duration_seconds", "Duration of OpenAI API calls.",
+    ("operation", "outcome"), LATENCY_BUCKETS,
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _request_sql.get() is not None:
+        conn.info["metrics_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_sql.get()
+    started = conn.info.pop("metrics_started", None)
+    if stats is not None and started is not None:
+        stats[0] += 1
+        stats[1] += time.perf_counter() - started
+
+
+def instrument_engine(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def openai_call(operation: str):
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        OPENAI_DURATION.observe(time.perf_counter() - started, operation, outcome)
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = [0, 0.0]
+        token = _request_sql.set(stats)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_sql.reset(token)
+            route = scope.get("route")
+            # unmatched paths share one label so scanners cannot blow up the series count
+            path = route.path if route is not None else "unmatched"
+            method = scope["method"]
+            REQUEST_DURATION.observe(elapsed, method, path, str(status))
+            REQUEST_SQL_STATEMENTS.observe(stats[0], method, path)
+            REQUEST_SQL_DURATION.observe(stats[1], method, path)
+            if time.monotonic() - _flushed_at >= METRICS_FLUSH_INTERVAL:
+                flush_metrics()
+
+
+def _write_json(path: str, data):
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as file:
+        json.dump(data, file)
+    os.replace(temporary, path)
+
+
+# the snapshot is named by pid and start time, and worked out lazily so a
+# worker forked from a preloaded master does not share the master's file
+def _snapshot_path():
+    global _snapshot
+    pid, path = _snapshot
+    if pid != os.getpid():
+        with _lock:
+            if pid is not None:
+                for histogram in _histograms.values():
+                    histogram.series.clear()
+            _snapshot = pid, path = os.getpid(), os.path.join(METRICS_DIR, f"{os.getpid()}-{time.time_ns()}.json")
+    return path
+
+
+def flush_metrics():
+    global _flushed_at
+    _flushed_at = time.monotonic()
+    path = _snapshot_path()
+    with _lock:
+        data = [
+            [name, list(labels), list(values)]
+            for name, histogram in _histograms.items() for labels, values in histogram.series.items()
+        ]
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    _write_json(path, data)
+
+
+def _is_alive(snapshot: str):
+    try:
+        os.kill(int(snapshot.split("-", 1)[0]), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        pass
+    return True
+
+
+def _merge(merged: dict, data):
+    for name, labels, values in data:
+        key = (name, tuple(labels))
+        total = merged.get(key)
+        if total is None:
+            merged[key] = list(values)
+        else:
+            for index, value in enumerate(values):
+                total[index] += value
+
+
+def _read(path: str):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return []
+
+
+def collect_metrics():
+    flush_metrics()
+    merged = {}
+    with open(os.path.join(METRICS_DIR, ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        archive = _read(os.path.join(METRICS_DIR, ARCHIVE))
+        dead = [
+            name for name in os.listdir(METRICS_DIR)
+            if name.endswith(".json") and name != ARCHIVE and not _is_alive(name)
+        ]
+        if dead:
+            for name in dead:
+                archive.extend(_read(os.path.join(METRICS_DIR, name)))
+            _merge(merged, archive)
+            _write_json(os.path.join(METRICS_DIR, ARCHIVE), [[name, list(labels), values] for (name, labels), values in merged.items()])
+            for name in dead:
+                os.remove(os.path.join(METRICS_DIR, name))
+        else:
+            _merge(merged, archive)
+        for name in os.listdir(METRICS_DIR):
+            if name.endswith(".json") and name != ARCHIVE:
+                _merge(merged, _read(os.path.join(METRICS_DIR, name)))
+    return merged
+
+
+def _escape(value: str):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_metrics():
+    merged = collect_metrics()
+    lines = []
+    for name, histogram in _histograms.items():
+        lines.append(f"# HELP {name} {histogram.documentation}")
+        lines.append(f"# TYPE {name} histogram")
+        for (series, labels), values in sorted(merged.items()):
+            if series != name:
+                continue
+            pairs = ",".join(f'{label}="{_escape(value)}"' for label, value in zip(histogram.labels, labels))
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + ("+Inf",), values):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{pairs},le="{bound}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{pairs}}} {_format(values[-2])}")
+            lines.append(f"{name}_count{{{pairs}}} {values[-1]}")
+    return "\n".join(lines) + "\n"
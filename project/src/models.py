@@ -1,12 +1,10 @@
 from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
 from sqlalchemy.orm import relationship
 from .database import Base
-from passlib.context import CryptContext
-from sqlalchemy import Table, Column, Integer, ForeignKey, Enum
+from .hashing import hash_password, verify_password
+from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint, Index
 from .database import Base
 
-password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 class User(Base):
     __tablename__ = "users"
@@ -18,10 +16,10 @@ class User(Base):
     pets = relationship("Pet", back_populates="owner", cascade="all, delete-orphan")
 
     def set_password(self, password: str):
-        self.password = password_context.hash(password)
+        self.password = hash_password(password)
 
     def check_password(self, password: str):
-        return password_context.verify(password, self.password)
+        return verify_password(password, self.password)[0]
 
 
 class Breed(Base):
@@ -30,6 +28,21 @@ class Breed(Base):
     name = Column(String, index=True)
 
     animals = relationship("Pet", back_populates="breed", cascade="all, delete-orphan")
+    cached_recommendations = relationship("BreedRecommendation", back_populates="breed", cascade="all, delete-orphan")
+
+
+class BreedRecommendation(Base):
+    __tablename__ = "breed_recommendations"
+    id = Column(Integer, primary_key=True, index=True)
+    breed_id = Column(Integer, ForeignKey("breeds.id"))
+    age = Column(Integer)
+    prompt_version = Column(Integer)
+    text = Column(String)
+    created_at = Column(DateTime, index=True)
+
+    breed = relationship("Breed", back_populates="cached_recommendations")
+
+    __table_args__ = (UniqueConstraint("breed_id", "age", "prompt_version"),)
 
 class Pet(Base):
     __tablename__ = "pets"
@@ -40,11 +53,29 @@ class Pet(Base):
     breed_id = Column(Integer, ForeignKey("breeds.id"))
     owner_id = Column(Integer, ForeignKey("users.id"))
 
-    breed = relationship("Breed", back_populates="animals")
+    breed = relationship("Breed", back_populates="animals", lazy="joined")
     owner = relationship("User", back_populates="pets")
     appointments = relationship("Appointment", back_populates="pet", cascade="all, delete-orphan")
     medicine_takes = relationship("MedicineTake", back_populates="pet", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_pets_owner_id_id", "owner_id", "id"),
+        Index("ix_pets_breed_id_id", "breed_id", "id"),
+    )
+
+class RecommendationJob(Base):
+    __tablename__ = "recommendation_jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String, default="pending")
+    total = Column(Integer, default=0)
+    processed = Column(Integer, default=0)
+    last_pet_id = Column(Integer, default=0)
+    failed = Column(Integer, nullable=False, default=0, server_default="0")
+    skipped = Column(Integer, nullable=False, default=0, server_default="0")
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+
 class Appointment(Base):
     __tablename__ = "appointments"
     id = Column(Integer, primary_key=True, index=True)
@@ -60,12 +91,19 @@ class Appointment(Base):
     conclusion_status = Column(String, default="pending")
     conclusion = Column(String, nullable=True)
 
+    __table_args__ = (
+        Index("ix_appointments_scheduled_at_id", "scheduled_at", "id"),
+        Index("ix_appointments_pet_id_scheduled_at", "pet_id", "scheduled_at", "id"),
+        Index("ix_appointments_clinic_id_scheduled_at", "clinic_id", "scheduled_at", "id"),
+    )
+
 class VeterinaryClinic(Base):
     __tablename__ = "veterinary_clinics"
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
     address = Column(String)
     phone = Column(String)
+    slot_minutes = Column(Integer, nullable=False, default=30, server_default="30")
 
     appointments = relationship("Appointment", back_populates="clinic")
 
@@ -85,7 +123,12 @@ class Analysis(Base):
     analysis_type_id = Column(Integer, ForeignKey("analysis_types.id"))
 
     appointment = relationship("Appointment", back_populates="analyses")
-    analysis_type = relationship("AnalysisType", back_populates="analyses")
+    analysis_type = relationship("AnalysisType", back_populates="analyses", lazy="joined")
+
+    __table_args__ = (
+        Index("ix_analyses_appointment_id_id", "appointment_id", "id"),
+        Index("ix_analyses_analysis_type_id_id", "analysis_type_id", "id"),
+    )
 
 
 class ProcedureType(Base):
@@ -99,6 +142,7 @@ class Vaccine(Base):
     name = Column(String)
     manufacturer = Column(String)
     type = Column(String)
+    interval_days = Column(Integer, nullable=True)
 
     vaccinations = relationship("Vaccination", back_populates="vaccine", cascade="all, delete-orphan")
 
@@ -110,9 +154,16 @@ class Vaccination(Base):
     vaccine_id = Column(Integer, ForeignKey("vaccines.id"))
     pet_id = Column(Integer, ForeignKey("pets.id"))
 
-    vaccine = relationship("Vaccine", back_populates="vaccinations")
+    vaccine = relationship("Vaccine", back_populates="vaccinations", lazy="joined")
     appointment = relationship("Appointment", back_populates="vaccinations")
 
+    __table_args__ = (
+        Index("ix_vaccinations_appointment_id_id", "appointment_id", "id"),
+        Index("ix_vaccinations_pet_id_id", "pet_id", "id"),
+        Index("ix_vaccinations_vaccine_id_id", "vaccine_id", "id"),
+        Index("ix_vaccinations_vaccine_id_pet_id", "vaccine_id", "pet_id", "appointment_id"),
+    )
+
 
 class Medicine(Base):
     __tablename__ = "medicines"
@@ -131,4 +182,11 @@ class MedicineTake(Base):
     datetime = Column(DateTime)
 
     medicine = relationship("Medicine", back_populates="medicine_takes")
-    pet = relationship("Pet", back_populates="medicine_takes")
\ No newline at end of file
+    pet = relationship("Pet", back_populates="medicine_takes")
+
+    __table_args__ = (
+        Index("ix_medicine_takes_datetime_id", "datetime", "id"),
+        Index("ix_medicine_takes_pet_id_datetime", "pet_id", "datetime", "id"),
+        Index("ix_medicine_takes_pet_id_medicine_id_datetime", "pet_id", "medicine_id", "datetime"),
+        Index("ix_medicine_takes_medicine_id_datetime", "medicine_id", "datetime"),
+    )
@@ -0,0 +1,109 @@
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from sqlalchemy import event
+from .config import QUERY_BUDGET_MODE, QUERY_BUDGET_DEFAULT, QUERY_REPEAT_LIMIT
+
+# Opt-in (QUERY_BUDGET_MODE=log|raise) query accounting for development and
+# tests. Statements are grouped by shape, i.e. their SQL with whitespace and
+# IN-list lengths normalised, so a lazy load repeated per row of a list shows
+# up as one shape executed many times.
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r"\((?:\?|%\(\w+\)s|\$\d+)(?:, (?:\?|%\(\w+\)s|\$\d+))*\)")
+_SPACE = re.compile(r"\s+")
+_active = ContextVar("query_log", default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryLog:
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.shapes = Counter()
+
+    @property
+    def count(self):
+        return sum(self.shapes.values())
+
+    def repeated(self, limit: int):
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= limit]
+
+    def problems(self, budget: int, repeat_limit: int):
+        found = []
+        if self.count > budget:
+            found.append(f"{self.count} queries, budget {budget}")
+        for shape, count in self.repeated(repeat_limit):
+            found.append(f"{count}x {shape[:200]}")
+        return found
+
+
+def statement_shape(statement: str):
+    return _IN_LIST.sub("(?)", _SPACE.sub(" ", statement).strip())
+
+
+def _record(conn, cursor, statement, parameters, context, executemany):
+    log = _active.get()
+    if log is None:
+        return
+    shape = statement_shape(statement)
+    while log is not None:
+        log.shapes[shape] += 1
+        log = log.parent
+
+
+def watch_queries(engine):
+    event.listen(engine, "before_cursor_execute", _record)
+
+
+# Counts the statements run inside the block (including those of requests
+# served inside it), e.g. in a test: with count_queries() as log: ...; log.count
+@contextmanager
+def count_queries():
+    log = QueryLog(_active.get())
+    token = _active.set(log)
+    try:
+        yield log
+    finally:
+        _active.reset(token)
+
+
+# Tasks that outlive the request that started them (jobs, shared LLM calls)
+# run in this context, so their statements are not charged to that request.
+def detached_context():
+    context = copy_context()
+    context.run(_active.set, None)
+    return context
+
+
+# Overrides QUERY_BUDGET_DEFAULT for one endpoint; put it under the route decorator.
+def query_budget(limit: int):
+    def decorate(endpoint):
+        endpoint.query_budget = limit
+        return endpoint
+    return decorate
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        with count_queries() as log:
+            await self.app(scope, receive, send)
+        budget = getattr(scope.get("endpoint"), "query_budget", QUERY_BUDGET_DEFAULT)
+        problems = log.problems(budget, QUERY_REPEAT_LIMIT)
+        if not problems:
+            return
+        route = scope.get("route")
+        message = f"{scope['method']} {route.path if route is not None else scope['path']}: " + "; ".join(problems)
+        if QUERY_BUDGET_MODE == "raise":
+            raise QueryBudgetExceeded(message)
+        logger.warning("query budget: %s", message)
@@ -0,0 +1,208 @@
+import asyncio
+import json
+import os
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from .cache import TTLCache
+from .config import (
+    RECOMMENDATIONS_MODEL, RECOMMENDATIONS_PROMPT_VERSION, RECOMMENDATIONS_CACHE_SIZE,
+    RECOMMENDATIONS_CACHE_TTL, RECOMMENDATIONS_CACHE_MAX_ROWS, RECOMMENDATIONS_EVICT_EVERY, RECOMMENDATIONS_CONCURRENCY,
+    RECOMMENDATIONS_TIMEOUT, OPENAI_BASE_URL
+)
+from .catalog import catalog_version
+from .database import run_with_db
+from .metrics import openai_call
+from .query_budget import detached_context
+from .repository import (
+    get_recommendation_context, save_breed_recommendation, evict_breed_recommendations, delete_breed_recommendations
+)
+
+cache = TTLCache(RECOMMENDATIONS_CACHE_SIZE, RECOMMENDATIONS_CACHE_TTL)
+_aiclient = None
+_semaphore = None
+_inflight = {}
+_stores = 0
+
+
+# the openai package takes a large share of the app's import time, so it is
+# only imported with the first client
+def get_aiclient():
+    global _aiclient
+    if _aiclient is None:
+        from openai import AsyncOpenAI
+        _aiclient = AsyncOpenAI(
+            api_key=os.environ.get("OPENAI_KEY"),
+            base_url=OPENAI_BASE_URL,
+            timeout=RECOMMENDATIONS_TIMEOUT,
+            max_retries=0,
+        )
+    return _aiclient
+
+
+# OpenAIError also covers a client that cannot be built (no API key)
+def api_error():
+    from openai import OpenAIError
+    return OpenAIError
+
+
+def get_semaphore():
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(RECOMMENDATIONS_CONCURRENCY)
+    return _semaphore
+
+
+def build_prompt(breed_name: str, age: int):
+    return f"""
+    ты специалист в области ветеринарии, занимающийся лечением и сопровождением
+    породистых собак, твоя задача давать рекомендации по питанию для домашних собак.
+    тебе передаются данные о возрасте, породе.
+    предоставь краткие рекомендации по уходу и питанию за этой собакой, не более 350 символов, на английском языке:
+    порода: {breed_name}
+    возраст(лет): {age}
+    """
+
+
+# The cache is per worker, so its keys carry the breeds catalog version: a breed
+# changed through any worker bumps it and every worker's old entries miss.
+def cache_key(breed_id: int, age: int):
+    return (breed_id, age, RECOMMENDATIONS_PROMPT_VERSION, catalog_version("breeds"))
+
+
+async def generate_pet_recommendation(age: int, breed_name: str):
+    async with get_semaphore():
+        with openai_call("responses.create"):
+            response = await get_aiclient().responses.create(model=RECOMMENDATIONS_MODEL, input=build_prompt(breed_name, age))
+    return response.output_text
+
+
+# the key is taken before the database is read, so text read or generated
+# for a breed that changed meanwhile lands under the old, unused version
+async def _lookup(key, breed_id: int, age: int):
+    breed_name, text = await run_with_db(
+        get_recommendation_context, breed_id, age, RECOMMENDATIONS_PROMPT_VERSION, RECOMMENDATIONS_CACHE_TTL
+    )
+    if text is not None:
+        cache.set(key, text)
+    return breed_name, text
+
+
+async def _store(key, breed_id: int, age: int, text: str):
+    global _stores
+    await run_with_db(save_breed_recommendation, breed_id, age, RECOMMENDATIONS_PROMPT_VERSION, text)
+    cache.set(key, text)
+    _stores += 1
+    if _stores % RECOMMENDATIONS_EVICT_EVERY == 0:
+        await run_with_db(evict_breed_recommendations, RECOMMENDATIONS_CACHE_MAX_ROWS)
+
+
+def _check_text(text: str):
+    # an empty answer is an error, never a recommendation to keep
+    if not text:
+        raise HTTPException(status_code=502, detail="Recommendation service returned no text")
+    return text
+
+
+async def _generate_and_store(key, breed_id: int, breed_name: str, age: int):
+    text = _check_text(await generate_pet_recommendation(age, breed_name))
+    await _store(key, breed_id, age, text)
+    return text
+
+
+async def _stream_and_store(key, breed_id: int, breed_name: str, age: int, deltas: asyncio.Queue):
+    parts = []
+    async with get_semaphore():
+        with openai_call("responses.stream"):
+            stream = await get_aiclient().responses.create(
+                model=RECOMMENDATIONS_MODEL, input=build_prompt(breed_name, age), stream=True
+            )
+            async for event in stream:
+                if event.type == "response.output_text.delta":
+                    parts.append(event.delta)
+                    deltas.put_nowait(event.delta)
+    text = _check_text("".join(parts))
+    await _store(key, breed_id, age, text)
+    return text
+
+
+def _forget(key, task: asyncio.Task):
+    _inflight.pop(key, None)
+    if not task.cancelled():
+        task.exception()
+
+
+def _start(key, coroutine):
+    task = asyncio.get_running_loop().create_task(coroutine, context=detached_context())
+    _inflight[key] = task
+    task.add_done_callback(lambda done: _forget(key, done))
+    return task
+
+
+async def fetch_recommendation(key, breed_id: int, breed_name: str, age: int):
+    task = _inflight.get(key)
+    if task is None:
+        task = _start(key, _generate_and_store(key, breed_id, breed_name, age))
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), RECOMMENDATIONS_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Recommendation service timed out")
+    except api_error():
+        raise HTTPException(status_code=502, detail="Recommendation service unavailable")
+
+
+async def recommend(breed_id: int, age: int):
+    key = cache_key(breed_id, age)
+    text = cache.get(key)
+    if text is not None:
+        return text
+    breed_name, text = await _lookup(key, breed_id, age)
+    if breed_name is None:
+        raise HTTPException(status_code=404, detail="Breed not found")
+    if text is not None:
+        return text
+    return await fetch_recommendation(key, breed_id, breed_name, age)
+
+
+def sse_event(event: str, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def stream_recommendation(breed_id: int, age: int):
+    key = cache_key(breed_id, age)
+    text = cache.get(key)
+    if text is None:
+        breed_name, text = await _lookup(key, breed_id, age)
+        if breed_name is None:
+            raise HTTPException(status_code=404, detail="Breed not found")
+    if text is None and key in _inflight:
+        text = await fetch_recommendation(key, breed_id, breed_name, age)
+    if text is not None:
+        async def one_shot():
+            yield sse_event("done", {"recommendations": text})
+        return one_shot()
+
+    # The LLM call runs as an _inflight task like fetch_recommendation's, so
+    # requests for the same key join it and a client that disconnects does not
+    # cancel it. The stream relays its deltas until the task is done.
+    deltas = asyncio.Queue()
+    task = _start(key, _stream_and_store(key, breed_id, breed_name, age, deltas))
+    task.add_done_callback(lambda done: deltas.put_nowait(None))
+
+    async def tokens():
+        while (delta := await deltas.get()) is not None:
+            yield sse_event("token", delta)
+        try:
+            result = task.result()
+        except HTTPException as exc:
+            yield sse_event("error", {"detail": exc.detail})
+            return
+        except api_error():
+            yield sse_event("error", {"detail": "Recommendation service unavailable"})
+            return
+        yield sse_event("done", {"recommendations": result})
+    return tokens()
+
+
+def invalidate_breed(db: Session, breed_id: int):
+    cache.discard_where(lambda key: key[0] == breed_id)
+    delete_breed_recommendations(db, breed_id)
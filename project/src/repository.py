@@ -1,9 +1,14 @@
-from sqlalchemy.orm import Session, joinedload
-from .models import User, Breed, Pet
-from .schemas import  UserCreate, BreedCreate, BreedGet, PetGet, PetCreate
-from .database import get_db
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException
+from sqlalchemy import event, and_, case, delete, false, func, insert, inspect, literal, null, or_, select, true, union_all, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import ONETOMANY, Session, selectinload
+from .models import User, Breed, Pet, BreedRecommendation, RecommendationJob
+from .schemas import  UserCreate, BreedCreate, PetCreate
+from .catalog import bump_catalog
+from .pagination import Page, PageParams, invalid_cursor, paginate_by_id, paginate_by_time
 from .models import (
-    VeterinaryClinic, Vaccine, Medicine, ProcedureType,
+    VeterinaryClinic, Vaccine, Medicine,
     Vaccination, MedicineTake, AnalysisType, Analysis, Appointment
 )
 from .schemas import (
@@ -11,15 +16,32 @@ from .schemas import (
     VaccinationCreate, MedicineTakeCreate, AnalysisTypeCreate, AnalysisCreate , AppointmentCreate
 )
 
-def create_user(db: Session, user_data: UserCreate):
+# datetimes are stored as naive UTC; an offset given in a request is converted
+def naive_utc(value: datetime):
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def utc_values(field: str):
+    def prepare(values: dict):
+        if values.get(field) is None:
+            return values
+        return {**values, field: naive_utc(values[field])}
+    return prepare
+
+def create_user(db: Session, user_data: UserCreate, password_hash: str = None):
     db_user = User(
         user_name=user_data.user_name,
         email=user_data.email,
         role=user_data.role
     )
-    db_user.set_password(user_data.password)
+    if password_hash is None:
+        db_user.set_password(user_data.password)
+    else:
+        db_user.password = password_hash
     db.add(db_user)
     db.commit()
+    bump_catalog("users")
     db.refresh(db_user)
     return db_user
 
@@ -30,6 +52,14 @@ def authenticate(db: Session, username: str, password: str):
         return None
     return user
 
+def update_user_password(db: Session, user_id: int, password_hash: str):
+    db.query(User).filter(User.id == user_id).update({User.password: password_hash})
+    db.commit()
+    bump_catalog("users")
+
+def get_user_snapshot_row(db: Session, email: str):
+    return db.query(User.id, User.email, User.role).filter(User.email == email).first()
+
 def get_user_by_email(db, email):
     user = db.query(User).filter(User.email == email).first()
     return user
@@ -46,12 +76,44 @@ def create_breed(db: Session, data: BreedCreate):
     return breed
 
 def get_breed(db: Session, breed_id: int):
-    breed = db.query(Breed).filter(id=breed_id).first()
+    breed = db.query(Breed).filter(Breed.id == breed_id).first()
     return breed
 
-def get_breeds(db: Session):
-    breeds = db.query(Breed).all()
-    return breeds
+def get_breeds(db: Session, params: PageParams):
+    return paginate_by_id(db.query(Breed), Breed.id, params)
+
+def get_breed_recommendation(db: Session, breed_id: int, age: int, prompt_version: int, ttl: int):
+    fresh_after = datetime.utcnow() - timedelta(seconds=ttl)
+    return db.query(BreedRecommendation).filter(
+        BreedRecommendation.breed_id == breed_id,
+        BreedRecommendation.age == age,
+        BreedRecommendation.prompt_version == prompt_version,
+        BreedRecommendation.created_at > fresh_after,
+    ).first()
+
+# An upsert, so workers that generated the same recommendation at the same time
+# all succeed (the last one wins) instead of one of them hitting the unique key.
+def save_breed_recommendation(db: Session, breed_id: int, age: int, prompt_version: int, text: str):
+    dialect_insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    statement = dialect_insert(BreedRecommendation).values(
+        breed_id=breed_id, age=age, prompt_version=prompt_version, text=text, created_at=datetime.utcnow()
+    )
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[BreedRecommendation.breed_id, BreedRecommendation.age, BreedRecommendation.prompt_version],
+        set_={"text": statement.excluded.text, "created_at": statement.excluded.created_at},
+    ))
+    db.commit()
+
+def evict_breed_recommendations(db: Session, max_rows: int):
+    excess = db.query(BreedRecommendation).count() - max_rows
+    if excess > 0:
+        oldest = db.query(BreedRecommendation.id).order_by(BreedRecommendation.created_at).limit(excess)
+        db.query(BreedRecommendation).filter(BreedRecommendation.id.in_(oldest.scalar_subquery())).delete(synchronize_session=False)
+    db.commit()
+
+def delete_breed_recommendations(db: Session, breed_id: int):
+    db.query(BreedRecommendation).filter(BreedRecommendation.breed_id == breed_id).delete(synchronize_session=False)
+    db.commit()
 
 def create_pet(db: Session, data: PetCreate, owner_id: int):
     pet = Pet(name=data.name, age=data.age, breed_id=data.breed_id, owner_id=owner_id)
@@ -60,15 +122,98 @@ def create_pet(db: Session, data: PetCreate, owner_id: int):
     db.refresh(pet)
     return pet
 
+# The list reads select columns and build the response dicts themselves, in
+# the field order of the Get schemas, so the routes can encode them directly.
+def pet_read_query(db: Session):
+    return db.query(
+        Pet.id, Pet.name, Pet.age, Pet.breed_id, Pet.owner_id,
+        Breed.id.label("breed_ref"), Breed.name.label("breed_name"), Pet.recommendations,
+    ).outerjoin(Breed, Breed.id == Pet.breed_id)
+
+def pet_row_to_dict(row):
+    return {
+        "id": row.id,
+        "name": row.name,
+        "age": row.age,
+        "breed_id": row.breed_id,
+        "owner_id": row.owner_id,
+        "breed": {"id": row.breed_ref, "name": row.breed_name} if row.breed_ref is not None else None,
+        "recommendations": row.recommendations,
+    }
+
+def get_pets(db: Session, params: PageParams, owner_id: int = None, breed_id: int = None):
+    query = pet_read_query(db)
+    if owner_id is not None:
+        query = query.filter(Pet.owner_id == owner_id)
+    if breed_id is not None:
+        query = query.filter(Pet.breed_id == breed_id)
+    page = paginate_by_id(query, Pet.id, params)
+    return Page([pet_row_to_dict(row) for row in page.items], page.next_cursor)
+
+def pet_update_values(values: dict):
+    changed = or_(Pet.age.is_distinct_from(values["age"]), Pet.breed_id.is_distinct_from(values["breed_id"]))
+    return {**values, "recommendations": case((changed, None), else_=Pet.recommendations)}
+
 def get_pet(db: Session, pet_id: int):
     return db.query(Pet).filter(Pet.id == pet_id).first()
 
+def get_recommendation_context(db: Session, breed_id: int, age: int, prompt_version: int, ttl: int):
+    breed = get_breed(db, breed_id)
+    if breed is None:
+        return None, None
+    record = get_breed_recommendation(db, breed_id, age, prompt_version, ttl)
+    return breed.name, record.text if record is not None else None
+
 def upptade_pet_recomendations(db: Session, pet: Pet, recommendations: str):
     db.query(Pet).filter(Pet.id == pet.id).update({Pet.recommendations: recommendations})
     db.commit()
     db.refresh(pet)
     return pet
 
+def get_pets_chunk(db: Session, after_id: int, limit: int):
+    return db.query(Pet.id, Pet.breed_id, Pet.age).filter(Pet.id > after_id).order_by(Pet.id).limit(limit).all()
+
+def get_pets_by_ids(db: Session, pet_ids):
+    return db.query(Pet.id, Pet.breed_id, Pet.age).filter(Pet.id.in_(pet_ids)).all()
+
+def bulk_update_pet_recommendations(db: Session, rows):
+    if rows:
+        db.execute(update(Pet), rows)
+    db.commit()
+
+def create_recommendation_job(db: Session):
+    now = datetime.utcnow()
+    job = RecommendationJob(status="pending", total=db.query(Pet).count(), processed=0, last_pet_id=0, failed=0, skipped=0, created_at=now, updated_at=now)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+def get_recommendation_job(db: Session, job_id: int):
+    return db.query(RecommendationJob).filter(RecommendationJob.id == job_id).first()
+
+def update_recommendation_job(db: Session, job_id: int, **values):
+    values["updated_at"] = datetime.utcnow()
+    db.query(RecommendationJob).filter(RecommendationJob.id == job_id).update(values)
+    db.commit()
+
+def claim_stale_recommendation_jobs(db: Session, stale_after: int):
+    stale_before = datetime.utcnow() - timedelta(seconds=stale_after)
+    candidates = db.query(RecommendationJob.id).filter(
+        RecommendationJob.status.in_(("pending", "running")),
+        RecommendationJob.updated_at < stale_before,
+    ).all()
+    claimed = []
+    for (job_id,) in candidates:
+        result = db.query(RecommendationJob).filter(
+            RecommendationJob.id == job_id,
+            RecommendationJob.updated_at < stale_before,
+        ).update({RecommendationJob.updated_at: datetime.utcnow()})
+        if result:
+            claimed.append(job_id)
+    db.commit()
+    return claimed
+
 def create_clinic(db, data: ClinicCreate):
     clinic = VeterinaryClinic(**data.dict())
     db.add(clinic)
@@ -76,8 +221,8 @@ def create_clinic(db, data: ClinicCreate):
     db.refresh(clinic)
     return clinic
 
-def get_clinics(db):
-    return db.query(VeterinaryClinic).all()
+def get_clinics(db, params: PageParams):
+    return paginate_by_id(db.query(VeterinaryClinic), VeterinaryClinic.id, params)
 
 def create_vaccine(db, data: VaccineCreate):
     vaccine = Vaccine(**data.dict())
@@ -86,8 +231,8 @@ def create_vaccine(db, data: VaccineCreate):
     db.refresh(vaccine)
     return vaccine
 
-def get_vaccines(db):
-    return db.query(Vaccine).all()
+def get_vaccines(db, params: PageParams):
+    return paginate_by_id(db.query(Vaccine), Vaccine.id, params)
 
 def create_medicine(db, data: MedicineCreate):
     med = Medicine(**data.dict())
@@ -96,8 +241,8 @@ def create_medicine(db, data: MedicineCreate):
     db.refresh(med)
     return med
 
-def get_medicines(db):
-    return db.query(Medicine).all()
+def get_medicines(db, params: PageParams):
+    return paginate_by_id(db.query(Medicine), Medicine.id, params)
 
 def create_vaccination(db, data: VaccinationCreate):
     record = Vaccination(**data.dict())
@@ -106,78 +251,319 @@ def create_vaccination(db, data: VaccinationCreate):
     db.refresh(record)
     return record
 
-def get_vaccinations(db):
-    return db.query(Vaccination).options(joinedload(Vaccination.vaccine)).all()
+def vaccination_row_to_dict(row):
+    vaccine = None
+    if row.vaccine_ref is not None:
+        vaccine = {
+            "name": row.vaccine_name,
+            "type": row.vaccine_type,
+            "manufacturer": row.vaccine_manufacturer,
+            "interval_days": row.vaccine_interval_days,
+            "id": row.vaccine_ref,
+        }
+    return {
+        "vaccine_id": row.vaccine_id,
+        "pet_id": row.pet_id,
+        "appointment_id": row.appointment_id,
+        "id": row.id,
+        "vaccine": vaccine,
+    }
+
+def get_vaccinations(db, params: PageParams, pet_id: int = None, appointment_id: int = None, vaccine_id: int = None):
+    query = db.query(
+        Vaccination.vaccine_id, Vaccination.pet_id, Vaccination.appointment_id, Vaccination.id,
+        Vaccine.id.label("vaccine_ref"), Vaccine.name.label("vaccine_name"), Vaccine.type.label("vaccine_type"),
+        Vaccine.manufacturer.label("vaccine_manufacturer"), Vaccine.interval_days.label("vaccine_interval_days"),
+    ).outerjoin(Vaccine, Vaccine.id == Vaccination.vaccine_id)
+    if pet_id is not None:
+        query = query.filter(Vaccination.pet_id == pet_id)
+    if appointment_id is not None:
+        query = query.filter(Vaccination.appointment_id == appointment_id)
+    if vaccine_id is not None:
+        query = query.filter(Vaccination.vaccine_id == vaccine_id)
+    page = paginate_by_id(query, Vaccination.id, params)
+    return Page([vaccination_row_to_dict(row) for row in page.items], page.next_cursor)
+
+VACCINATION_STATUSES = ("overdue", "due", "never_vaccinated")
+
+def get_vaccination_report(db: Session, now: datetime, within_days: int, limit: int,
+                           vaccine_id: int = None, clinic_id: int = None, breed_id: int = None):
+    schedule = select(Vaccine.id, Vaccine.interval_days).where(Vaccine.interval_days.is_not(None))
+    if vaccine_id is not None:
+        schedule = schedule.where(Vaccine.id == vaccine_id)
+    intervals = dict(db.execute(schedule).all())
+    report = {status: [] for status in VACCINATION_STATUSES}
+    report.update({f"{status}_total": 0 for status in VACCINATION_STATUSES})
+    if not intervals:
+        return report
+
+    def pet_filters(pet_id):
+        filters = []
+        if breed_id is not None:
+            filters.append(pet_id.in_(select(Pet.id).where(Pet.breed_id == breed_id)))
+        if clinic_id is not None:
+            filters.append(pet_id.in_(select(Appointment.pet_id).where(Appointment.clinic_id == clinic_id)))
+        return filters
+
+    # the cut-offs differ per vaccine; they are worked out here so the SQL
+    # needs no dialect-specific date arithmetic
+    def statuses(vaccine, last_at):
+        overdue_before = case({v: now - timedelta(days=days) for v, days in intervals.items()}, value=vaccine)
+        due_before = case({v: now + timedelta(days=within_days - days) for v, days in intervals.items()}, value=vaccine)
+        return {
+            "overdue": last_at < overdue_before,
+            "due": and_(last_at >= overdue_before, last_at < due_before),
+            "never_vaccinated": last_at.is_(None),
+        }
+
+    # each list walks vaccines x pets in (vaccine_id, pet_id) order, looking up
+    # the pair's last vaccination, so it stops after `limit` matches
+    last_at = select(func.max(Appointment.scheduled_at)).select_from(Vaccination).join(
+        Appointment, Appointment.id == Vaccination.appointment_id
+    ).where(Vaccination.pet_id == Pet.id, Vaccination.vaccine_id == Vaccine.id).scalar_subquery()
+    candidates = select(
+        Pet.id.label("pet_id"), Pet.name.label("pet_name"), Pet.breed_id, Vaccine.id.label("vaccine_id"),
+        last_at.label("last_at"),
+    ).select_from(Vaccine).join(Pet, true()).where(Vaccine.id.in_(intervals), *pet_filters(Pet.id)).subquery()
+    lists = union_all(*(
+        select(select(literal(status).label("status"), candidates).where(condition).order_by(
+            candidates.c.vaccine_id, candidates.c.pet_id
+        ).limit(limit).subquery())
+        for status, condition in statuses(candidates.c.vaccine_id, candidates.c.last_at).items()
+    )).subquery()
+
+    # the totals count the vaccinated pairs; every other pet x vaccine pair
+    # has never been vaccinated
+    pairs = select(
+        Vaccination.vaccine_id, func.max(Appointment.scheduled_at).label("last_at")
+    ).join(Appointment, Appointment.id == Vaccination.appointment_id).where(
+        Vaccination.vaccine_id.in_(intervals), Appointment.scheduled_at.is_not(None), *pet_filters(Vaccination.pet_id)
+    ).group_by(Vaccination.vaccine_id, Vaccination.pet_id).subquery()
+    pet_count = select(func.count()).select_from(Pet).where(*pet_filters(Pet.id)).scalar_subquery()
+    pair_statuses = statuses(pairs.c.vaccine_id, pairs.c.last_at)
+    totals = select(
+        func.coalesce(func.sum(case((pair_statuses["overdue"], 1), else_=0)), 0).label("overdue_total"),
+        func.coalesce(func.sum(case((pair_statuses["due"], 1), else_=0)), 0).label("due_total"),
+        (pet_count * len(intervals) - func.count()).label("never_vaccinated_total"),
+    ).subquery()
+
+    rows = db.execute(select(totals, lists).select_from(totals.outerjoin(lists, true()))).mappings().all()
+    report.update({f"{status}_total": rows[0][f"{status}_total"] for status in VACCINATION_STATUSES})
+    for row in sorted((row for row in rows if row["status"] is not None), key=lambda row: (row["vaccine_id"], row["pet_id"])):
+        last_at = row["last_at"]
+        report[row["status"]].append({
+            "pet_id": row["pet_id"],
+            "pet_name": row["pet_name"],
+            "breed_id": row["breed_id"],
+            "vaccine_id": row["vaccine_id"],
+            "last_vaccinated_at": last_at,
+            "due_at": last_at + timedelta(days=intervals[row["vaccine_id"]]) if last_at is not None else None,
+        })
+    return report
 
 def create_medicine_take(db, data: MedicineTakeCreate):
-    record = MedicineTake(**data.dict())
+    record = MedicineTake(**utc_values("datetime")(data.dict()))
     db.add(record)
     db.commit()
     db.refresh(record)
     return record
 
-def get_medicine_takes(db):
-    return db.query(MedicineTake).all()
+def get_medicine_takes(db, params: PageParams, pet_id: int = None, medicine_id: int = None, since: datetime = None, until: datetime = None):
+    query = db.query(MedicineTake.pet_id, MedicineTake.medicine_id, MedicineTake.datetime, MedicineTake.id)
+    if pet_id is not None:
+        query = query.filter(MedicineTake.pet_id == pet_id)
+    if medicine_id is not None:
+        query = query.filter(MedicineTake.medicine_id == medicine_id)
+    query = between(query, MedicineTake.datetime, since, until)
+    page = paginate_by_time(query, MedicineTake.datetime, MedicineTake.id, params, lambda take: (take.datetime, take.id))
+    return Page([dict(row._mapping) for row in page.items], page.next_cursor)
+
+def get_medicine_periods(db: Session):
+    return dict(db.execute(select(Medicine.id, Medicine.period_hours).where(Medicine.period_hours > 0)).all())
+
+def get_last_medicine_takes(db: Session, since: datetime):
+    return db.execute(
+        select(MedicineTake.pet_id, MedicineTake.medicine_id, func.max(MedicineTake.datetime))
+        .where(MedicineTake.datetime >= since)
+        .group_by(MedicineTake.pet_id, MedicineTake.medicine_id)
+    ).all()
 
-def create_appointment(db, data: AppointmentCreate):
-    record = Appointment(**data.dict())
-    db.add(record)
-    db.commit()
-    db.refresh(record)
-    return record
+def get_last_medicine_take_id(db: Session):
+    return db.scalar(select(func.max(MedicineTake.id))) or 0
 
-def get_appointments(db):
-    appointments = db.query(Appointment).options(
-        joinedload(Appointment.pet),
-        joinedload(Appointment.vaccinations).joinedload(Vaccination.vaccine),
-        joinedload(Appointment.analyses).joinedload(Analysis.analysis_type)
+def get_medicine_takes_after(db: Session, take_id: int):
+    return db.execute(
+        select(MedicineTake.id, MedicineTake.pet_id, MedicineTake.medicine_id, MedicineTake.datetime)
+        .where(MedicineTake.id > take_id).order_by(MedicineTake.id)
     ).all()
 
-    result = []
-    for appt in appointments:
-        procedure = None
-        if appt.vaccinations:
-            procedure = {
-                "type": "Vaccination",
-                "name": appt.vaccinations[0].vaccine.name
-            }
-        elif appt.analyses:
-            procedure = {
-                "type": "Analysis",
-                "name": appt.analyses[0].analysis_type.name
-            }
-
-        result.append({
-            "id": appt.id,
-            "pet_id": appt.pet_id,
-            "pet_name": appt.pet.name if appt.pet else "Unknown",
-            "scheduled_at": appt.scheduled_at,
-            "clinic_id": appt.clinic_id,
-            "status": appt.status,
-            "procedure": procedure,
-            "conclusion_status": appt.conclusion_status,
-            "conclusion": appt.conclusion
-
-        })
-    return result
+def lock_clinic(db: Session, clinic_id: int):
+    # a no-op UPDATE takes the clinic's row lock (the database write lock on
+    # SQLite) so concurrent bookings for the same clinic check and insert in turn
+    slot_minutes = db.scalar(
+        update(VeterinaryClinic).where(VeterinaryClinic.id == clinic_id)
+        .values(slot_minutes=VeterinaryClinic.slot_minutes).returning(VeterinaryClinic.slot_minutes)
+    )
+    if slot_minutes is None:
+        raise HTTPException(status_code=404, detail="Clinic not found")
+    return timedelta(minutes=slot_minutes)
+
+def get_clinic_bookings(db: Session, clinic_id: int, since: datetime, until: datetime, exclude_id: int = None):
+    query = (
+        select(Appointment.scheduled_at)
+        .where(Appointment.clinic_id == clinic_id, Appointment.scheduled_at > since, Appointment.scheduled_at < until)
+        .order_by(Appointment.scheduled_at)
+    )
+    if exclude_id is not None:
+        query = query.where(Appointment.id != exclude_id)
+    return db.scalars(query).all()
 
+def check_slot(db: Session, clinic_id: int, scheduled_at: datetime, exclude_id: int = None):
+    slot = lock_clinic(db, clinic_id)
+    if get_clinic_bookings(db, clinic_id, scheduled_at - slot, scheduled_at + slot, exclude_id):
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Slot is already booked")
 
+def create_appointment(db, data: AppointmentCreate):
+    values = utc_values("scheduled_at")(data.dict())
+    check_slot(db, values["clinic_id"], values["scheduled_at"])
+    record = Appointment(**values)
+    db.add(record)
+    db.flush()
+    appointment_id = record.id
+    db.commit()
+    # read back like GET/PUT/PATCH, with pet_name and procedure filled in
+    return get_appointment(db, appointment_id)
+
+def appointment_read_columns():
+    first_vaccine = select(Vaccine.name).join(Vaccination, Vaccination.vaccine_id == Vaccine.id).where(
+        Vaccination.appointment_id == Appointment.id
+    ).order_by(Vaccination.id).limit(1).scalar_subquery()
+    first_analysis = select(AnalysisType.name).join(Analysis, Analysis.analysis_type_id == AnalysisType.id).where(
+        Analysis.appointment_id == Appointment.id
+    ).order_by(Analysis.id).limit(1).scalar_subquery()
+    return (
+        Appointment.id,
+        Appointment.pet_id,
+        Pet.name.label("pet_name"),
+        Appointment.scheduled_at,
+        Appointment.clinic_id,
+        Appointment.status,
+        first_vaccine.label("vaccine_name"),
+        first_analysis.label("analysis_name"),
+        Appointment.conclusion_status,
+        Appointment.conclusion,
+    )
 
-def update_entity(db: Session, model, item_id: int, update_data):
-    db_item = db.query(model).filter(model.id == item_id).first()
-    if db_item is None:
+def appointment_read_query(db: Session):
+    return db.query(*appointment_read_columns()).outerjoin(Pet, Pet.id == Appointment.pet_id)
+
+def appointment_row_to_dict(row):
+    procedure = None
+    if row.vaccine_name is not None:
+        procedure = {"type": "Vaccination", "name": row.vaccine_name}
+    elif row.analysis_name is not None:
+        procedure = {"type": "Analysis", "name": row.analysis_name}
+    return {
+        "id": row.id,
+        "pet_id": row.pet_id,
+        "pet_name": row.pet_name if row.pet_name is not None else "Unknown",
+        "scheduled_at": row.scheduled_at,
+        "clinic_id": row.clinic_id,
+        "status": row.status,
+        "procedure": procedure,
+        "conclusion_status": row.conclusion_status,
+        "conclusion": row.conclusion,
+    }
+
+def get_appointments(db, params: PageParams, pet_id: int = None, clinic_id: int = None, status: str = None, since: datetime = None, until: datetime = None):
+    query = appointment_read_query(db)
+    if pet_id is not None:
+        query = query.filter(Appointment.pet_id == pet_id)
+    if clinic_id is not None:
+        query = query.filter(Appointment.clinic_id == clinic_id)
+    if status is not None:
+        query = query.filter(Appointment.status == status)
+    query = between(query, Appointment.scheduled_at, since, until)
+    page = paginate_by_time(query, Appointment.scheduled_at, Appointment.id, params, lambda row: (row.scheduled_at, row.id))
+    return Page([appointment_row_to_dict(row) for row in page.items], page.next_cursor)
+
+def get_appointment(db, appointment_id: int):
+    row = appointment_read_query(db).filter(Appointment.id == appointment_id).first()
+    return appointment_row_to_dict(row) if row is not None else None
+
+
+
+def eager_options(model):
+    return [selectinload(getattr(model, rel.key)) for rel in inspect(model).relationships if rel.lazy == "joined"]
+
+def check_appointment_update(db: Session, item_id: int, values: dict):
+    # a move to another time or clinic has to fit the target clinic's free slots
+    if "scheduled_at" not in values and "clinic_id" not in values:
+        return
+    if "scheduled_at" not in values or "clinic_id" not in values:
+        current = db.execute(select(Appointment.clinic_id, Appointment.scheduled_at).where(Appointment.id == item_id)).first()
+        if current is None:
+            raise HTTPException(status_code=404, detail="Appointment not found")
+        values = {**current._asdict(), **values}
+    if values["clinic_id"] is not None:
+        check_slot(db, values["clinic_id"], values["scheduled_at"], exclude_id=item_id)
+
+def update_entity(db: Session, model, item_id: int, update_data, read=None, check=None):
+    values = update_data if isinstance(update_data, dict) else update_data.dict()
+    if check is not None:
+        check(db, item_id, values)
+    if not values:
+        item = db.get(model, item_id)
+    elif read is not None:
+        item = db.execute(update(model.__table__).where(model.id == item_id).values(values).returning(model.id)).first()
+    else:
+        statement = update(model).where(model.id == item_id).values(values).returning(model)
+        item = db.scalars(statement.options(*eager_options(model))).first()
+    if item is None:
         raise HTTPException(status_code=404, detail=f"{model.__name__} not found")
-    for key, value in update_data.dict().items():
-        setattr(db_item, key, value)
     db.commit()
-    db.refresh(db_item)
-    return db_item
+    return read(db, item_id) if read is not None else item
+
+def delete_where(db: Session, model, condition):
+    # Mirrors the ORM cascades in set-based statements: children on a delete
+    # cascade go first, other one-to-many children get their foreign key nulled.
+    ids = select(model.id).where(condition)
+    for rel in inspect(model).relationships:
+        if rel.direction is not ONETOMANY:
+            continue
+        child = rel.mapper.class_
+        (_, remote), = rel.local_remote_pairs
+        if rel.cascade.delete:
+            delete_where(db, child, remote.in_(ids))
+        elif not rel.passive_deletes:
+            db.execute(update(child.__table__).where(remote.in_(ids)).values({remote.name: None}))
+    deleted = db.execute(delete(model.__table__).where(condition).returning(model.id)).all()
+    if deleted and model is MedicineTake:
+        # the dose schedules reload once the delete (of a pet, breed, medicine
+        # or the takes themselves) is committed
+        event.listen(db, "after_commit", lambda session: bump_catalog("medicine_takes"), once=True)
+    return deleted
+
+def get_existing_ids(db: Session, model, ids, chunk_size: int = 500):
+    ids = list(ids)
+    existing = set()
+    for start in range(0, len(ids), chunk_size):
+        existing.update(db.scalars(select(model.id).where(model.id.in_(ids[start:start + chunk_size]))))
+    return existing
+
+def insert_many(db: Session, model, rows):
+    if not rows:
+        return []
+    # SQLite can only keep RETURNING in parameter order by inserting one row per
+    # statement; writers there are serialized, so batched ids come out ascending.
+    if db.get_bind().dialect.name == "sqlite":
+        return sorted(db.scalars(insert(model).returning(model.id), rows))
+    return db.scalars(insert(model).returning(model.id, sort_by_parameter_order=True), rows).all()
 
 def delete_entity(db: Session, model, item_id: int):
-    db_item = db.query(model).filter(model.id == item_id).first()
-    if db_item is None:
+    if not delete_where(db, model, model.id == item_id):
         raise HTTPException(status_code=404, detail=f"{model.__name__} not found")
-    db.delete(db_item)
     db.commit()
     return {"detail": f"{model.__name__} deleted"}
 
@@ -188,8 +574,8 @@ def create_analysis_type(db: Session, data: AnalysisTypeCreate):
     db.refresh(record)
     return record
 
-def get_analysis_types(db: Session):
-    return db.query(AnalysisType).all()
+def get_analysis_types(db: Session, params: PageParams):
+    return paginate_by_id(db.query(AnalysisType), AnalysisType.id, params)
 
 def create_analysis(db: Session, data: AnalysisCreate):
     record = Analysis(**data.dict())
@@ -198,5 +584,154 @@ def create_analysis(db: Session, data: AnalysisCreate):
     db.refresh(record)
     return record
 
-def get_analyses(db: Session):
-    return db.query(Analysis).all()
+def analysis_row_to_dict(row):
+    analysis_type = None
+    if row.type_ref is not None:
+        analysis_type = {
+            "name": row.type_name,
+            "description": row.type_description,
+            "instructions": row.type_instructions,
+            "id": row.type_ref,
+        }
+    return {
+        "appointment_id": row.appointment_id,
+        "analysis_type_id": row.analysis_type_id,
+        "id": row.id,
+        "analysis_type": analysis_type,
+    }
+
+def get_analyses(db: Session, params: PageParams, appointment_id: int = None, analysis_type_id: int = None):
+    query = db.query(
+        Analysis.appointment_id, Analysis.analysis_type_id, Analysis.id,
+        AnalysisType.id.label("type_ref"), AnalysisType.name.label("type_name"),
+        AnalysisType.description.label("type_description"), AnalysisType.instructions.label("type_instructions"),
+    ).outerjoin(AnalysisType, AnalysisType.id == Analysis.analysis_type_id)
+    if appointment_id is not None:
+        query = query.filter(Analysis.appointment_id == appointment_id)
+    if analysis_type_id is not None:
+        query = query.filter(Analysis.analysis_type_id == analysis_type_id)
+    page = paginate_by_id(query, Analysis.id, params)
+    return Page([analysis_row_to_dict(row) for row in page.items], page.next_cursor)
+
+# the columns hold naive UTC, so bounds with an offset are converted first
+def between(statement, column, since: datetime = None, until: datetime = None):
+    if since is not None:
+        statement = statement.where(column >= naive_utc(since))
+    if until is not None:
+        statement = statement.where(column < naive_utc(until))
+    return statement
+
+def appointments_export(since: datetime = None, until: datetime = None):
+    statement = select(*appointment_read_columns()).outerjoin(Pet, Pet.id == Appointment.pet_id)
+    return between(statement, Appointment.scheduled_at, since, until).order_by(Appointment.scheduled_at, Appointment.id)
+
+def vaccinations_export(since: datetime = None, until: datetime = None):
+    statement = select(
+        Vaccination.id,
+        Vaccination.pet_id,
+        Vaccination.appointment_id,
+        Appointment.scheduled_at,
+        Vaccination.vaccine_id,
+        Vaccine.name.label("vaccine_name"),
+    ).select_from(Appointment).join(Vaccination, Vaccination.appointment_id == Appointment.id).outerjoin(
+        Vaccine, Vaccine.id == Vaccination.vaccine_id
+    )
+    statement = between(statement, Appointment.scheduled_at, since, until)
+    return statement.order_by(Appointment.scheduled_at, Appointment.id, Vaccination.id)
+
+def medicine_takes_export(since: datetime = None, until: datetime = None):
+    statement = select(
+        MedicineTake.id,
+        MedicineTake.pet_id,
+        MedicineTake.medicine_id,
+        Medicine.name.label("medicine_name"),
+        MedicineTake.datetime,
+    ).outerjoin(Medicine, Medicine.id == MedicineTake.medicine_id)
+    return between(statement, MedicineTake.datetime, since, until).order_by(MedicineTake.datetime, MedicineTake.id)
+
+TIMELINE_KINDS = ("appointment", "vaccination", "analysis", "medicine_take")
+
+def keyset_after(key, cursor):
+    # `key > cursor` for a (time, appointment, kind, id) sort key; plain values in
+    # `key` are the branch's constants and are compared here instead of in SQL, so
+    # every branch keeps a range condition on its own index
+    column, value = key[0], cursor[0]
+    rest = keyset_after(key[1:], cursor[1:]) if len(key) > 1 else false()
+    if isinstance(column, int):
+        if column == value:
+            return rest
+        return true() if column > value else false()
+    return or_(column > value, and_(column == value, rest))
+
+def timeline_branch(statement, key, cursor, limit: int):
+    if cursor is not None:
+        statement = statement.where(key[0] >= cursor[0], keyset_after(key, cursor))
+    columns = [column for column in key if not isinstance(column, int)]
+    return select(statement.order_by(*columns).limit(limit).subquery())
+
+def parse_timeline_cursor(cursor: str):
+    try:
+        raw_time, raw_appointment_id, raw_rank, raw_id = cursor.rsplit("_", 3)
+        return datetime.fromisoformat(raw_time), int(raw_appointment_id), int(raw_rank), int(raw_id)
+    except ValueError:
+        raise invalid_cursor()
+
+def get_pet_timeline(db: Session, pet_id: int, params: PageParams):
+    cursor = parse_timeline_cursor(params.cursor) if params.cursor is not None else None
+    limit = params.limit + 1
+    appointments = select(
+        literal("appointment").label("kind"),
+        Appointment.id,
+        Appointment.scheduled_at.label("at"),
+        Appointment.id.label("appointment_id"),
+        Appointment.clinic_id.label("ref_id"),
+        VeterinaryClinic.name,
+        Appointment.status,
+    ).outerjoin(VeterinaryClinic, VeterinaryClinic.id == Appointment.clinic_id).where(Appointment.pet_id == pet_id)
+    vaccinations = select(
+        literal("vaccination").label("kind"),
+        Vaccination.id,
+        Appointment.scheduled_at.label("at"),
+        Vaccination.appointment_id,
+        Vaccination.vaccine_id.label("ref_id"),
+        Vaccine.name,
+        null().label("status"),
+    ).select_from(Appointment).join(Vaccination, Vaccination.appointment_id == Appointment.id).outerjoin(
+        Vaccine, Vaccine.id == Vaccination.vaccine_id
+    ).where(Appointment.pet_id == pet_id)
+    analyses = select(
+        literal("analysis").label("kind"),
+        Analysis.id,
+        Appointment.scheduled_at.label("at"),
+        Analysis.appointment_id,
+        Analysis.analysis_type_id.label("ref_id"),
+        AnalysisType.name,
+        null().label("status"),
+    ).select_from(Appointment).join(Analysis, Analysis.appointment_id == Appointment.id).outerjoin(
+        AnalysisType, AnalysisType.id == Analysis.analysis_type_id
+    ).where(Appointment.pet_id == pet_id)
+    medicine_takes = select(
+        literal("medicine_take").label("kind"),
+        MedicineTake.id,
+        MedicineTake.datetime.label("at"),
+        null().label("appointment_id"),
+        MedicineTake.medicine_id.label("ref_id"),
+        Medicine.name,
+        null().label("status"),
+    ).outerjoin(Medicine, Medicine.id == MedicineTake.medicine_id).where(MedicineTake.pet_id == pet_id)
+
+    timeline = union_all(
+        timeline_branch(appointments, (Appointment.scheduled_at, Appointment.id, 0, Appointment.id), cursor, limit),
+        timeline_branch(vaccinations, (Appointment.scheduled_at, Appointment.id, 1, Vaccination.id), cursor, limit),
+        timeline_branch(analyses, (Appointment.scheduled_at, Appointment.id, 2, Analysis.id), cursor, limit),
+        timeline_branch(medicine_takes, (MedicineTake.datetime, 0, 3, MedicineTake.id), cursor, limit),
+    ).subquery()
+    rank = case({kind: index for index, kind in enumerate(TIMELINE_KINDS)}, value=timeline.c.kind)
+    statement = select(timeline).order_by(timeline.c.at, func.coalesce(timeline.c.appointment_id, 0), rank, timeline.c.id)
+    rows = [dict(row) for row in db.execute(statement.limit(limit)).mappings()]
+    if len(rows) <= params.limit:
+        return Page(rows, None)
+    rows = rows[:params.limit]
+    last = rows[-1]
+    rank = TIMELINE_KINDS.index(last["kind"])
+    return Page(rows, f"{last['at'].isoformat()}_{last['appointment_id'] or 0}_{rank}_{last['id']}")
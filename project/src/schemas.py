@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field
+from typing import Any, List, Literal, Optional
 from datetime import datetime
 
 class BaseUser(BaseModel):
@@ -57,6 +57,7 @@ class ClinicCreate(BaseModel):
     name: str
     address: str
     phone: str
+    slot_minutes: int = Field(30, gt=0, le=24 * 60)
 
 class ClinicGet(ClinicCreate):
     id: int
@@ -67,6 +68,7 @@ class VaccineCreate(BaseModel):
     name: str
     type: str
     manufacturer: str
+    interval_days: Optional[int] = Field(None, gt=0)
 
 class VaccineGet(VaccineCreate):
     id: int
@@ -101,7 +103,7 @@ class VaccinationGet(VaccinationCreate):
 class MedicineTakeCreate(BaseModel):
     pet_id: int
     medicine_id: int
-    datetime: str
+    datetime: datetime
 
 class MedicineTakeGet(MedicineTakeCreate):
     id: int
@@ -109,6 +111,37 @@ class MedicineTakeGet(MedicineTakeCreate):
         orm_mode = True
 
 
+class ClinicAvailability(BaseModel):
+    clinic_id: int
+    slot_minutes: int
+    free: List[datetime]
+
+
+class VaccinationDue(BaseModel):
+    pet_id: int
+    pet_name: Optional[str] = None
+    breed_id: Optional[int] = None
+    vaccine_id: int
+    last_vaccinated_at: Optional[datetime] = None
+    due_at: Optional[datetime] = None
+
+
+class VaccinationReport(BaseModel):
+    overdue: List[VaccinationDue]
+    due: List[VaccinationDue]
+    never_vaccinated: List[VaccinationDue]
+    overdue_total: int
+    due_total: int
+    never_vaccinated_total: int
+
+
+class DoseDue(BaseModel):
+    pet_id: int
+    medicine_id: int
+    last_taken_at: datetime
+    due_at: datetime
+
+
 class ProcedureSummary(BaseModel):
     type: str
     name: str
@@ -155,6 +188,7 @@ class AppointmentPatch(BaseModel):
 class AppointmentGet(BaseModel):
     id: int
     pet_id: int
+    pet_name: Optional[str] = None
     scheduled_at: datetime
     clinic_id: Optional[int]
     status: str
@@ -167,7 +201,7 @@ class AppointmentGet(BaseModel):
 
 class AppointmentCreate(BaseModel):
     pet_id: int
-    scheduled_at: str
+    scheduled_at: datetime
     clinic_id: int
     status: str
     conclusion_status: str
@@ -180,3 +214,43 @@ class RecommendationRequest(BaseModel):
 class RecommendationResponse(BaseModel):
     recommendations: str
 
+
+class RecommendationJobGet(BaseModel):
+    id: int
+    status: str
+    total: int
+    processed: int
+    last_pet_id: int
+    failed: int
+    skipped: int
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class BulkItemError(BaseModel):
+    index: int
+    detail: Any
+
+
+class BulkCreated(BaseModel):
+    index: int
+    id: int
+
+
+class BulkResult(BaseModel):
+    created: List[BulkCreated]
+    errors: List[BulkItemError]
+
+
+class TimelineEntry(BaseModel):
+    kind: Literal["appointment", "vaccination", "analysis", "medicine_take"]
+    id: int
+    at: datetime
+    appointment_id: Optional[int] = None
+    ref_id: Optional[int] = None
+    name: Optional[str] = None
+    status: Optional[str] = None
@@ -0,0 +1,47 @@
+from bisect import bisect_right
+from datetime import datetime, time, timedelta
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from .config import AVAILABILITY_MAX_DAYS
+from .models import VeterinaryClinic
+from .repository import get_clinic_bookings, naive_utc
+
+# Every appointment holds its clinic for one slot, so the sorted start times
+# from the (clinic_id, scheduled_at) index are an interval index: a slot
+# [start, start + slot) is taken exactly when some booking starts inside
+# (start - slot, start + slot). Slots are laid out from midnight each day.
+
+
+def slot_starts(since: datetime, until: datetime, slot: timedelta):
+    day = datetime.combine(since.date(), time.min)
+    while day < until:
+        # first slot of the day at or after `since`
+        start = day if since <= day else day - ((day - since) // slot) * slot
+        next_day = day + timedelta(days=1)
+        while start < next_day and start + slot <= until:
+            yield start
+            start += slot
+        day = next_day
+
+
+def is_free(bookings, start: datetime, slot: timedelta):
+    index = bisect_right(bookings, start - slot)
+    return index == len(bookings) or bookings[index] >= start + slot
+
+
+def free_slots(bookings, since: datetime, until: datetime, slot: timedelta):
+    return [start for start in slot_starts(since, until, slot) if is_free(bookings, start, slot)]
+
+
+def get_clinic_availability(db: Session, clinic_id: int, since: datetime, until: datetime):
+    since, until = naive_utc(since), naive_utc(until)
+    if until <= since:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+    if until - since > timedelta(days=AVAILABILITY_MAX_DAYS):
+        raise HTTPException(status_code=400, detail=f"At most {AVAILABILITY_MAX_DAYS} days per request")
+    clinic = db.get(VeterinaryClinic, clinic_id)
+    if clinic is None:
+        raise HTTPException(status_code=404, detail="Clinic not found")
+    slot = timedelta(minutes=clinic.slot_minutes)
+    bookings = get_clinic_bookings(db, clinic_id, since - slot, until)
+    return {"clinic_id": clinic_id, "slot_minutes": clinic.slot_minutes, "free": free_slots(bookings, since, until, slot)}
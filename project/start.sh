@@ -6,4 +6,5 @@ set -o allexport
 
 source .env set
 
+python3 -m alembic -c ../alembic.ini upgrade head
 python3 -m uvicorn main:app --reload
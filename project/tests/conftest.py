@@ -0,0 +1,66 @@
+import os
+import tempfile
+import pytest
+
+# src.config is read when the app is imported, so the environment is set here,
+# before any test module imports it.
+_directory = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_directory, 'test.db')}"
+os.environ["QUERY_BUDGET_MODE"] = "log"
+os.environ["CATALOG_VERSION_DIR"] = os.path.join(_directory, "catalog")
+os.environ["METRICS_DIR"] = os.path.join(_directory, "metrics")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("SECRET_KEY", "tests")
+os.environ.setdefault("ORIGINS", "*")
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+# with count_queries() as log: ... counts the statements of the requests made
+# inside the block (log.count, and log.shapes per statement shape)
+@pytest.fixture
+def count_queries():
+    from src.query_budget import count_queries
+    return count_queries
+
+
+# one app and database for the session, seeded like benchmarks.query_counts;
+# yields the client and the owner's auth headers
+@pytest.fixture(scope="session")
+async def client(anyio_backend):
+    import httpx
+    import main
+    from benchmarks.query_counts import seed
+    from src.database import Base, get_engine, session
+
+    Base.metadata.create_all(bind=get_engine())
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await main.app.router.startup()
+        await client.post("/users/register", json={"user_name": "owner", "email": "owner@example.com", "password": "secret", "role": "user"})
+        with session() as db:
+            seed(db)
+        token = (await client.post("/users/login", data={"username": "owner", "password": "secret"})).json()
+        yield client, {"Authorization": f"Bearer {token['access_token']}"}
+        await main.app.router.shutdown()
+
+
+# Points the recommendation client at src.fake_llm, served in-process, and
+# yields the fake's app: app.state.calls counts upstream calls, app.state.delay
+# and app.state.status shape its answers.
+@pytest.fixture
+async def fake_llm(anyio_backend):
+    import httpx
+    from openai import AsyncOpenAI
+    from src import fake_llm, recommendations
+
+    fake_llm.app.state.calls, fake_llm.app.state.delay, fake_llm.app.state.status = 0, 0.2, 200
+    http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake_llm.app))
+    previous = recommendations._aiclient
+    recommendations._aiclient = AsyncOpenAI(api_key="test", base_url="http://fake-llm/v1", http_client=http_client, max_retries=0)
+    yield fake_llm.app
+    recommendations._aiclient = previous
+    await http_client.aclose()
@@ -0,0 +1,13 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_create_returns_the_read_shape(client):
+    client, _ = client
+    created = await client.post("/appointments/", json={
+        "pet_id": 1, "clinic_id": 1, "scheduled_at": "2031-06-01T09:00:00", "status": "new", "conclusion_status": "pending",
+    })
+    assert created.status_code == 200
+    assert created.json()["pet_name"] is not None
+    assert created.json() == (await client.get(f"/appointments/{created.json()['id']}")).json()
@@ -0,0 +1,18 @@
+from datetime import datetime, timedelta
+
+
+def test_take_committed_after_a_higher_id_is_applied():
+    from src.dosing import DoseSchedule
+
+    now = datetime.utcnow()
+    schedule = DoseSchedule()
+    schedule.load(("m", "t"), {1: 24}, [], 10)
+
+    # id 12 is visible first; id 11 commits later
+    schedule.apply([(12, 1, 1, now - timedelta(hours=2))])
+    assert schedule.catch_up_from() < 11
+    schedule.apply([(11, 2, 1, now - timedelta(hours=1)), (12, 1, 1, now - timedelta(hours=2))])
+
+    doses = schedule.due_before(now + timedelta(days=2), 10, now)
+    assert [(dose.pet_id, dose.medicine_id) for dose in doses] == [(1, 1), (2, 1)]
+    assert len(schedule.heap) == 2
@@ -0,0 +1,18 @@
+import os
+import pytest
+from fastapi import HTTPException
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_broken_pool_is_rebuilt():
+    from src import hashing
+
+    # the worker exits on both attempts, so the caller gets a 503
+    with pytest.raises(HTTPException) as error:
+        await hashing.run_hashing(os._exit, 1)
+    assert error.value.status_code == 503
+
+    password_hash = await hashing.hash_password_async("secret")
+    valid, _ = await hashing.verify_password_async("secret", password_hash)
+    assert valid
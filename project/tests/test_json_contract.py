@@ -0,0 +1,28 @@
+import random
+import pytest
+from benchmarks.json_contract import add_edge_rows, cases, compare, list_routes
+
+# Every page of the list routes encoded by page_json must be byte for byte what
+# the route's response_model produces from the same rows; see
+# benchmarks.json_contract. The data is the session's seed plus the edge rows.
+pytestmark = pytest.mark.anyio
+
+CASES = cases(random.Random(1))
+
+
+@pytest.fixture(scope="module")
+def edge_pet_id(client):
+    from src.database import session
+
+    with session() as db:
+        return add_edge_rows(db)
+
+
+@pytest.mark.parametrize("path, model, load", CASES, ids=[f"{path} {index}" for index, (path, _, _) in enumerate(CASES)])
+@pytest.mark.parametrize("limit", [2, 500])
+async def test_page_json_matches_response_model(edge_pet_id, path, model, load, limit):
+    import main
+    from src.database import session
+
+    _, difference = await compare(list_routes(main.app)[path], session, model, load, edge_pet_id, limit)
+    assert difference is None, difference
@@ -0,0 +1,21 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_deleted_user_loses_access(client):
+    from src.catalog import bump_catalog
+    from src.database import session
+    from src.models import User
+
+    client, _ = client
+    await client.post("/users/register", json={"user_name": "leaver", "email": "leaver@example.com", "password": "secret", "role": "user"})
+    token = (await client.post("/users/login", data={"username": "leaver", "password": "secret"})).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert (await client.get("/pets/", headers=headers)).status_code == 200
+
+    with session() as db:
+        db.query(User).filter(User.email == "leaver@example.com").delete()
+        db.commit()
+    bump_catalog("users")
+    assert (await client.get("/pets/", headers=headers)).status_code == 401
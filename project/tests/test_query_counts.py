@@ -0,0 +1,17 @@
+import pytest
+from benchmarks.query_counts import CASES
+
+# The cases run in order against one database; see benchmarks.query_counts.
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("method, path, options, expected", CASES, ids=[f"{method} {path}" for method, path, _, _ in CASES])
+async def test_query_count(client, count_queries, method, path, options, expected):
+    client, headers = client
+    options = dict(options)
+    if options.pop("auth", False):
+        options["headers"] = headers
+    with count_queries() as log:
+        response = await client.request(method, path, **options)
+    assert response.status_code == 200, response.text
+    assert log.count == expected, "\n".join(f"{count}x {shape}" for shape, count in log.shapes.most_common())
@@ -0,0 +1,19 @@
+import pytest
+from benchmarks.query_plans import CASES, build_database, explain
+
+# EXPLAIN QUERY PLAN of every hot repository query on a migrated database; see
+# benchmarks.query_plans. Building the database also checks the models against
+# the migrations.
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    engine = build_database(f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}")
+    yield engine
+    engine.dispose()
+
+
+@pytest.mark.parametrize("name, fn", CASES, ids=[name for name, _ in CASES])
+def test_uses_indexes(engine, name, fn):
+    for statement, plan, bad in explain(engine, name, fn):
+        assert not bad, " ".join(statement.split()) + "\n" + "\n".join(plan)
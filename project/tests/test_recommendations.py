@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+
+# The LLM path against src.fake_llm: concurrent requests share one upstream
+# call, a slow answer is a 504 and an upstream error a 502.
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def breed_id(client):
+    from src.database import session
+    from src.models import Breed
+
+    with session() as db:
+        breed = Breed(name="uncached")
+        db.add(breed)
+        db.commit()
+        return breed.id
+
+
+async def test_concurrent_requests_share_one_call(client, fake_llm, breed_id):
+    client, _ = client
+    body = {"breed_id": breed_id, "age": 2}
+    responses = await asyncio.gather(
+        *(client.post("/recommendations/", json=body) for _ in range(5)),
+        *(client.post("/recommendations/stream", json=body) for _ in range(2)),
+    )
+    assert [response.status_code for response in responses] == [200] * 7
+    texts = {response.json()["recommendations"] for response in responses[:5]}
+    assert len(texts) == 1 and texts.pop().startswith("Fake recommendation")
+    assert all("event: done" in response.text for response in responses[5:])
+    assert fake_llm.state.calls == 1
+
+
+async def test_slow_service_is_a_timeout(client, fake_llm, breed_id, monkeypatch):
+    from src import recommendations
+
+    client, _ = client
+    monkeypatch.setattr(recommendations, "RECOMMENDATIONS_TIMEOUT", 0.05)
+    response = await client.post("/recommendations/", json={"breed_id": breed_id, "age": 3})
+    assert response.status_code == 504
+
+
+async def test_upstream_error_is_a_bad_gateway(client, fake_llm, breed_id):
+    client, _ = client
+    fake_llm.state.status = 500
+    response = await client.post("/recommendations/", json={"breed_id": breed_id, "age": 4})
+    assert response.status_code == 502
+    stream = await client.post("/recommendations/stream", json={"breed_id": breed_id, "age": 5})
+    assert "event: error" in stream.text
+    assert fake_llm.state.calls == 2
@@ -0,0 +1,47 @@
+import json
+from datetime import datetime
+import pytest
+
+# Times are stored as naive UTC; bounds given with an offset select the same rows.
+pytestmark = pytest.mark.anyio
+
+SINCE = "2030-01-01T13:00:00+03:00"  # 10:00 UTC
+UNTIL = "2030-01-01T14:30:00+03:00"  # 11:30 UTC
+INSIDE = [datetime(2030, 1, 1, 10, 0), datetime(2030, 1, 1, 10, 30), datetime(2030, 1, 1, 11, 0)]
+OUTSIDE = [datetime(2030, 1, 1, 9, 30), datetime(2030, 1, 1, 11, 30)]
+
+
+@pytest.fixture(scope="module")
+def rows(client):
+    from src.database import session
+    from src.models import Appointment, Medicine, MedicineTake, VeterinaryClinic
+
+    with session() as db:
+        clinic = VeterinaryClinic(name="offsets", address="", phone="")
+        medicine = Medicine(name="offsets", period_hours=0)
+        db.add_all([clinic, medicine])
+        db.flush()
+        for at in INSIDE + OUTSIDE:
+            db.add(Appointment(pet_id=1, clinic_id=clinic.id, scheduled_at=at, status="new", conclusion_status="pending"))
+            db.add(MedicineTake(pet_id=1, medicine_id=medicine.id, datetime=at))
+        db.commit()
+        return clinic.id, medicine.id
+
+
+async def test_appointment_list(client, rows):
+    client, _ = client
+    response = await client.get("/appointments/", params={"clinic_id": rows[0], "since": SINCE, "until": UNTIL})
+    assert [item["scheduled_at"] for item in response.json()] == [at.isoformat() for at in INSIDE]
+
+
+async def test_appointment_export(client, rows):
+    client, _ = client
+    response = await client.get("/appointments/export", params={"since": SINCE, "until": UNTIL})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["scheduled_at"] for line in lines if line["clinic_id"] == rows[0]] == [at.isoformat() for at in INSIDE]
+
+
+async def test_medicine_take_list(client, rows):
+    client, _ = client
+    response = await client.get("/medicine-takes/", params={"medicine_id": rows[1], "since": SINCE, "until": UNTIL})
+    assert [item["datetime"] for item in response.json()] == [at.isoformat() for at in INSIDE]